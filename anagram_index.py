@@ -0,0 +1,188 @@
+"""Anagram index: the words of a lexicon grouped by alphagram (their letters in sorted order).
+
+A rack query looks up the alphagrams of the rack instead of permuting its tiles. Blanks
+are enumerated as multisets of letters, so two blanks cost at most 351 extra lookups. The
+index is saved next to the lexicon and memory-mapped, so it is only built once:
+
+    python anagram_index.py collins2019.txt --output collins2019.anagrams
+"""
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import combinations_with_replacement, product
+
+# Saved file layout (all integers little-endian):
+#   header         magic, version, group count, alphagram bytes, word bytes
+#   alpha_offsets  uint32[group count + 1]  start of every alphagram in the alphagram bytes
+#   word_offsets   uint32[group count + 1]  start of every group in the word bytes
+#   alphagrams     utf-8, sorted, concatenated
+#   words          utf-8, every group's words sorted and concatenated; anagrams of one
+#                  alphagram all have its byte length, so no separators are needed
+ANAGRAM_MAGIC = b'ANAG'
+ANAGRAM_VERSION = 1
+_HEADER = struct.Struct('<4sIIII')
+
+
+class AnagramIndex:
+    """Sorted alphagrams with offsets into their groups of words."""
+
+    def __init__(self, alpha_offsets, word_offsets, alphagrams, words):
+        self._alpha_offsets = alpha_offsets
+        self._word_offsets = word_offsets
+        self._alphagrams = alphagrams
+        self._words = words
+        self._mmap = None
+        self.alphabet = ''.join(sorted(set(bytes(alphagrams).decode('utf-8'))))
+
+    @classmethod
+    def from_words(cls, words) -> 'AnagramIndex':
+        groups = {}
+        for word in words:
+            word = word.strip().lower()
+            if word:
+                groups.setdefault(''.join(sorted(word)), set()).add(word)
+
+        alpha_offsets = array('I', [0])
+        word_offsets = array('I', [0])
+        alphagrams = bytearray()
+        word_bytes = bytearray()
+        # Code point order is utf-8 byte order, so the keys sort the same way as their bytes
+        for alphagram in sorted(groups):
+            alphagrams += alphagram.encode('utf-8')
+            for word in sorted(groups[alphagram]):
+                word_bytes += word.encode('utf-8')
+            alpha_offsets.append(len(alphagrams))
+            word_offsets.append(len(word_bytes))
+        return cls(alpha_offsets, word_offsets, bytes(alphagrams), bytes(word_bytes))
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'AnagramIndex':
+        with open(file_path, 'r') as file:
+            return cls.from_words(file)
+
+    @classmethod
+    def from_dawg(cls, dawg) -> 'AnagramIndex':
+        """Builds the index from a lexicon that is already loaded."""
+        return cls.from_words(dawg.collect_all_words(dawg.root, ""))
+
+    def __len__(self) -> int:
+        return len(self._alpha_offsets) - 1
+
+    def anagrams(self, rack) -> list:
+        """Returns the words that use exactly the tiles of the rack. A '?' tile is a blank."""
+        letters, blanks = _split_rack(rack)
+        words = set()
+        for filler in combinations_with_replacement(self.alphabet, blanks):
+            words.update(self._group(''.join(sorted(letters + list(filler)))))
+        return sorted(words)
+
+    def subanagrams(self, rack, min_length: int = 2) -> list:
+        """Returns the words that use some of the tiles of the rack. A '?' tile is a blank."""
+        letters, blanks = _split_rack(rack)
+        counts = {}
+        for letter in letters:
+            counts[letter] = counts.get(letter, 0) + 1
+
+        fillers = [filler for size in range(blanks + 1) for filler in combinations_with_replacement(self.alphabet, size)]
+        alphagrams = set()
+        for chosen in product(*(range(count + 1) for count in counts.values())):
+            subset = [letter for letter, count in zip(counts, chosen) for _ in range(count)]
+            for filler in fillers:
+                if len(subset) + len(filler) >= min_length:
+                    alphagrams.add(''.join(sorted(subset + list(filler))))
+
+        words = set()
+        for alphagram in alphagrams:
+            words.update(self._group(alphagram))
+        return sorted(words)
+
+    def _alphagram(self, index: int) -> bytes:
+        return bytes(self._alphagrams[self._alpha_offsets[index]:self._alpha_offsets[index + 1]])
+
+    def _group(self, alphagram: str) -> list:
+        key = alphagram.encode('utf-8')
+        index = bisect_left(range(len(self)), key, key=self._alphagram)
+        if index == len(self) or self._alphagram(index) != key:
+            return []
+        start, end = self._word_offsets[index], self._word_offsets[index + 1]
+        return [bytes(self._words[i:i + len(key)]).decode('utf-8') for i in range(start, end, len(key))]
+
+    def save(self, file_path: str):
+        alpha_offsets = array('I', self._alpha_offsets)
+        word_offsets = array('I', self._word_offsets)
+        if sys.byteorder != 'little':
+            alpha_offsets.byteswap()
+            word_offsets.byteswap()
+        with open(file_path, 'wb') as file:
+            file.write(_HEADER.pack(ANAGRAM_MAGIC, ANAGRAM_VERSION, len(self), len(self._alphagrams), len(self._words)))
+            file.write(alpha_offsets.tobytes())
+            file.write(word_offsets.tobytes())
+            file.write(self._alphagrams)
+            file.write(self._words)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'AnagramIndex':
+        """Memory-maps an index written by `save`."""
+        with open(file_path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, groups, alphagram_size, word_size = _HEADER.unpack_from(buffer, 0)
+        if magic != ANAGRAM_MAGIC or version != ANAGRAM_VERSION:
+            buffer.close()
+            raise ValueError(f"{file_path} is not a version {ANAGRAM_VERSION} anagram index.")
+
+        view = memoryview(buffer)
+        position = _HEADER.size
+        alpha_offsets = _uint32_view(view[position:position + 4 * (groups + 1)])
+        position += 4 * (groups + 1)
+        word_offsets = _uint32_view(view[position:position + 4 * (groups + 1)])
+        position += 4 * (groups + 1)
+        alphagrams = view[position:position + alphagram_size]
+        position += alphagram_size
+        words = view[position:position + word_size]
+
+        index = cls(alpha_offsets, word_offsets, alphagrams, words)
+        index._mmap = buffer
+        return index
+
+    def close(self):
+        # The memoryviews must be released before the mapping can be closed
+        if self._mmap is None:
+            return
+        for name in ('_alpha_offsets', '_word_offsets', '_alphagrams', '_words'):
+            view = getattr(self, name)
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+        self._mmap = None
+
+
+def _split_rack(rack) -> tuple:
+    letters = [tile.lower() for tile in rack if tile != '?']
+    return letters, len(rack) - len(letters)
+
+
+def _uint32_view(view):
+    if sys.byteorder == 'little':
+        return view.cast('I')
+    values = array('I', view.tobytes())
+    values.byteswap()
+    return values
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Builds the anagram index of a word list.")
+    parser.add_argument('lexicon')
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args(argv)
+
+    index = AnagramIndex.from_file(args.lexicon)
+    index.save(args.output)
+    print(f"{len(index)} alphagrams written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Reproducible benchmarks for building the lexicon, lookups and the solvers.
+
+Every random choice comes from the seed, so two runs on the same tree measure the same work.
+Results are written as JSON; pass an earlier result file to --compare to flag regressions:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+import findmatchingwords
+from dawg import DAWG
+from game_set import GameSet
+
+WILDCARD_PATTERNS = ["ca?", "qu*", "*ing", "re*ed", "un*ly", "?a?e?", "*x", "??", "*q*z*", "*a*e*"]
+RACK_PATTERNS = ["?", "?e", "a??", "in?"]
+
+# Metrics where a larger value is a regression; every other metric is informational
+LOWER_IS_BETTER = ('seconds', 'peak_bytes', 'mean_turn_seconds', 'max_turn_seconds')
+
+
+def bench_build(lexicon_path: str, measure_memory: bool = True) -> tuple:
+    """Times DAWG.build_from_file and counts the graph, then repeats the build under tracemalloc for the peak memory."""
+    start = time.perf_counter()
+    dictionary = DAWG(lexicon_path)
+    result = {'seconds': time.perf_counter() - start}
+    result.update(dictionary.stats())
+
+    if measure_memory:
+        tracemalloc.start()
+        DAWG(lexicon_path)
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return dictionary, result
+
+
+def bench_search(dictionary: DAWG, words: list, rng: random.Random, lookups: int) -> dict:
+    """Looks up a seeded mix of lexicon words and random non-words."""
+    queries = [rng.choice(words) for _ in range(lookups // 2)]
+    queries += [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9)))
+                for _ in range(lookups - len(queries))]
+    rng.shuffle(queries)
+
+    start = time.perf_counter()
+    hits = sum(1 for word in queries if dictionary.search(word))
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'lookups': len(queries), 'hits': hits, 'lookups_per_second': len(queries) / seconds}
+
+
+def bench_wildcard(dictionary: DAWG, patterns: list) -> dict:
+    """Runs every pattern of the fixed wildcard corpus."""
+    per_pattern = {}
+    start = time.perf_counter()
+    for pattern in patterns:
+        pattern_start = time.perf_counter()
+        matches = len(dictionary.wildcard_search(pattern))
+        per_pattern[pattern] = {'seconds': time.perf_counter() - pattern_start, 'matches': matches}
+    return {'seconds': time.perf_counter() - start, 'patterns': per_pattern}
+
+
+def bench_find_matching_words(dictionary: DAWG, bag: list, rng: random.Random, racks: int) -> dict:
+    """Solves seeded racks drawn from the tile bag against the rack patterns."""
+    queries = [(rng.choice(RACK_PATTERNS), [tile.lower() for tile in rng.sample(bag, 7)]) for _ in range(racks)]
+
+    start = time.perf_counter()
+    matches = sum(len(findmatchingwords.find_matching_words(pattern, rack, dictionary)) for pattern, rack in queries)
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'racks': len(queries), 'matches': matches, 'racks_per_second': len(queries) / seconds}
+
+
+def bench_computer_turns(dictionary: DAWG, seed: int, turns: int) -> dict:
+    """Plays computer turns on a seeded game, alternating between the players."""
+    game = GameSet(dictionary=dictionary, auto_start=False, seed=seed, verbose=False)
+    players = list(game.players)
+    timings = []
+    for turn in range(turns):
+        turn_start = time.perf_counter()
+        game.computer_move(players[turn % len(players)])
+        timings.append(time.perf_counter() - turn_start)
+
+    return {
+        'seconds': sum(timings),
+        'turns': turns,
+        'mean_turn_seconds': sum(timings) / turns,
+        'max_turn_seconds': max(timings),
+        'tiles_on_board': sum(1 for line in game.board for cell in line if cell),
+        'scores': [game.players[player]['score'] for player in players],
+    }
+
+
+def run_benchmarks(lexicon_path: str = 'collins2019.txt', tile_file: str = 'tiles.json', seed: int = 1,
+                   lookups: int = 100000, racks: int = 200, turns: int = 20, measure_memory: bool = True) -> dict:
+    """Runs the whole suite and returns the results with enough metadata to compare runs."""
+    rng = random.Random(seed)
+    with open(lexicon_path, 'r') as f:
+        words = [line.strip().lower() for line in f if line.strip()]
+    with open(tile_file, 'r') as f:
+        tiles = json.load(f)['English']['tiles']
+    bag = [tile for tile, info in tiles.items() for _ in range(info['count'])]
+
+    dictionary, build = bench_build(lexicon_path, measure_memory)
+    return {
+        'meta': {
+            'lexicon': lexicon_path,
+            'words': len(words),
+            'seed': seed,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': {
+            'build': build,
+            'search': bench_search(dictionary, words, rng, lookups),
+            'wildcard_search': bench_wildcard(dictionary, WILDCARD_PATTERNS),
+            'find_matching_words': bench_find_matching_words(dictionary, bag, rng, racks),
+            'computer_turns': bench_computer_turns(dictionary, seed, turns),
+        },
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Returns a description of every metric that got worse than the baseline by more than the tolerance."""
+    regressions = []
+    for name, metrics in current['results'].items():
+        previous = baseline.get('results', {}).get(name, {})
+        for metric in LOWER_IS_BETTER:
+            if metric in metrics and metric in previous and metrics[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {previous[metric]:.6g} -> {metrics[metric]:.6g}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lexicon', default='collins2019.txt')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--racks', type=int, default=200)
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced build used for peak memory")
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="earlier JSON results to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.lexicon, seed=args.seed, lookups=args.lookups, racks=args.racks,
+                             turns=args.turns, measure_memory=not args.no_memory)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
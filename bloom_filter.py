@@ -0,0 +1,87 @@
+import hashlib
+import math
+import struct
+
+# Saved file layout (all integers little-endian):
+#   header  magic, version, bit count, hash count
+#   bits    the bit array, bit i in byte i // 8 at position i % 8
+BLOOM_MAGIC = b'BLOM'
+BLOOM_VERSION = 1
+_HEADER = struct.Struct('<4sIQI')
+_DIGEST = struct.Struct('<QQ')
+
+
+class BloomFilter:
+    """A set of strings that may report false positives but never false negatives.
+
+    Every item sets `hash_count` bits derived from one blake2b digest by double hashing,
+    so a membership test costs a single hash however many bits it checks.
+    """
+
+    def __init__(self, bit_count: int, hash_count: int, bits: bytearray = None):
+        if bit_count < 1 or hash_count < 1:
+            raise ValueError("A bloom filter needs at least one bit and one hash.")
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((bit_count + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> 'BloomFilter':
+        """Sizes a filter for `capacity` items at the given false positive rate."""
+        if not 0 < error_rate < 1:
+            raise ValueError("The error rate must be between 0 and 1.")
+        capacity = max(capacity, 1)
+        bit_count = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        return cls(bit_count, hash_count)
+
+    @classmethod
+    def from_words(cls, words, error_rate: float = 0.01) -> 'BloomFilter':
+        words = list(words)
+        bloom = cls.for_capacity(len(words), error_rate)
+        for word in words:
+            bloom.add(word)
+        return bloom
+
+    @classmethod
+    def from_dawg(cls, dawg, error_rate: float = 0.01) -> 'BloomFilter':
+        """Builds a prefilter holding every word of a DAWG or CompiledDAWG."""
+        return cls.from_words(dawg.collect_all_words(dawg.root, ""), error_rate)
+
+    def add(self, item: str):
+        bits, bit_count = self.bits, self.bit_count
+        first, second = _hashes(item)
+        for i in range(self.hash_count):
+            position = (first + i * second) % bit_count
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits, bit_count = self.bits, self.bit_count
+        first, second = _hashes(item)
+        for i in range(self.hash_count):
+            position = (first + i * second) % bit_count
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def save(self, file_path: str):
+        with open(file_path, 'wb') as file:
+            file.write(_HEADER.pack(BLOOM_MAGIC, BLOOM_VERSION, self.bit_count, self.hash_count))
+            file.write(self.bits)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'BloomFilter':
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        magic, version, bit_count, hash_count = _HEADER.unpack_from(data, 0)
+        if magic != BLOOM_MAGIC or version != BLOOM_VERSION:
+            raise ValueError(f"{file_path} is not a version {BLOOM_VERSION} bloom filter.")
+        bits = bytearray(data[_HEADER.size:])
+        if len(bits) != (bit_count + 7) // 8:
+            raise ValueError(f"{file_path} is truncated.")
+        return cls(bit_count, hash_count, bits)
+
+
+def _hashes(item: str) -> tuple:
+    first, second = _DIGEST.unpack(hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest())
+    return first, second | 1
@@ -0,0 +1,142 @@
+import random
+from array import array
+from functools import lru_cache
+from move_generator import Move
+
+# Fixed seed so Zobrist hashes agree between processes and runs
+ZOBRIST_SEED = 0x5EED
+MAX_RACK_COUNT = 16
+
+
+class BoardState:
+    """A compact game position that lookahead can change and restore in place.
+
+    Squares are a flat bytearray of letter codes (0 for empty, 1.. for the alphabet), blanks
+    on the board are a bitmask over the square indices, and every rack is an array of letter
+    counts with the blanks at index 0. `apply` and `undo` cost O(tiles in the move) and keep
+    a Zobrist hash of the board and of every rack up to date.
+    """
+
+    def __init__(self, width: int, height: int, alphabet: str, num_players: int = 2):
+        self.width = width
+        self.height = height
+        self.alphabet = alphabet
+        self.codes = {letter: code for code, letter in enumerate(alphabet, 1)}
+        self.cells = bytearray(width * height)
+        self.blanks = 0
+        self.racks = [array('B', bytes(len(alphabet) + 1)) for _ in range(num_players)]
+        self.board_hash = 0
+        self.rack_hashes = [0] * num_players
+        self._history = []
+
+        self._square_keys, self._blank_keys, self._rack_keys = _zobrist_keys(width * height, len(alphabet) + 1, num_players)
+
+    @classmethod
+    def from_game(cls, game) -> 'BoardState':
+        """Takes a snapshot of a GameSet's board and racks."""
+        alphabet = ''.join(sorted(tile.lower() for tile in game.tiles if tile != '?'))
+        state = cls(len(game.board[0]), len(game.board), alphabet, len(game.players))
+        letters = game.move_generator.letters
+        for row, line in enumerate(game.board):
+            for col, tile in enumerate(line):
+                if tile:
+                    state._set_square(row * state.width + col, state.codes[letters[row][col]], tile == '?')
+        for player, data in enumerate(game.players.values()):
+            state.set_rack(player, data['tiles'])
+        return state
+
+    @property
+    def hash(self) -> int:
+        """Zobrist hash of the board together with all racks."""
+        value = self.board_hash
+        for rack_hash in self.rack_hashes:
+            value ^= rack_hash
+        return value
+
+    def copy(self) -> 'BoardState':
+        """Returns an independent copy of the position."""
+        state = object.__new__(BoardState)
+        state.__dict__.update(self.__dict__)
+        state.cells = bytearray(self.cells)
+        state.racks = [array('B', rack) for rack in self.racks]
+        state.rack_hashes = list(self.rack_hashes)
+        state._history = []
+        return state
+
+    def letter_at(self, row: int, col: int) -> str:
+        """Returns the lowercase letter on a square, or None when it is empty."""
+        code = self.cells[row * self.width + col]
+        return self.alphabet[code - 1] if code else None
+
+    def is_blank(self, row: int, col: int) -> bool:
+        """Returns whether the tile on a square is a blank."""
+        return bool(self.blanks >> (row * self.width + col) & 1)
+
+    def rack(self, player: int) -> list:
+        """Returns a player's rack as tiles, with '?' for blanks."""
+        counts = self.racks[player]
+        tiles = ['?'] * counts[0]
+        for code, letter in enumerate(self.alphabet, 1):
+            tiles.extend([letter.upper()] * counts[code])
+        return tiles
+
+    def set_rack(self, player: int, tiles):
+        """Replaces a player's rack, for instance with a sampled opponent rack."""
+        counts = self.racks[player]
+        for code in range(len(counts)):
+            counts[code] = 0
+        for tile in tiles:
+            counts[0 if tile == '?' else self.codes[tile.lower()]] += 1
+        keys = self._rack_keys[player]
+        self.rack_hashes[player] = 0
+        for code, count in enumerate(counts):
+            self.rack_hashes[player] ^= keys[code][count]
+
+    def apply(self, move: Move, player: int):
+        """Plays a move from a player's rack; `undo` reverts the most recent one."""
+        width = self.width
+        for row, col, letter, is_blank in move.tiles:
+            code = self.codes[letter]
+            self._set_square(row * width + col, code, is_blank)
+            self._change_rack(player, 0 if is_blank else code, -1)
+        self._history.append((move, player))
+
+    def undo(self):
+        """Reverts the most recently applied move."""
+        move, player = self._history.pop()
+        width = self.width
+        for row, col, letter, is_blank in move.tiles:
+            code = self.codes[letter]
+            self._clear_square(row * width + col, code, is_blank)
+            self._change_rack(player, 0 if is_blank else code, 1)
+
+    def _set_square(self, index: int, code: int, is_blank: bool):
+        self.cells[index] = code
+        self.board_hash ^= self._square_keys[index][code]
+        if is_blank:
+            self.blanks |= 1 << index
+            self.board_hash ^= self._blank_keys[index]
+
+    def _clear_square(self, index: int, code: int, is_blank: bool):
+        self.cells[index] = 0
+        self.board_hash ^= self._square_keys[index][code]
+        if is_blank:
+            self.blanks &= ~(1 << index)
+            self.board_hash ^= self._blank_keys[index]
+
+    def _change_rack(self, player: int, code: int, delta: int):
+        counts = self.racks[player]
+        keys = self._rack_keys[player][code]
+        self.rack_hashes[player] ^= keys[counts[code]] ^ keys[counts[code] + delta]
+        counts[code] += delta
+
+
+@lru_cache(maxsize=None)
+def _zobrist_keys(squares: int, codes: int, num_players: int) -> tuple:
+    rng = random.Random(ZOBRIST_SEED)
+    square_keys = tuple(tuple(rng.getrandbits(64) for _ in range(codes)) for _ in range(squares))
+    blank_keys = tuple(rng.getrandbits(64) for _ in range(squares))
+    # One key per (player, letter, count), so a rack hashes the same whatever the tile order
+    rack_keys = tuple(tuple(tuple(rng.getrandbits(64) for _ in range(MAX_RACK_COUNT)) for _ in range(codes))
+                      for _ in range(num_players))
+    return square_keys, blank_keys, rack_keys
@@ -1,3 +1,27 @@
+import heapq
+import mmap
+import struct
+import sys
+import tempfile
+from array import array
+from collections import Counter
+from instrumentation import profiler
+
+# Compiled file layout (all integers little-endian):
+#   header   magic, version, node count, edge count, alphabet size in bytes
+#   alphabet utf-8 letters, padded to a multiple of 4 bytes
+#   offsets  uint32[node_count + 1]  first edge of every node (CSR style)
+#   targets  uint32[edge_count]      child node of every edge
+#   letters  uint8[edge_count]       letter code of every edge
+#   finals   uint8[node_count]       non-zero when the node ends a word (lexicon flags in a shared graph)
+COMPILED_MAGIC = b'DAWG'
+COMPILED_VERSION = 1
+_HEADER = struct.Struct('<4sIIII')
+
+# Words sorted in memory at a time when a word list is not sorted already
+SORT_CHUNK_SIZE = 1000000
+
+
 class DAWGNode:
     def __init__(self):
         self.edges = {}
@@ -9,28 +33,281 @@ class DAWGNode:
     def get_edge(self, char):
         return self.edges.get(char)
 
-class DAWG:
+    def copy(self):
+        node = DAWGNode()
+        node.edges = dict(self.edges)
+        node.final = self.final
+        return node
+
+class DAWGBase:
+    # Read-only queries shared by the in-memory DAWG and CompiledDAWG.
+    # Subclasses provide `root` and the three node accessors below.
+    root = None
+
+    def edges(self, node):
+        raise NotImplementedError
+
+    def get_edge(self, node, char):
+        raise NotImplementedError
+
+    def is_final(self, node):
+        raise NotImplementedError
+
+    def search(self, word):
+        node = self.root
+        for char in word:
+            node = self.get_edge(node, char)
+            if node is None:
+                return False
+        return bool(self.is_final(node))
+
+    def stats(self):
+        # Counts the distinct nodes and edges reachable from the root and the words they spell
+        words_below = {}
+        edges = 0
+        stack = [(self.root, False)]
+        while stack:
+            node, leaving = stack.pop()
+            if leaving:
+                count = 1 if self.is_final(node) else 0
+                for _, next_node in self.edges(node):
+                    count += words_below[next_node]
+                    edges += 1
+                words_below[node] = count
+            elif node not in words_below:
+                stack.append((node, True))
+                stack.extend((next_node, False) for _, next_node in self.edges(node) if next_node not in words_below)
+        return {'nodes': len(words_below), 'edges': edges, 'words': words_below[self.root]}
+
+    def contains_many(self, words, prefilter=None):
+        # Returns a bytearray holding 1 for every word in the lexicon and 0 otherwise, in
+        # input order (numpy.frombuffer(result, dtype=bool) views it without a copy). Words
+        # are looked up in sorted order, so each one resumes from the prefix it shares with
+        # the previous word. A prefilter such as a BloomFilter rules out most non-words
+        # before they reach the graph.
+        words = list(words)
+        result = bytearray(len(words))
+        get_edge, is_final = self.get_edge, self.is_final
+        path = [self.root]  # Nodes along the previous word, as far as it was found
+        previous, last = "", None
+        for index in sorted(range(len(words)), key=words.__getitem__):
+            word = words[index]
+            if word == previous and last is not None:
+                result[index] = result[last]
+                continue
+            if prefilter is not None and word not in prefilter:
+                continue
+            common = 0
+            limit = min(len(previous), len(word), len(path) - 1)
+            while common < limit and previous[common] == word[common]:
+                common += 1
+            del path[common + 1:]
+
+            node = path[-1]
+            for char in word[common:]:
+                node = get_edge(node, char)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                if is_final(node):
+                    result[index] = 1
+            previous, last = word, index
+        return result
+
+    def collect_all_words(self, node, prefix):
+        words = []
+        if self.is_final(node):
+            words.append(prefix)
+        for char, next_node in self.edges(node):
+            words.extend(self.collect_all_words(next_node, prefix + char))
+        return words
+
+    def wildcard_search(self, pattern, min_length=None, max_length=None):
+        with profiler.timer('lexicon.wildcard_search'):
+            return list(self.iter_wildcard(pattern, min_length, max_length))
+
+    def iter_wildcard(self, pattern, min_length=None, max_length=None):
+        # '?' matches exactly one character and '*' zero or more. The pattern is run as an
+        # NFA whose active positions are a bitmask, so every prefix in the graph is visited
+        # once with all the ways it can match, and each word is yielded once.
+        pattern = pattern.lower()
+        accept = 1 << len(pattern)
+
+        def closure(mask):
+            for i, char in enumerate(pattern):
+                if char == '*' and mask >> i & 1:
+                    mask |= 1 << (i + 1)
+            return mask
+
+        transitions = {}
+
+        def step(mask, char):
+            key = (mask, char)
+            if key not in transitions:
+                next_mask = 0
+                for i, pattern_char in enumerate(pattern):
+                    if mask >> i & 1:
+                        if pattern_char == '*':
+                            next_mask |= 1 << i
+                        elif pattern_char == '?' or pattern_char == char:
+                            next_mask |= 1 << (i + 1)
+                transitions[key] = closure(next_mask)
+            return transitions[key]
+
+        # Suffixes are shared, so the same (node, mask) state is reached through many
+        # prefixes; once one of them produced no word, the state is skipped from then on
+        bounded = min_length is not None or max_length is not None
+        dead = set()
+        found = 0
+        stack = [(False, self.root, closure(1), "", 0)]
+        while stack:
+            leaving, node, mask, prefix, found_before = stack.pop()
+            state = (node, mask, len(prefix)) if bounded else (node, mask)
+            if leaving:
+                if found == found_before:
+                    dead.add(state)
+                continue
+            if state in dead:
+                continue
+
+            stack.append((True, node, mask, prefix, found))
+            if mask & accept and self.is_final(node) and (min_length is None or len(prefix) >= min_length):
+                found += 1
+                yield prefix
+            if max_length is not None and len(prefix) >= max_length:
+                continue
+            for char, next_node in reversed(list(self.edges(node))):
+                next_mask = step(mask, char)
+                if next_mask:
+                    stack.append((False, next_node, next_mask, prefix + char, 0))
+
+    def rack_search(self, pattern, rack):
+        # Yields the words formed by rack tiles placed before and after `pattern`, with
+        # each '?' in the pattern also filled from the rack. A '?' on the rack is a blank.
+        counts = Counter(tile.lower() for tile in rack)
+        blanks = counts.pop('?', 0)
+        yield from self._rack_dfs(self.root, pattern.lower(), -1, counts, blanks, "", set())
+
+    def _rack_dfs(self, node, pattern, index, counts, blanks, prefix, seen):
+        if index < 0:
+            # Before the pattern: either start it here or put another rack tile in front
+            yield from self._rack_dfs(node, pattern, 0, counts, blanks, prefix, seen)
+        elif index == len(pattern):
+            if self.is_final(node) and prefix not in seen:
+                seen.add(prefix)
+                yield prefix
+        elif pattern[index] != '?':
+            next_node = self.get_edge(node, pattern[index])
+            if next_node is not None:
+                yield from self._rack_dfs(next_node, pattern, index + 1, counts, blanks, prefix + pattern[index], seen)
+            return
+
+        # Consume one rack tile; only fall back to a blank when the letter itself is used up
+        next_index = index + 1 if 0 <= index < len(pattern) else index
+        for char, next_node in self.edges(node):
+            if counts[char] > 0:
+                counts[char] -= 1
+                yield from self._rack_dfs(next_node, pattern, next_index, counts, blanks, prefix + char, seen)
+                counts[char] += 1
+            elif blanks > 0:
+                yield from self._rack_dfs(next_node, pattern, next_index, counts, blanks - 1, prefix + char, seen)
+
+    def compile(self, file_path):
+        # Number the nodes breadth-first so the root is always node 0
+        node_ids = {self.root: 0}
+        order = [self.root]
+        alphabet = set()
+        for node in order:
+            for char, next_node in self.edges(node):
+                alphabet.add(char)
+                if next_node not in node_ids:
+                    node_ids[next_node] = len(order)
+                    order.append(next_node)
+
+        alphabet = ''.join(sorted(alphabet))
+        if len(alphabet) > 256:
+            raise ValueError("Compiled DAWGs support at most 256 distinct letters.")
+        codes = {char: code for code, char in enumerate(alphabet)}
+
+        offsets = array('I', [0])
+        targets = array('I')
+        letters = bytearray()
+        finals = bytearray()
+        for node in order:
+            for char, next_node in sorted(self.edges(node)):
+                targets.append(node_ids[next_node])
+                letters.append(codes[char])
+            offsets.append(len(targets))
+            finals.append(int(self.is_final(node)))
+
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+            targets.byteswap()
+
+        alphabet_bytes = alphabet.encode('utf-8')
+        with open(file_path, 'wb') as file:
+            file.write(_HEADER.pack(COMPILED_MAGIC, COMPILED_VERSION, len(order), len(targets), len(alphabet_bytes)))
+            file.write(alphabet_bytes.ljust(_padded(len(alphabet_bytes)), b'\0'))
+            file.write(offsets.tobytes())
+            file.write(targets.tobytes())
+            file.write(letters)
+            file.write(finals)
+
+
+class CountingLexicon(DAWGBase):
+    # Wraps a lexicon while profiling and counts the node visits made through it:
+    # 'lexicon.expansions' for the nodes whose edges are listed and 'lexicon.lookups'
+    # for the single edges followed. Like CompiledDAWG it only answers queries.
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+        self.root = lexicon.root
+
+    def edges(self, node):
+        profiler.count('lexicon.expansions')
+        return self.lexicon.edges(node)
+
+    def get_edge(self, node, char):
+        profiler.count('lexicon.lookups')
+        return self.lexicon.get_edge(node, char)
+
+    def is_final(self, node):
+        return self.lexicon.is_final(node)
+
+
+class DAWG(DAWGBase):
     def __init__(self, file_path=None):
         self.root = DAWGNode()
         self.previous_word = ""
         self.minimized_nodes = {}
         self.unchecked_nodes = []
+        self.finished = False  # Set by `finish`; from then on words go in through `update`
+        self.version = 0  # Bumped by every update, so caches can tell their answers are stale
+        self._register_floor = 0  # Register size after it was last pruned
 
         if file_path:
             self.build_from_file(file_path)
 
-    def build_from_file(self, file_path):
+    def build_from_file(self, file_path, presorted=False, chunk_size=SORT_CHUNK_SIZE):
+        # The list is streamed: a presorted one (sorted once lowercased) is inserted as it is
+        # read, any other goes through an external merge sort, so only the graph and one
+        # sort run are ever held in memory
         with open(file_path, 'r') as file:
-            words = [line.strip().lower() for line in file]  # Convert to lowercase
-
-        words.sort()  # Ensure words are in lexicographical order
+            words = (word for word in (line.strip().lower() for line in file) if word)
+            self.build_from_words(words if presorted else external_sort(words, chunk_size))
 
-        for word in words:
-            self.insert(word)
+    def build_from_words(self, words):
+        # `words` must be in lexicographical order; `insert` rejects a word out of order
+        with profiler.timer('lexicon.build'):
+            for word in words:
+                self.insert(word)
 
-        self.finish()
+            self.finish()
 
-    def insert(self, word):
+    def insert(self, word, final=True):
+        # A finished graph shares its nodes, which only `update` knows how to change
+        if self.finished:
+            raise ValueError("Words cannot be inserted once the DAWG is finished; use add_word or update.")
         # Ensure words are inserted in lexicographical order
         if word < self.previous_word:
             raise ValueError("Words must be inserted in lexicographical order.")
@@ -52,88 +329,230 @@ class DAWG:
             self.unchecked_nodes.append((node, char, next_node))
             node = next_node
 
-        node.final = True
+        node.final = final  # A shared graph stores the flags of the lexicons holding the word
         self.previous_word = word
 
     def _minimize(self, down_to):
         for i in range(len(self.unchecked_nodes) - 1, down_to - 1, -1):
             parent, char, child = self.unchecked_nodes[i]
-            if child in self.minimized_nodes:
-                parent.add_edge(char, self.minimized_nodes[child])
+            if not child.edges and not child.final:
+                # A removal left a node that no longer leads to any word
+                del parent.edges[char]
             else:
-                self.minimized_nodes[child] = child
+                signature = self._signature(child)
+                if signature in self.minimized_nodes:
+                    parent.add_edge(char, self.minimized_nodes[signature])
+                else:
+                    self.minimized_nodes[signature] = child
             self.unchecked_nodes.pop()
 
+    @staticmethod
+    def _signature(node):
+        # Children are already minimized, so equal signatures mean equal right languages.
+        # Holding the children themselves rather than their ids keeps the key small and
+        # stops an id from being reused by another node while it is registered.
+        chars = ''.join(sorted(node.edges))
+        return node.final, chars, tuple(node.edges[char] for char in chars)
+
     def finish(self):
         self._minimize(0)
+        self.finished = True
 
-    def search(self, word):
-        node = self.root
-        for char in word:
-            node = node.get_edge(char)
-            if node is None:
-                return False
+    def edges(self, node):
+        return node.edges.items()
+
+    def get_edge(self, node, char):
+        return node.edges.get(char)
+
+    def is_final(self, node):
         return node.final
 
     def add_word(self, word):
         word = word.lower()
         if self.search(word):
             return  # The word is already present
+        self.update(additions=[word])
 
-        self.unchecked_nodes = []
-        self.previous_word = ""
+    def remove_word(self, word):
+        self.update(removals=[word])
 
-        words = self.collect_all_words(self.root, "")
-        if word not in words:
-            words.append(word)
-        words.sort()
+    def update(self, additions=(), removals=()):
+        additions = {word.lower() for word in additions if word}
+        removals = {word.lower() for word in removals if word}
+        if additions & removals:
+            raise ValueError("A word cannot be added and removed in the same update.")
 
-        self.root = DAWGNode()
-        self.minimized_nodes = {}
-        for word in words:
-            self.insert(word)
         self.finish()
-    def collect_all_words(self, node, prefix):
-        words = []
-        if node.final:
-            words.append(prefix)
-        for char, next_node in node.edges.items():
-            words.extend(self.collect_all_words(next_node, prefix + char))
-        return words
 
-    def wildcard_search(self, pattern):
-        pattern = pattern.lower()
-        results = []
-        self._wildcard_dfs(self.root, pattern, "", results)
-        return results
-
-    def _wildcard_dfs(self, node, pattern, prefix, results):
-        if not pattern:
-            if node.final:
-                results.append(prefix)
-            return
+        # Walk the changed words in order like `insert` does, cloning the registered
+        # nodes along each path and re-minimizing them once the path moves on
+        path = ""
+        for word in sorted(additions | removals):
+            adding = word in additions
+            common_prefix_length = 0
+            for i in range(min(len(word), len(path))):
+                if word[i] != path[i]:
+                    break
+                common_prefix_length += 1
+
+            self._minimize(common_prefix_length)
+            path = path[:common_prefix_length]
 
-        char = pattern[0]
-        if char == '*':
-            # '*' can match zero or more characters
-            self._wildcard_dfs(node, pattern[1:], prefix, results)  # Match zero characters
-            for edge_char, next_node in node.edges.items():
-                self._wildcard_dfs(next_node, pattern, prefix + edge_char, results)
-                self._wildcard_dfs(next_node, pattern[1:], prefix + edge_char, results)
-        elif char == '?':
-            # '?' can match exactly one character
-            for edge_char, next_node in node.edges.items():
-                self._wildcard_dfs(next_node, pattern[1:], prefix + edge_char, results)
+            node = self.unchecked_nodes[-1][2] if self.unchecked_nodes else self.root
+            for char in word[common_prefix_length:]:
+                next_node = node.get_edge(char)
+                if next_node is not None:
+                    next_node = next_node.copy()
+                elif adding:
+                    next_node = DAWGNode()
+                else:
+                    break  # The word to remove is not present
+                node.add_edge(char, next_node)
+                self.unchecked_nodes.append((node, char, next_node))
+                path += char
+                node = next_node
+            else:
+                node.final = adding
+
+        self.finish()
+        self.version += 1
+
+        # Cloning leaves the replaced nodes in the register. They cannot be dropped one by
+        # one, since another path may still share them, so once the register has doubled
+        # it is rebuilt from the nodes still in the graph
+        if not self._register_floor:
+            self._register_floor = len(self.minimized_nodes)
+        elif len(self.minimized_nodes) > 2 * self._register_floor:
+            self._prune_register()
+
+    def _prune_register(self):
+        register = {}
+        stack = [self.root]
+        while stack:
+            for next_node in stack.pop().edges.values():
+                signature = self._signature(next_node)
+                if signature not in register:
+                    register[signature] = next_node
+                    stack.append(next_node)
+        self.minimized_nodes = register
+        self._register_floor = len(register)
+
+
+class CompiledDAWG(DAWGBase):
+    # A DAWG written by `compile`, memory-mapped read-only so that every
+    # process loading the same file shares one copy of the lexicon.
+    root = 0
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, node_count, edge_count, alphabet_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != COMPILED_MAGIC or version != COMPILED_VERSION:
+            self._mmap.close()
+            raise ValueError(f"'{file_path}' is not a compiled DAWG file.")
+
+        position = _HEADER.size
+        self.alphabet = self._mmap[position:position + alphabet_size].decode('utf-8')
+        position += _padded(alphabet_size)
+        self._codes = {char: bytes([code]) for code, char in enumerate(self.alphabet)}
+        self.node_count = node_count
+        self.edge_count = edge_count
+
+        view = memoryview(self._mmap)
+        self._offsets = _uint32_view(view[position:position + 4 * (node_count + 1)])
+        position += 4 * (node_count + 1)
+        self._targets = _uint32_view(view[position:position + 4 * edge_count])
+        position += 4 * edge_count
+        self._letters_start = position
+        self._letters = view[position:position + edge_count]
+        position += edge_count
+        self._finals = view[position:position + node_count]
+
+    def edges(self, node):
+        alphabet, letters, targets = self.alphabet, self._letters, self._targets
+        for i in range(self._offsets[node], self._offsets[node + 1]):
+            yield alphabet[letters[i]], targets[i]
+
+    def get_edge(self, node, char):
+        code = self._codes.get(char)
+        if code is None:
+            return None
+        start = self._letters_start
+        index = self._mmap.find(code, start + self._offsets[node], start + self._offsets[node + 1])
+        if index < 0:
+            return None
+        return self._targets[index - start]
+
+    def is_final(self, node):
+        return self._finals[node]
+
+    def close(self):
+        # The memoryviews must be released before the mapping can be closed
+        for name in ('_offsets', '_targets', '_letters', '_finals'):
+            view = getattr(self, name)
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+
+
+def external_sort(items, chunk_size=SORT_CHUNK_SIZE):
+    # Yields the strings in sorted order without duplicates. Runs of `chunk_size` items are
+    # sorted in memory and spilled to temporary files, which are then merged lazily.
+    runs = []
+    try:
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                runs.append(_write_run(chunk))
+                chunk = []
+        if runs:
+            if chunk:
+                runs.append(_write_run(chunk))
+                chunk = []
+            merged = heapq.merge(*((line[:-1] for line in run) for run in runs))
         else:
-            next_node = node.get_edge(char)
-            if next_node:
-                self._wildcard_dfs(next_node, pattern[1:], prefix + char, results)
+            chunk.sort()
+            merged = chunk
+
+        previous = None
+        for item in merged:
+            if item != previous:
+                yield item
+                previous = item
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _write_run(chunk):
+    chunk.sort()
+    run = tempfile.TemporaryFile('w+', encoding='utf-8')
+    for item in chunk:
+        run.write(item + '\n')
+    run.seek(0)
+    return run
+
+
+def _padded(size):
+    return (size + 3) & ~3
+
+
+def _uint32_view(view):
+    if sys.byteorder == 'little':
+        return view.cast('I')
+    values = array('I', view.tobytes())
+    values.byteswap()
+    return values
 
 
 # Example usage:
 if __name__ == "__main__":
     file_path = 'collins2019.txt'
     dawg = DAWG(file_path)
+    print(dawg.stats())
 
     # Add new word
     new_word = "catalog"
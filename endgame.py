@@ -0,0 +1,182 @@
+"""Endgame search for two-player games once the stock is empty.
+
+With no tiles left to draw, both racks are known and the rest of the game is a two-player
+game of perfect information. EndgameSolver searches it with negamax alpha-beta over the
+generated moves plus passing, valuing a position as the points the player to move can still
+gain over the opponent, including the rack penalties at the end of the game.
+"""
+import time
+
+from board_state import BoardState
+from move_generator import Move
+from strategy import TranspositionCache
+
+# Transposition table bounds
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Depth stored for a position whose value was searched to the end of the game
+SOLVED = 1 << 16
+
+
+class _Timeout(Exception):
+    pass
+
+
+class EndgameSolver:
+    """Plays two-player endgames by alpha-beta search with iterative deepening.
+
+    Each iteration searches one ply deeper until the game tree is solved or the time budget
+    runs out, and the move of the deepest finished iteration is played. The first ply is
+    always finished, so there is at least the greedy move. Moves are tried best score first,
+    after the best move the transposition table remembers for the position.
+    Positions are keyed by the Zobrist hash of the board and both racks. `max_moves` keeps
+    only the best-scoring moves at every node, trading exactness for depth; None searches
+    all of them. Passes are counted against the game's `pass_limit`, so the search ends the
+    game exactly where GameSet.is_over does. While tiles are left in the stock the `fallback` strategy moves, or greedy
+    play when there is none.
+    """
+
+    def __init__(self, time_budget: float = 1.0, max_depth: int = None, max_moves: int = None,
+                 cache_size: int = 100000, fallback=None):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.max_moves = max_moves
+        self.fallback = fallback
+        self.cache = TranspositionCache(cache_size)
+        self.nodes = 0
+        self.depth = 0
+        self.solved = False
+        self.value = None
+
+    def choose_move(self, game, player: str) -> Move:
+        """Returns the move to play, or None to pass."""
+        if game.stock or len(game.players) != 2:
+            if self.fallback is not None:
+                return self.fallback.choose_move(game, player)
+            moves = list(game.move_generator.generate_moves(game.players[player]['tiles']))
+            scores = game.scorer.score_moves(game.board, moves)
+            return moves[max(range(len(moves)), key=scores.__getitem__)] if moves else None
+
+        players = list(game.players)
+        me = players.index(player)
+        self._game = game
+        self._generator = game.move_generator.copy()
+        self._state = BoardState.from_game(game)
+        self._points = game.scorer.board_points(game.board)
+        self._deadline = time.perf_counter() + self.time_budget
+        self._pass_limit = game.pass_limit
+        self.nodes = 0
+        self.solved = False
+        passes = game.consecutive_passes
+
+        best = None
+        depth = 1
+        while self.max_depth is None or depth <= self.max_depth:
+            try:
+                value, move, solved = self._root(me, passes, depth)
+            except _Timeout:
+                break
+            best, self.value, self.depth, self.solved = move, value, depth, solved
+            if solved:
+                break
+            depth += 1
+        return best
+
+    def _root(self, me: int, passes: int, depth: int) -> tuple:
+        value, solved = self._search(me, passes, depth, -SOLVED, SOLVED, timed=depth > 1)
+        entry = self.cache.get(self._key(me, passes))
+        return value, entry[3] if entry is not None else None, solved
+
+    def _key(self, player: int, passes: int) -> tuple:
+        return self._state.hash, player, passes
+
+    def _search(self, player: int, passes: int, depth: int, alpha: int, beta: int, timed: bool) -> tuple:
+        # Returns the value for the player to move and whether it holds to the end of the game
+        self.nodes += 1
+        if timed and time.perf_counter() > self._deadline:
+            raise _Timeout()
+
+        state = self._state
+        opponent = 1 - player
+        key = self._key(player, passes)
+        entry = self.cache.get(key)
+        if entry is not None:
+            entry_depth, bound, value, remembered = entry
+            if entry_depth >= depth and (bound == EXACT or (bound == LOWER and value >= beta)
+                                         or (bound == UPPER and value <= alpha)):
+                return value, entry_depth == SOLVED
+
+        if depth == 0:
+            return 0, False
+
+        rack = state.rack(player)
+        scorer = self._game.scorer
+        moves = list(self._generator.generate_moves(rack))
+        scored = sorted(((scorer.score_points(self._points, move), index) for index, move in enumerate(moves)),
+                        reverse=True)
+        candidates = [(score, moves[index]) for score, index in scored]
+        complete = self.max_moves is None or len(candidates) <= self.max_moves
+        if not complete:
+            candidates = candidates[:self.max_moves]
+        candidates.append((0, None))
+        if entry is not None:
+            # The best move of an earlier search goes first, a pass (None) included
+            candidates.sort(key=lambda candidate: candidate[1] != remembered)
+
+        original_alpha = alpha
+        best_value, best_move, solved = -SOLVED, None, complete
+        for score, move in candidates:
+            if move is None:
+                if passes + 1 >= self._pass_limit:
+                    value, exact = self._rack_points(opponent) - self._rack_points(player), True
+                else:
+                    value, exact = self._search(opponent, passes + 1, depth - 1, -beta, -alpha, timed)
+                    value = -value
+            elif len(move.tiles) == len(rack):
+                # Going out ends the game and takes the opponent's rack penalty twice
+                value, exact = score + 2 * self._rack_points(opponent), True
+            else:
+                checkpoint = self._apply(move, player)
+                try:
+                    value, exact = self._search(opponent, 0, depth - 1, score - beta, score - alpha, timed)
+                finally:
+                    self._undo(move, checkpoint)
+                value = score - value
+            solved = solved and exact
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.cache.put(key, (SOLVED if solved else depth, bound, best_value, best_move))
+        return best_value, solved
+
+    def _rack_points(self, player: int) -> int:
+        tile_points = self._game.scorer.tile_points
+        return sum(tile_points.get(tile, 0) for tile in self._state.rack(player))
+
+    def _apply(self, move: Move, player: int) -> int:
+        checkpoint = self._generator.checkpoint()
+        letter_points = self._game.scorer.letter_points
+        width = self._generator.width
+        for row, col, letter, is_blank in move.tiles:
+            self._generator.place(row, col, letter)
+            self._points[row * width + col] = 0 if is_blank else letter_points.get(letter, 0)
+        self._state.apply(move, player)
+        return checkpoint
+
+    def _undo(self, move: Move, checkpoint: int):
+        width = self._generator.width
+        self._state.undo()
+        self._generator.rollback(checkpoint)
+        for row, col, _, _ in move.tiles:
+            self._points[row * width + col] = None
@@ -1,58 +1,67 @@
+import heapq
+import json
+from collections import Counter
+from itertools import islice
 from dawg import DAWG
-from itertools import permutations, chain, combinations
+from instrumentation import profiler
+from pattern_query import compile_query
 
-def generate_combined_results(pattern, char_list):
-    # Identify the positions of '?'
-    positions = [i for i, char in enumerate(pattern) if char == '?']
 
-    # Generate all permutations of characters to fill '?'
-    permuted_values = permutations(char_list, len(positions))
+def find_matching_words(pattern, char_list, word_dictionary, cache=None):
+    # Every '?' in the pattern is filled from char_list, and the remaining tiles may be
+    # placed before or after it. A '?' in char_list is a blank. A SolverCache answers
+    # repeated queries, whatever the order of the tiles.
+    with profiler.timer('words.find_matching'):
+        if cache is not None:
+            return set(cache.matching_words(pattern, char_list, word_dictionary))
+        return set(word_dictionary.rack_search(pattern, char_list))
 
-    combined_results = set()
 
-    for perm in permuted_values:
-        temp_pattern = list(pattern)
-        for pos, char in zip(positions, perm):
-            temp_pattern[pos] = char
-        result_pattern = "".join(temp_pattern)
+def find_query_words(query, char_list, word_dictionary, min_tiles=1):
+    # Like find_matching_words for a pattern_query query such as "[st]?ar*", where letters
+    # are on the board and every other square takes a tile from char_list
+    return set(compile_query(query).iter_search(word_dictionary, char_list, min_tiles))
 
-        # Calculate unused characters
-        used_chars = list(perm)
-        unused_chars = char_list.copy()
-        for char in used_chars:
-            unused_chars.remove(char)
 
-        # Generate all subsets of unused characters
-        subsets = list(chain.from_iterable(combinations(unused_chars, r) for r in range(len(unused_chars)+1)))
+def iter_matching_words(pattern, char_list, word_dictionary, limit=None):
+    # Yields the same words as find_matching_words as the search finds them, and stops
+    # after `limit` words, so nothing is collected that the caller does not use
+    return islice(word_dictionary.rack_search(pattern, char_list), limit)
 
-        # Generate all permutations of each subset
-        for subset in subsets:
-            for perm in permutations(subset):
-                perm_list = list(perm)
-                for i in range(len(perm_list) + 1):
-                    prefix = ''.join(perm_list[:i])
-                    postfix = ''.join(perm_list[i:])
-                    combined_result = prefix + result_pattern + postfix
-                    combined_results.add(combined_result)
 
-    return combined_results
+def top_matching_words(pattern, char_list, word_dictionary, k, letter_points):
+    # Returns the k matches worth the most tile points as (word, points), best first. Only
+    # k candidates are kept while searching; among equal points the first found wins.
+    available = Counter(tile.lower() for tile in char_list if tile != '?')
+    available.update(char for char in pattern.lower() if char != '?')
+    best = []
+    for order, word in enumerate(word_dictionary.rack_search(pattern, char_list)):
+        entry = (word_points(word, available, letter_points), -order, word)
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+    return [(word, points) for points, _, word in sorted(best, reverse=True)]
 
-# Function to filter valid words from combined results
-def filter_valid_words(combined_results, word_dictionary):
-    valid_words = set()
-    for word in combined_results:
-        if '?' in word:
-            matches = word_dictionary.wildcard_search(word.lower())
-            valid_words.update(matches)
-        else:
-            if word_dictionary.search(word.lower()):
-                valid_words.add(word)
-    return valid_words
 
-def find_matching_words(pattern, char_list, word_dictionary):
-    combined_results = generate_combined_results(pattern, char_list)
-    words = filter_valid_words(combined_results, word_dictionary)
-    return words
+def word_points(word, available, letter_points):
+    # Letters beyond the available tiles are played with blanks and score nothing
+    remaining = Counter(available)
+    points = 0
+    for char in word:
+        if remaining[char] > 0:
+            remaining[char] -= 1
+            points += letter_points.get(char, 0)
+    return points
+
+
+def load_letter_points(tile_file='tiles.json', language_descriptor='en-us'):
+    # Point value of every lowercase letter in the tile set of the language
+    with open(tile_file, 'r') as f:
+        for tile_set in json.load(f).values():
+            if language_descriptor in tile_set['languages']:
+                return {tile.lower(): info['points'] for tile, info in tile_set['tiles'].items() if tile != '?'}
+    raise ValueError(f"No tile set found for language descriptor: {language_descriptor}")
 
 if __name__ == "__main__":
     # Initialize the DAWG dictionary
@@ -65,3 +74,5 @@ if __name__ == "__main__":
     valid_words = find_matching_words(pattern, char_list, word_dictionary)
     for word in valid_words:
         print(word)
+
+    print(top_matching_words(pattern, char_list, word_dictionary, 5, load_letter_points()))
@@ -0,0 +1,109 @@
+from collections import Counter
+from dawg import SORT_CHUNK_SIZE, DAWG, CompiledDAWG, external_sort
+
+# Marks the switch from the reversed prefix to the suffix on a GADDAG path
+SEPARATOR = '>'
+
+
+class GADDAG:
+    """Stores every word once per split point as reversed(prefix) + SEPARATOR + suffix.
+
+    The paths go into an ordinary DAWG, so they share the same suffix minimization, and the
+    graph can be compiled and memory-mapped like any other lexicon. Starting from letters
+    already on the board, a query extends the word to the left first and then to the right.
+    """
+
+    def __init__(self, file_path: str = None, graph=None):
+        self.graph = graph if graph is not None else DAWG()
+        if file_path:
+            self.build_from_file(file_path)
+
+    def build_from_file(self, file_path: str):
+        """Builds the GADDAG from a word list with one word per line."""
+        with open(file_path, 'r') as file:
+            self.build_from_words(line.strip() for line in file)
+
+    def build_from_words(self, words, chunk_size: int = SORT_CHUNK_SIZE):
+        """Builds the GADDAG from an iterable of words.
+
+        A word yields one path per letter, so the paths are sorted externally in runs of
+        `chunk_size` rather than all at once.
+        """
+        def paths():
+            for word in words:
+                word = word.lower()
+                for split in range(1, len(word) + 1):
+                    yield word[split - 1::-1] + SEPARATOR + word[split:]
+
+        self.graph = DAWG()
+        self.graph.build_from_words(external_sort(paths(), chunk_size))
+
+    def save(self, file_path: str):
+        """Writes the GADDAG in the compiled DAWG format so the build cost is paid once."""
+        self.graph.compile(file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'GADDAG':
+        """Memory-maps a GADDAG written by `save`."""
+        return cls(graph=CompiledDAWG(file_path))
+
+    def search(self, word: str) -> bool:
+        """Returns whether the word is in the lexicon."""
+        word = word.lower()
+        return bool(word) and self.graph.search(word[0] + SEPARATOR + word[1:])
+
+    def words_through(self, fragment: str, rack=None, max_left: int = None, max_right: int = None):
+        """Yields (word, offset) for every word containing `fragment` at `offset`.
+
+        The letters added around the fragment are unrestricted, or drawn from `rack` when one
+        is given (a '?' tile is a blank). `max_left` and `max_right` limit how many letters
+        may be added on either side, for instance up to the edge of the board.
+        """
+        if not fragment:
+            raise ValueError("The fragment must contain at least one letter.")
+        fragment = fragment.lower()
+        graph = self.graph
+        node = graph.root
+        for char in reversed(fragment):
+            node = graph.get_edge(node, char)
+            if node is None:
+                return
+
+        counts = None
+        blanks = 0
+        if rack is not None:
+            counts = Counter(tile.lower() for tile in rack)
+            blanks = counts.pop('?', 0)
+        yield from self._extend_left(node, fragment, 0, counts, blanks, max_left, max_right)
+
+    def _extend_left(self, node, word, offset, counts, blanks, max_left, max_right):
+        graph = self.graph
+        for char, next_node in graph.edges(node):
+            if char == SEPARATOR:
+                yield from self._extend_right(next_node, word, offset, counts, blanks, max_right)
+            elif max_left is None or offset < max_left:
+                for blanks_left in self._consume(char, counts, blanks):
+                    yield from self._extend_left(next_node, char + word, offset + 1, counts, blanks_left, max_left, max_right)
+
+    def _extend_right(self, node, word, offset, counts, blanks, max_right):
+        graph = self.graph
+        if graph.is_final(node):
+            yield word, offset
+        if max_right == 0:
+            return
+        for char, next_node in graph.edges(node):
+            for blanks_left in self._consume(char, counts, blanks):
+                yield from self._extend_right(next_node, word + char, offset, counts, blanks_left,
+                                              None if max_right is None else max_right - 1)
+
+    @staticmethod
+    def _consume(char, counts, blanks):
+        # Yields once, with the remaining blanks, if the letter can be taken from the rack
+        if counts is None:
+            yield blanks
+        elif counts[char] > 0:
+            counts[char] -= 1
+            yield blanks
+            counts[char] += 1
+        elif blanks > 0:
+            yield blanks - 1
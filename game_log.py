@@ -0,0 +1,283 @@
+"""Append-only binary log of finished games, with an index for random access.
+
+A log is two files. `path` holds fixed-size records: every draw, move, pass and end-of-game
+rack adjustment of every game, one after the other. `path + '.idx'` holds one fixed-size
+entry per game with the number of its first record, its record count, seed, tile set and
+board. Turn t of game g is therefore found with two multiplications, and both files are
+memory-mapped for reading, so millions of games can be streamed or sampled without
+parsing anything that is not asked for. A game is only indexed once all its records are
+written, so a log cut short by a crash reads as the games finished before it.
+
+    with GameLog('games.log') as log:
+        log.append(game)
+    reader = GameLogReader('games.log')
+    board, racks, scores = reader.replay(0, count=10)
+"""
+import mmap
+import os
+import struct
+from typing import NamedTuple
+
+from move_generator import ACROSS, DOWN, Move
+
+# Record kinds
+DRAW = 1
+MOVE = 2
+PASS = 3
+END = 4
+
+MAX_TILES = 7
+_BLANK = 0x8000  # Set on the code point of a letter played with a blank
+_NO_SQUARE = 0xFF  # Row and column of a drawn tile
+
+# File layout (all integers little-endian):
+#   header   magic, version, size of one record or index entry
+#   records  kind, player, tile count, direction, row, col, score, player total, then
+#            MAX_TILES x (row, col, letter code point) with unused slots zeroed
+#   index    first record, record count, players, whether there is a seed, board width
+#            and height, seed, tile set language and board name as zero-padded utf-8
+LOG_MAGIC = b'TGLG'
+INDEX_MAGIC = b'TGLI'
+LOG_VERSION = 1
+_HEADER = struct.Struct('<4sII')
+_RECORD = struct.Struct('<BBBBBBhi' + 'BBH' * MAX_TILES)
+_GAME = struct.Struct('<QIBBBBq16s16s')
+
+
+class LogRecord(NamedTuple):
+    """One event of a game. Moves list (row, col, letter, is_blank) tiles, draws the tiles drawn."""
+    kind: int
+    player: int
+    score: int = 0  # Points of a move, or the rack adjustment at the end of the game
+    total: int = 0  # The player's score afterwards
+    tiles: tuple = ()
+    direction: str = None
+    row: int = 0
+    col: int = 0
+
+
+class GameInfo(NamedTuple):
+    first_record: int
+    records: int
+    num_players: int
+    width: int
+    height: int
+    seed: int
+    language_descriptor: str
+    board_name: str
+
+
+class GameLog:
+    """Appends games to a log, creating it when it does not exist yet."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._records = _open_for_append(path, LOG_MAGIC, _RECORD.size)
+        self._index = _open_for_append(path + '.idx', INDEX_MAGIC, _GAME.size)
+        # Records past the last indexed game belong to a game that was never finished
+        games = (self._index.seek(0, os.SEEK_END) - _HEADER.size) // _GAME.size
+        self.record_count = 0
+        if games:
+            self._index.seek(_HEADER.size + (games - 1) * _GAME.size)
+            first, count = _GAME.unpack(self._index.read(_GAME.size))[:2]
+            self.record_count = first + count
+        self._records.truncate(_HEADER.size + self.record_count * _RECORD.size)
+        self._index.truncate(_HEADER.size + games * _GAME.size)
+        self.game_count = games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def append(self, game) -> int:
+        """Appends the history of a GameSet and returns the number of the game in the log."""
+        return self.append_records(game.history, game.seed, len(game.players), len(game.board[0]),
+                                   len(game.board), game.language_descriptor, game.board_name)
+
+    def append_records(self, records, seed: int = None, num_players: int = 2, width: int = 15, height: int = 15,
+                       language_descriptor: str = '', board_name: str = '') -> int:
+        """Appends a game given as LogRecords, for instance a history sent back by a worker process."""
+        first = self.record_count
+        data = b''.join(_pack(record) for record in records)
+        count = len(data) // _RECORD.size
+        self._records.write(data)
+        self._records.flush()
+        self._index.write(_GAME.pack(first, count, num_players, seed is not None, width, height, seed or 0,
+                                     _fixed(language_descriptor), _fixed(board_name)))
+        self._index.flush()
+        self.record_count += count
+        self.game_count += 1
+        return self.game_count - 1
+
+    def close(self):
+        self._records.close()
+        self._index.close()
+
+
+class GameLogReader:
+    """Memory-maps a log for streaming and random access; `close` releases it."""
+
+    def __init__(self, path: str):
+        self._records = _map(path, LOG_MAGIC, _RECORD.size)
+        self._index = _map(path + '.idx', INDEX_MAGIC, _GAME.size)
+        self._game_count = (len(self._index) - _HEADER.size) // _GAME.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return self._game_count
+
+    def game(self, index: int) -> GameInfo:
+        if not 0 <= index < self._game_count:
+            raise IndexError(f"Game {index} is not in the log.")
+        first, count, players, has_seed, width, height, seed, language, board = _GAME.unpack_from(
+            self._index, _HEADER.size + index * _GAME.size)
+        return GameInfo(first, count, players, width, height, seed if has_seed else None, _text(language),
+                        _text(board))
+
+    def games(self):
+        """Yields the GameInfo of every game in order."""
+        for index in range(self._game_count):
+            yield self.game(index)
+
+    def records(self, index: int, start: int = 0, stop: int = None):
+        """Yields the records of a game, or of the slice start:stop of them."""
+        info = self.game(index)
+        stop = info.records if stop is None else min(stop, info.records)
+        for number in range(info.first_record + start, info.first_record + stop):
+            yield _unpack(self._records, _HEADER.size + number * _RECORD.size)
+
+    def record(self, index: int, number: int) -> LogRecord:
+        info = self.game(index)
+        if not 0 <= number < info.records:
+            raise IndexError(f"Game {index} has no record {number}.")
+        return _unpack(self._records, _HEADER.size + (info.first_record + number) * _RECORD.size)
+
+    def replay(self, index: int, count: int = None) -> tuple:
+        """Returns the board, racks and scores after the first `count` records of a game.
+
+        The board has the layout of GameSet.board: '' for an empty square, '?' for a blank
+        and the uppercase letter for any other tile.
+        """
+        info = self.game(index)
+        board = [['' for _ in range(info.width)] for _ in range(info.height)]
+        racks = [[] for _ in range(info.num_players)]
+        scores = [0] * info.num_players
+        for record in self.records(index, 0, count):
+            if record.kind == DRAW:
+                racks[record.player].extend(record.tiles)
+            elif record.kind == MOVE:
+                for row, col, letter, is_blank in record.tiles:
+                    tile = '?' if is_blank else letter.upper()
+                    board[row][col] = tile
+                    racks[record.player].remove(tile)
+            if record.kind != DRAW:
+                scores[record.player] = record.total
+        return board, racks, scores
+
+    def moves(self, index: int):
+        """Yields (player, Move, score) for every move of a game, with the words filled in."""
+        letters = {}
+        for record in self.records(index):
+            if record.kind != MOVE:
+                continue
+            for row, col, letter, _ in record.tiles:
+                letters[row, col] = letter
+            step = (0, 1) if record.direction == ACROSS else (1, 0)
+            row, col, word = record.row, record.col, ''
+            while (row, col) in letters:
+                word += letters[row, col]
+                row, col = row + step[0], col + step[1]
+            yield record.player, Move(record.row, record.col, record.direction, word, record.tiles), record.score
+
+    def leave_samples(self, index: int):
+        """Yields the (leave, score) samples of a game, as simulation.py --leaves records them."""
+        racks = [[] for _ in range(self.game(index).num_players)]
+        pending = {}
+        for record in self.records(index):
+            if record.kind == DRAW:
+                racks[record.player].extend(record.tiles)
+                continue
+            if record.kind == END:
+                continue
+            if record.player in pending:
+                yield [pending[record.player], record.score if record.kind == MOVE else 0]
+            if record.kind == PASS:
+                pending.pop(record.player, None)
+            else:
+                for _, _, letter, is_blank in record.tiles:
+                    racks[record.player].remove('?' if is_blank else letter.upper())
+                pending[record.player] = ''.join(sorted(racks[record.player]))
+
+    def close(self):
+        self._records.close()
+        self._index.close()
+
+
+def _pack(record: LogRecord) -> bytes:
+    if len(record.tiles) > MAX_TILES:
+        raise ValueError(f"A record holds at most {MAX_TILES} tiles.")
+    slots = []
+    if record.kind == DRAW:
+        for tile in record.tiles:
+            slots.extend((_NO_SQUARE, _NO_SQUARE, ord(tile)))
+    else:
+        for row, col, letter, is_blank in record.tiles:
+            slots.extend((row, col, ord(letter) | (_BLANK if is_blank else 0)))
+    slots.extend([0] * (3 * MAX_TILES - len(slots)))
+    return _RECORD.pack(record.kind, record.player, len(record.tiles), record.direction == DOWN, record.row,
+                        record.col, record.score, record.total, *slots)
+
+
+def _unpack(buffer, offset: int) -> LogRecord:
+    fields = _RECORD.unpack_from(buffer, offset)
+    kind, player, count, down, row, col, score, total = fields[:8]
+    slots = fields[8:8 + 3 * count]
+    if kind == DRAW:
+        tiles = tuple(chr(slots[i + 2]) for i in range(0, len(slots), 3))
+    else:
+        tiles = tuple((slots[i], slots[i + 1], chr(slots[i + 2] & ~_BLANK), bool(slots[i + 2] & _BLANK))
+                      for i in range(0, len(slots), 3))
+    direction = (DOWN if down else ACROSS) if kind == MOVE else None
+    return LogRecord(kind, player, score, total, tiles, direction, row, col)
+
+
+def _open_for_append(path: str, magic: bytes, size: int):
+    file = open(path, 'a+b')
+    file.seek(0)
+    header = file.read(_HEADER.size)
+    if not header:
+        file.write(_HEADER.pack(magic, LOG_VERSION, size))
+    elif len(header) < _HEADER.size or _HEADER.unpack(header) != (magic, LOG_VERSION, size):
+        file.close()
+        raise ValueError(f"{path} is not a version {LOG_VERSION} game log.")
+    return file
+
+
+def _map(path: str, magic: bytes, size: int) -> mmap.mmap:
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buffer) < _HEADER.size or _HEADER.unpack_from(buffer, 0) != (magic, LOG_VERSION, size):
+        buffer.close()
+        raise ValueError(f"{path} is not a version {LOG_VERSION} game log.")
+    return buffer
+
+
+def _fixed(text: str) -> bytes:
+    data = (text or '').encode('utf-8')
+    if len(data) > 16:
+        raise ValueError(f"{text!r} is longer than 16 bytes.")
+    return data
+
+
+def _text(data: bytes) -> str:
+    return data.rstrip(b'\0').decode('utf-8')
+
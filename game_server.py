@@ -0,0 +1,386 @@
+"""Async game service: many GameSet sessions in one process, sharing a single lexicon.
+
+Clients talk to the server over a local socket, one JSON object per line in each direction.
+Every request may carry an "id", which is echoed in its response:
+
+    {"id": 1, "command": "new_game", "num_players": 2, "computer_players": 1, "seed": 3}
+    {"id": 1, "ok": true, "game": 1, "state": {...}}
+    {"id": 2, "command": "move", "game": 1, "player": "Player 2", "row": 7, "col": 6, "direction": "across", "word": "cat"}
+    {"id": 3, "command": "pass", "game": 1, "player": "Player 2"}
+    {"id": 4, "command": "state", "game": 1, "player": "Player 2"}
+    {"id": 5, "command": "close_game", "game": 1}
+
+Computer turns are played as soon as it is their turn. Their searches are collected in
+batches and each one runs as its own job on a worker pool, so a slow search neither holds
+up the I/O of other games nor the searches batched with it. Games on a compiled lexicon are
+searched on a process pool, whose workers memory-map the same file:
+
+    python game_server.py --compiled collins2019.dawg --port 8765
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dawg import DAWG, CompiledDAWG
+from game_set import GameSet
+from lexicon_registry import LexiconRegistry
+from move_generator import ACROSS, DOWN, MoveGenerator
+
+# The compiled lexicons a search process has mapped, by file path
+_lexicons = {}
+
+
+class MoveBatcher:
+    """Collects computer move requests and sends them to the workers in batches.
+
+    A batch is sent when it holds `max_batch` requests or `delay` seconds after its first
+    request, whichever comes first. Every request of a batch is a job of its own, so each
+    game gets its move as soon as its own search is done. Games on a CompiledDAWG without a
+    strategy are searched on `processes`, when given: only the position and the rack are
+    sent, and the worker maps the lexicon file itself. Every other game is searched on
+    `executor` with GameSet.choose_computer_move. Each game must not change while its
+    request is pending.
+    """
+
+    def __init__(self, executor, max_batch: int = 16, delay: float = 0.002, processes=None):
+        self.executor = executor
+        self.processes = processes
+        self.max_batch = max_batch
+        self.delay = delay
+        self.batches = 0
+        self.requests = 0
+        self._pending = []
+        self._timer = None
+
+    async def choose(self, game: GameSet, player: str):
+        """Returns the move the computer picks for the player, or None when it has to pass."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((game, player, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.requests += len(batch)
+        loop = asyncio.get_running_loop()
+        for game, player, future in batch:
+            if (self.processes is not None and game.strategy is None
+                    and isinstance(game.dictionary, CompiledDAWG)):
+                work = loop.run_in_executor(self.processes, _search_position, _position(game, player))
+            else:
+                work = loop.run_in_executor(self.executor, game.choose_computer_move, player)
+            work.add_done_callback(lambda done, future=future: _resolve(future, done))
+
+
+def _position(game: GameSet, player: str) -> tuple:
+    generator = game.move_generator
+    state = (generator.width, generator.height, generator.letters, generator.tile_count, generator.anchors,
+             generator.cross_checks)
+    return (game.dictionary.file_path, state, game.scorer, game.scorer.board_points(game.board),
+            list(game.players[player]['tiles']))
+
+
+def _search_position(task: tuple):
+    # Runs in a search process: the highest-scoring move, as GameSet.choose_computer_move picks it
+    file_path, state, scorer, points, rack = task
+    dictionary = _lexicons.get(file_path)
+    if dictionary is None:
+        dictionary = _lexicons[file_path] = CompiledDAWG(file_path)
+    width, height, letters, tile_count, anchors, cross_checks = state
+    generator = MoveGenerator(dictionary, width, height)
+    generator.letters = letters
+    generator.tile_count = tile_count
+    generator.anchors = anchors
+    generator.cross_checks = cross_checks
+    moves = list(generator.generate_moves(rack))
+    scores = [scorer.score_points(points, move) for move in moves]
+    return moves[max(range(len(moves)), key=scores.__getitem__)] if moves else None
+
+
+def _resolve(future, done):
+    if future.cancelled():
+        return
+    if done.cancelled():
+        future.cancel()
+    elif done.exception() is not None:
+        future.set_exception(done.exception())
+    else:
+        future.set_result(done.result())
+
+
+class GameServer:
+    """Hosts concurrent games behind the JSON-line protocol described in the module docstring.
+
+    `dictionary` is either the lexicon every game uses or a LexiconRegistry, from which a new
+    game takes the lexicon named in its request, or else the one for its language.
+    Computer moves of games on a CompiledDAWG are searched on a pool of `processes`
+    processes (one per core by default), which share the memory-mapped file. A DAWG built
+    in memory would have to be copied into every process, so its games are searched on
+    `executor`, a thread pool by default. Threads keep the other games responsive, but
+    move generation holds the GIL, so they do not search in parallel.
+    """
+
+    def __init__(self, dictionary, executor=None, max_batch: int = 16, batch_delay: float = 0.002,
+                 board_file: str = 'boards.json', tile_file: str = 'tiles.json', processes: int = None):
+        self.dictionary = dictionary
+        self.executor = executor or ThreadPoolExecutor()
+        # Workers only start with the first search sent to them
+        self.processes = ProcessPoolExecutor(processes)
+        self.batcher = MoveBatcher(self.executor, max_batch, batch_delay, self.processes)
+        self.board_file = board_file
+        self.tile_file = tile_file
+        self.games = {}
+        self._locks = {}
+        self._finished = set()
+        self._ids = itertools.count(1)
+        self._commands = {
+            'new_game': self._new_game,
+            'state': self._state,
+            'move': self._move,
+            'pass': self._pass,
+            'close_game': self._close_game,
+        }
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+        """Starts listening; port 0 picks a free port, see the returned server's sockets."""
+        return await asyncio.start_server(self.serve_client, host, port)
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answers the requests of one connection, in order, until it closes."""
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as error:
+                    response = {'ok': False, 'error': f"Invalid JSON: {error}"}
+                else:
+                    response = await self.handle(request)
+                writer.write(json.dumps(response, separators=(',', ':')).encode('utf-8') + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def handle(self, request: dict) -> dict:
+        """Runs one request and returns its response."""
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "A request must be a JSON object."}
+        response = {'id': request['id']} if 'id' in request else {}
+        command = self._commands.get(request.get('command'))
+        if command is None:
+            response.update(ok=False, error=f"Unknown command: {request.get('command')}")
+            return response
+        try:
+            response.update(await command(request))
+            response['ok'] = True
+        except Exception as error:
+            # A failing request, or a failing worker, only fails its own response
+            response.update(ok=False, error=str(error.args[0]) if error.args else type(error).__name__)
+        return response
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.processes.shutdown(wait=False)
+
+    async def _new_game(self, request: dict) -> dict:
+        language_descriptor = request.get('language_descriptor', 'en-us')
+        dictionary = self.dictionary
+        if isinstance(dictionary, LexiconRegistry):
+            # The first game in a language may have to load its lexicon
+            loop = asyncio.get_running_loop()
+            dictionary = await loop.run_in_executor(self.executor, dictionary.get,
+                                                    request.get('lexicon', language_descriptor))
+        game = GameSet(dictionary=dictionary, board_name=request.get('board_name', 'Standard'),
+                       language_descriptor=language_descriptor,
+                       num_players=request.get('num_players', 2), board_file=self.board_file, tile_file=self.tile_file,
+                       auto_start=False, seed=request.get('seed'), computer_players=request.get('computer_players'),
+                       verbose=False)
+        player = request.get('player')
+        if player is not None and player not in game.players:
+            raise KeyError(f"Unknown player: {player}")
+        game.current_player = game.rng.choice(list(game.players.keys()))
+        game_id = next(self._ids)
+        self.games[game_id] = game
+        self._locks[game_id] = asyncio.Lock()
+        async with self._locks[game_id]:
+            try:
+                await self._play_computers(game_id)
+                return {'game': game_id, 'state': self._describe(game_id, player)}
+            except Exception:
+                # The client never learns the id, so the game must not stay behind
+                del self.games[game_id]
+                del self._locks[game_id]
+                self._finished.discard(game_id)
+                raise
+
+    async def _state(self, request: dict) -> dict:
+        game_id = self._game_id(request)
+        return {'state': self._describe(game_id, request.get('player'))}
+
+    async def _move(self, request: dict) -> dict:
+        game_id = self._game_id(request)
+        async with self._locks[game_id]:
+            game = self.games[game_id]
+            player = self._human_turn(game_id, request)
+            direction = _field(request, 'direction', str)
+            if direction not in (ACROSS, DOWN):
+                raise ValueError(f"Direction must be '{ACROSS}' or '{DOWN}'.")
+            wanted = (_field(request, 'row', int), _field(request, 'col', int), direction,
+                      _field(request, 'word', str).lower())
+
+            # Generating the legal moves can take a while on a crowded board
+            loop = asyncio.get_running_loop()
+            moves = await loop.run_in_executor(self.executor, _matching_moves, game, player, wanted)
+            if not moves:
+                raise ValueError(f"{request['word']!r} is not a legal move.")
+            # Prefer real tiles over blanks when the rack allows both
+            move = min(moves, key=lambda candidate: sum(tile[3] for tile in candidate.tiles))
+            score = game.play_move(player, move)
+            self._end_turn(game_id, player, score)
+            await self._play_computers(game_id)
+            return {'score': score, 'state': self._describe(game_id, player)}
+
+    async def _pass(self, request: dict) -> dict:
+        game_id = self._game_id(request)
+        async with self._locks[game_id]:
+            player = self._human_turn(game_id, request)
+            self._end_turn(game_id, player, None)
+            await self._play_computers(game_id)
+            return {'state': self._describe(game_id, player)}
+
+    async def _close_game(self, request: dict) -> dict:
+        game_id = self._game_id(request)
+        async with self._locks[game_id]:
+            del self.games[game_id]
+            del self._locks[game_id]
+            self._finished.discard(game_id)
+        return {'game': game_id}
+
+    async def _play_computers(self, game_id: int):
+        game = self.games[game_id]
+        while game_id not in self._finished and game.players[game.current_player]['is_computer']:
+            player = game.current_player
+            move = await self.batcher.choose(game, player)
+            score = game.play_move(player, move) if move is not None else None
+            self._end_turn(game_id, player, score)
+
+    def _end_turn(self, game_id: int, player: str, score):
+        game = self.games[game_id]
+        game.finish_turn(player, score)
+        if game.is_over():
+            game.finish_game()
+            self._finished.add(game_id)
+        else:
+            game.current_player = game.next_player(player)
+
+    def _game_id(self, request: dict) -> int:
+        game_id = request['game']
+        if game_id not in self.games:
+            raise KeyError(f"Unknown game: {game_id}")
+        return game_id
+
+    def _human_turn(self, game_id: int, request: dict) -> str:
+        game = self.games[game_id]
+        player = request['player']
+        if game_id in self._finished:
+            raise ValueError("The game is over.")
+        if player != game.current_player or game.players[player]['is_computer']:
+            raise ValueError(f"It is not {player}'s turn.")
+        return player
+
+    def _describe(self, game_id: int, player: str = None) -> dict:
+        """The public state of a game, with the rack of `player` only."""
+        game = self.games[game_id]
+        state = {
+            'board': game.board,
+            'players': {name: {'score': data['score'], 'is_computer': data['is_computer'], 'tiles': len(data['tiles'])}
+                        for name, data in game.players.items()},
+            'current_player': game.current_player,
+            'stock': len(game.stock),
+            'over': game_id in self._finished,
+        }
+        if player is not None:
+            state['rack'] = game.players[player]['tiles']
+        return state
+
+
+def _field(request: dict, name: str, kind: type):
+    value = request[name]
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise TypeError(f"{name!r} must be of type {kind.__name__}.")
+    return value
+
+
+def _matching_moves(game: GameSet, player: str, wanted: tuple) -> list:
+    return [move for move in game.move_generator.generate_moves(game.players[player]['tiles'])
+            if (move.row, move.col, move.direction, move.word) == wanted]
+
+
+class GameClient:
+    """A minimal client for the JSON-line protocol, for scripts and tests."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 8765) -> 'GameClient':
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, command: str, **params) -> dict:
+        """Sends a request and waits for its response."""
+        request = {'id': next(self._ids), 'command': command, **params}
+        self.writer.write(json.dumps(request).encode('utf-8') + b'\n')
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def serve(dictionary, host: str, port: int, workers: int = None):
+    server = GameServer(dictionary, ThreadPoolExecutor(workers), processes=workers)
+    listener = await server.start(host, port)
+    print(f"Serving on {', '.join(str(sock.getsockname()) for sock in listener.sockets)}", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serves concurrent games over a JSON-line protocol.")
+    parser.add_argument('--lexicon', default='collins2019.txt')
+    parser.add_argument('--compiled', help="compiled lexicon to memory-map instead of building --lexicon")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    dictionary = CompiledDAWG(args.compiled) if args.compiled else DAWG(args.lexicon)
+    try:
+        asyncio.run(serve(dictionary, args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
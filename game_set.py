@@ -1,7 +1,11 @@
 import json
 import random
-from dawg import DAWG
-import findmatchingwords
+from collections import Counter
+from dawg import DAWG, CountingLexicon
+from game_log import DRAW, END, MOVE, PASS, LogRecord
+from instrumentation import profiler
+from move_generator import Move, MoveGenerator
+from scoring import Scorer
 
 class GameSet:
     """Represents a game set including board, tiles, and players."""
@@ -14,19 +18,43 @@ class GameSet:
     COLOR_WHITE = "\033[97m"
     COLOR_DARK_GREY = "\033[90m"
 
-    def __init__(self, dictionary: DAWG, board_name: str = 'Standard', language_descriptor: str = 'en-us', num_players: int = 2, board_file: str = 'boards.json', tile_file: str = 'tiles.json'):
-        """Initializes the game set with the given board and language settings."""
+    def __init__(self, dictionary: DAWG, board_name: str = 'Standard', language_descriptor: str = 'en-us', num_players: int = 2, board_file: str = 'boards.json', tile_file: str = 'tiles.json', auto_start: bool = True, seed: int = None, computer_players: int = None, verbose: bool = True, strategy=None):
+        """Initializes the game set with the given board and language settings.
+
+        With auto_start disabled the game is only set up, so the caller decides who moves.
+        All randomness comes from `seed`, `computer_players` fixes how many players the
+        computer controls instead of picking at random, and `verbose` controls printing.
+        A `strategy` such as MonteCarloStrategy replaces the greedy highest-score choice.
+        Every draw, computer move, pass and final adjustment is kept in `history` as the
+        LogRecords a GameLog stores.
+        """
         if num_players not in [2, 3, 4]:
             raise ValueError("Number of players must be 2, 3, or 4.")
+        if computer_players is not None and not 0 <= computer_players <= num_players:
+            raise ValueError(f"Number of computer players must be between 0 and {num_players}.")
 
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.board_name = board_name
+        self.language_descriptor = language_descriptor
+        self.history = []
+        self.verbose = verbose
+        self.strategy = strategy
         self.dictionary = dictionary
         self.tiles = self.load_tiles(language_descriptor, tile_file)
         self.board, self.special_cells = self.load_board(board_name, board_file)
+        # While profiling, the lexicon counts the node visits of move generation
+        lexicon = CountingLexicon(dictionary) if profiler.enabled else dictionary
+        self.move_generator = MoveGenerator(lexicon, len(self.board[0]), len(self.board))
+        self.scorer = Scorer(self.special_cells, len(self.board[0]), len(self.board), self.tiles)
         self.stock = self.initialize_stock()
-        self.players = {f'Player {i+1}': {'tiles': [], 'is_computer': False} for i in range(num_players)}
+        self.players = {f'Player {i+1}': {'tiles': [], 'is_computer': False, 'score': 0} for i in range(num_players)}
         self.draw_initial_tiles()
-        self.assign_computer_players()
-        self.start_game()
+        self.assign_computer_players(computer_players)
+        self.current_player = None
+        self.consecutive_passes = 0
+        if auto_start:
+            self.start_game()
 
     def load_tiles(self, language_descriptor: str, tile_file: str) -> dict:
         """Loads tile data for the specified language descriptor from the tile file."""
@@ -65,7 +93,7 @@ class GameSet:
         stock = []
         for tile, info in self.tiles.items():
             stock.extend([tile] * info['count'])
-        random.shuffle(stock)
+        self.rng.shuffle(stock)
         return stock
 
     def draw_tiles(self, num_tiles: int) -> list:
@@ -75,25 +103,89 @@ class GameSet:
 
     def draw_initial_tiles(self):
         """Draws initial tiles for all players."""
-        for player in self.players:
+        for number, player in enumerate(self.players):
             self.players[player]['tiles'] = self.draw_tiles(7)
+            self.history.append(LogRecord(DRAW, number, tiles=tuple(self.players[player]['tiles'])))
 
-    def assign_computer_players(self):
-        """Randomly assigns one or more players as computer players."""
-        num_computer_players = random.randint(1, len(self.players) - 1)
-        computer_players = random.sample(list(self.players.keys()), num_computer_players)
+    def assign_computer_players(self, num_computer_players: int = None):
+        """Assigns computer players, choosing a random number of them unless one is given."""
+        if num_computer_players is None:
+            num_computer_players = self.rng.randint(1, len(self.players) - 1)
+        computer_players = self.rng.sample(list(self.players.keys()), num_computer_players)
         for player in computer_players:
             self.players[player]['is_computer'] = True
 
     def start_game(self):
         """Starts the game by choosing a random player to begin."""
-        starting_player = random.choice(list(self.players.keys()))
-        print(f"{starting_player} starts the game!")
-        self.display_game_state()
-        if self.players[starting_player]['is_computer']:
-            self.computer_move(starting_player)
+        starting_player = self.rng.choice(list(self.players.keys()))
+        self.current_player = starting_player
+        self.log(f"{starting_player} starts the game!")
+        if self.verbose:
+            self.display_game_state()
+        self.play_turn(starting_player)
+
+    def play_turn(self, player: str) -> int:
+        """Lets the player move and returns the score, or None when the player passes."""
+        self.current_player = player
+        profiler.begin_turn(player)
+        if self.players[player]['is_computer']:
+            score = self.computer_move(player)
         else:
-            self.human_move(starting_player)
+            score = self.human_move(player)
+        self.finish_turn(player, score)
+        profiler.end_turn(score=score)
+        return score
+
+    def finish_turn(self, player: str, score: int):
+        """Counts consecutive passes after a turn; a score of None is a pass and is recorded as one."""
+        self.consecutive_passes = self.consecutive_passes + 1 if score is None else 0
+        if score is None:
+            self.history.append(LogRecord(PASS, self.player_number(player), total=self.players[player]['score']))
+
+    def next_player(self, player: str) -> str:
+        """Returns the player whose turn follows the given player."""
+        players = list(self.players.keys())
+        return players[(players.index(player) + 1) % len(players)]
+
+    def player_number(self, player: str) -> int:
+        """Returns the position of the player in the turn order, counting from 0."""
+        return list(self.players.keys()).index(player)
+
+    @property
+    def pass_limit(self) -> int:
+        """The number of consecutive passes that ends the game: two rounds."""
+        return 2 * len(self.players)
+
+    def is_over(self) -> bool:
+        """The game ends when a player runs out of tiles with an empty stock, or after two rounds of passes."""
+        if not self.stock and any(not data['tiles'] for data in self.players.values()):
+            return True
+        return self.consecutive_passes >= self.pass_limit
+
+    def finish_game(self):
+        """Deducts the tiles left on each rack, and awards them to a player who went out."""
+        remaining = {player: sum(self.tiles[tile]['points'] for tile in data['tiles'])
+                     for player, data in self.players.items()}
+        for number, (player, data) in enumerate(self.players.items()):
+            adjustment = -remaining[player]
+            if not data['tiles']:
+                adjustment += sum(remaining.values())
+            data['score'] += adjustment
+            self.history.append(LogRecord(END, number, adjustment, data['score']))
+
+    def play_game(self) -> dict:
+        """Plays turns until the game is over and returns the final scores."""
+        if self.current_player is None:
+            self.start_game()
+        while not self.is_over():
+            self.play_turn(self.next_player(self.current_player))
+        self.finish_game()
+        return {player: data['score'] for player, data in self.players.items()}
+
+    def log(self, message: str):
+        """Prints a message unless the game runs silently."""
+        if self.verbose:
+            print(message)
 
     def display_board(self):
         """Displays the board with tiles and special cells."""
@@ -133,85 +225,120 @@ class GameSet:
     def display_players_racks(self):
         """Displays the tiles of all players."""
         for player, player_data in self.players.items():
-            print(f"{player} (Computer: {player_data['is_computer']}): {' '.join(player_data['tiles'])}")
+            print(f"{player} (Computer: {player_data['is_computer']}, Score: {player_data['score']}): {' '.join(player_data['tiles'])}")
 
     def display_game_state(self):
         """Displays the board and the tiles of all players."""
         self.display_board()
         self.display_players_racks()
 
-    def place_tile(self, tile: str, row: int, col: int):
-        """Places a tile on the board at the specified position."""
+    def place_tile(self, tile: str, row: int, col: int, letter: str = None):
+        """Places a tile on the board at the specified position. `letter` is the letter a blank stands for."""
         if 0 <= row < len(self.board) and 0 <= col < len(self.board[0]):
             if not self.board[row][col]:
                 self.board[row][col] = tile
+                self.move_generator.place(row, col, letter or tile)
             else:
-                print("Cell is already occupied.")
+                self.log("Cell is already occupied.")
         else:
-            print("Invalid board position.")
+            self.log("Invalid board position.")
 
-    def computer_move(self, player: str):
-        """Handles the computer player's move."""
-        self.display_game_state()
-        print(f"{player} (computer) is making a move...")
-        center_row = len(self.board) // 2
-        center_col = len(self.board[0]) // 2
-        char_list = self.players[player]['tiles']
-        pattern = "?"
-
-        matching_words = findmatchingwords.find_matching_words(pattern, char_list, self.dictionary)
-        matching_words_list = [word.upper() for word in matching_words]  # Convert words to uppercase
-
-        if matching_words_list:
-            chosen_word = random.choice(matching_words_list)
-            for i, tile in enumerate(chosen_word):
-                if tile == "?":
-                    # Find a blank tile from the player's rack to use
-                    blank_tile_index = self.players[player]['tiles'].index("?")
-                    self.players[player]['tiles'].pop(blank_tile_index)
-                    # Place the tile as a blank
-                    self.place_tile("?", center_row, center_col + i)
-                else:
-                    if 0 <= center_col + i < len(self.board[0]):
-                        self.place_tile(tile, center_row, center_col + i)
-                        if tile in self.players[player]['tiles']:
-                            self.players[player]['tiles'].remove(tile)
-            # Draw new tiles to replace the used ones
-            self.players[player]['tiles'].extend(self.draw_tiles(len(chosen_word)))
+    def computer_move(self, player: str) -> int:
+        """Handles the computer player's move and returns its score, or None when it passes."""
+        if self.verbose:
+            self.display_game_state()
+        self.log(f"{player} (computer) is making a move...")
+        move = self.choose_computer_move(player)
+
+        score = None
+        if move is not None:
+            score = self.play_move(player, move)
         else:
-            print("No valid moves for the computer.")
+            self.log("No valid moves for the computer.")
 
-        self.display_board()
+        if self.verbose:
+            self.display_board()
+        return score
+
+    def choose_computer_move(self, player: str) -> Move:
+        """Returns the move the computer would play for the player, or None when it cannot move."""
+        if self.strategy is not None:
+            with profiler.timer('moves.strategy'):
+                return self.strategy.choose_move(self, player)
+        with profiler.timer('moves.generate'):
+            moves = list(self.move_generator.generate_moves(self.players[player]['tiles']))
+        profiler.count('moves.candidates', len(moves))
+        with profiler.timer('moves.score'):
+            scores = self.scorer.score_moves(self.board, moves)
+        return moves[max(range(len(moves)), key=scores.__getitem__)] if moves else None
 
-    def human_move(self, player: str):
-        """Handles the human player's move."""
+    def play_move(self, player: str, move: Move) -> int:
+        """Places the tiles of a generated move, scores it and refills the player's rack."""
+        with profiler.timer('moves.apply'):
+            score = self.scorer.score_move(self.board, move)
+            self.players[player]['score'] += score
+            for row, col, letter, is_blank in move.tiles:
+                tile = "?" if is_blank else letter.upper()
+                self.players[player]['tiles'].remove(tile)
+                self.place_tile(tile, row, col, letter.upper())
+
+            # Draw new tiles to replace the used ones
+            drawn = self.draw_tiles(len(move.tiles))
+            self.players[player]['tiles'].extend(drawn)
+
+            number = self.player_number(player)
+            total = self.players[player]['score']
+            self.history.append(LogRecord(MOVE, number, score, total, move.tiles, move.direction, move.row, move.col))
+            if drawn:
+                self.history.append(LogRecord(DRAW, number, tiles=tuple(drawn)))
+        return score
+
+    def human_move(self, player: str) -> int:
+        """Handles the human player's move. Human words are not scored yet."""
         self.display_game_state()
         print(f"{player} (human), it's your turn!")
+        alphabet = {tile for tile in self.tiles if tile != "?"}
         while True:
             word = input("Enter a word to place: ").strip().upper()
-            if all(tile in self.players[player]['tiles'] or tile == "?" for tile in word):
+            # Letters missing from the rack are played with blanks, as is every '?'
+            rack = Counter(self.players[player]['tiles'])
+            missing = sum(max(0, count - rack[tile]) for tile, count in Counter(word.replace("?", "")).items())
+            if missing + word.count("?") > rack["?"]:
+                print("You do not have all the tiles to form this word. Try again.")
+                continue
+
+            # The player names the letter every '?' stands for
+            letters = list(word)
+            for i in range(len(word)):
+                while letters[i] == "?":
+                    letter = input(f"Letter for the blank at position {i + 1}: ").strip().upper()
+                    if letter in alphabet:
+                        letters[i] = letter
+                    else:
+                        print(f"A blank stands for one of the letters {' '.join(sorted(alphabet))}. Try again.")
+            if self.dictionary.search("".join(letters).lower()):
                 break
-            print("You do not have all the tiles to form this word. Try again.")
+            print(f"{''.join(letters)} is not a valid word. Try again.")
 
         center_row = len(self.board) // 2
         center_col = len(self.board[0]) // 2
 
+        tiles = self.players[player]['tiles']
         for i, tile in enumerate(word):
-            if tile == "?":
-                # Find a blank tile from the player's rack to use
-                blank_tile_index = self.players[player]['tiles'].index("?")
-                self.players[player]['tiles'].pop(blank_tile_index)
-                # Place the tile as a blank
-                self.place_tile("?", center_row, center_col + i)
+            if not 0 <= center_col + i < len(self.board[0]):
+                continue
+            if tile != "?" and tile in tiles:
+                tiles.remove(tile)
+                self.place_tile(tile, center_row, center_col + i)
             else:
-                if 0 <= center_col + i < len(self.board[0]):
-                    self.place_tile(tile, center_row, center_col + i)
-                    if tile in self.players[player]['tiles']:
-                        self.players[player]['tiles'].remove(tile)
+                # Place a blank tile, telling the move generator which letter it stands for
+                tiles.remove("?")
+                self.place_tile("?", center_row, center_col + i, letters[i])
 
         # Draw new tiles to replace the used ones
         self.players[player]['tiles'].extend(self.draw_tiles(len(word)))
         self.display_board()
+        return 0
 
 if __name__ == "__main__":
     dictionary_path = "collins2019.txt"
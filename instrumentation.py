@@ -0,0 +1,131 @@
+"""Opt-in timers and counters for the lexicon, the solvers and the game loop.
+
+Profiling is off unless `enable()` is called or TROUBBLE_PROFILE is set in the environment;
+while it is off every hook returns immediately. Games set up while it is on also count the
+lexicon nodes their move generator visits. A report holds the totals per timer and counter
+plus a summary of every turn, and can be written as JSON:
+
+    instrumentation.enable()
+    game.play_game()
+    instrumentation.profiler.export('profile.json')
+"""
+import json
+import os
+import time
+from collections import Counter
+
+
+class _Timer:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """Collects named timings and counts, and summarizes them per turn."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.timers = {}  # name -> [calls, total seconds, longest call]
+        self.counters = Counter()
+        self.turns = []
+        self._turn = None
+
+    def timer(self, name: str):
+        """Returns a context manager that adds the time spent inside it to `name`."""
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def add_time(self, name: str, seconds: float):
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counters[name] += amount
+
+    def begin_turn(self, label: str):
+        """Starts a turn summary; `end_turn` records what happened since."""
+        if self.enabled:
+            seconds = {name: timer[1] for name, timer in self.timers.items()}
+            self._turn = (label, time.perf_counter(), seconds, Counter(self.counters))
+
+    def end_turn(self, **details):
+        """Records the turn started by `begin_turn`, with any extra details such as the score."""
+        if not self.enabled or self._turn is None:
+            return
+        label, start, seconds, counters = self._turn
+        self._turn = None
+        self.turns.append({
+            'turn': len(self.turns) + 1,
+            'label': label,
+            'seconds': time.perf_counter() - start,
+            'timers': {name: timer[1] - seconds.get(name, 0.0) for name, timer in self.timers.items()
+                       if timer[1] != seconds.get(name, 0.0)},
+            'counters': dict(self.counters - counters),
+            **details,
+        })
+
+    def report(self) -> dict:
+        """Returns the collected profile as plain data."""
+        return {
+            'timers': {name: {'calls': calls, 'seconds': total, 'max_seconds': longest}
+                       for name, (calls, total, longest) in sorted(self.timers.items())},
+            'counters': dict(sorted(self.counters.items())),
+            'turns': list(self.turns),
+        }
+
+    def export(self, file_path: str):
+        """Writes the report as JSON."""
+        with open(file_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+profiler = Profiler(enabled=bool(os.environ.get('TROUBBLE_PROFILE')))
+
+
+def enable():
+    profiler.enabled = True
+
+
+def disable():
+    profiler.enabled = False
+
+
+def timer(name: str):
+    return profiler.timer(name)
+
+
+def count(name: str, amount: int = 1):
+    profiler.count(name, amount)
+
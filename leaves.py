@@ -0,0 +1,257 @@
+"""Rack leave values: what the tiles kept after a move are worth on the next turn.
+
+The table has an entry for every multiset of up to six tiles the tile set allows (a move
+always plays at least one tile of a seven-tile rack), about 900,000 for English. A rack is
+ranked combinatorially, so a lookup costs one table access per distinct letter on the rack.
+Build a table from self-play with leaves recorded:
+
+    python simulation.py --games 10000 --leaves --output games.jsonl
+    python leaves.py games.jsonl --output english.leaves
+"""
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import Counter
+from itertools import chain
+
+from game_log import GameLogReader
+
+# Binary file layout (all integers little-endian):
+#   header   magic, version, largest leave, alphabet size in bytes, entry count
+#   alphabet utf-8 tiles in ranking order, padded to a multiple of 4 bytes
+#   bounds   uint8[tile count]     most copies of every tile a leave can hold, padded to 4 bytes
+#   values   float32[entry count]  leave value by rank
+LEAVES_MAGIC = b'LEAV'
+LEAVES_VERSION = 1
+_HEADER = struct.Struct('<4sIIII')
+
+# Samples an estimate is worth before it outweighs the estimate it is shrunk towards
+PRIOR_SAMPLES = 20
+
+
+class LeaveTable:
+    """Leave values indexed by the combinatorial rank of the leave.
+
+    Leaves of the same size are ordered by the count of the first tile, then the second and
+    so on, and sizes follow each other. `ways[i][k]` counts the leaves of k tiles made from
+    tiles i and up, and its prefix sums give the rank contribution of every (tile, remaining
+    size, count), so ranking a leave only visits the tiles it contains.
+    """
+
+    def __init__(self, bounds: dict, max_tiles: int = 6, values=None):
+        self.max_tiles = max_tiles
+        self.alphabet = ''.join(sorted(bounds))
+        self.bounds = [min(bounds[tile], max_tiles) for tile in self.alphabet]
+        self.codes = {tile: code for code, tile in enumerate(self.alphabet)}
+
+        size = len(self.alphabet)
+        ways = [[0] * (max_tiles + 1) for _ in range(size + 1)]
+        ways[size][0] = 1
+        for code in range(size - 1, -1, -1):
+            for k in range(max_tiles + 1):
+                ways[code][k] = sum(ways[code + 1][k - v] for v in range(min(self.bounds[code], k) + 1))
+        self._ways = ways
+
+        # _prefix[code][remaining][count]: leaves that hold fewer than `count` copies of the tile
+        self._prefix = []
+        for code in range(size):
+            table = []
+            for remaining in range(max_tiles + 1):
+                sums = [0]
+                for v in range(min(self.bounds[code], remaining) + 1):
+                    sums.append(sums[-1] + ways[code + 1][remaining - v])
+                table.append(sums)
+            self._prefix.append(table)
+
+        self.offsets = [0]
+        for k in range(max_tiles + 1):
+            self.offsets.append(self.offsets[-1] + ways[0][k])
+        self.values = values if values is not None else array('f', bytes(4 * len(self)))
+        self._mmap = None
+
+    @classmethod
+    def from_tiles(cls, tiles: dict, max_tiles: int = 6, values=None) -> 'LeaveTable':
+        """Sets up the ranking for a tile set as found in tiles.json."""
+        return cls({tile: info['count'] for tile, info in tiles.items()}, max_tiles, values)
+
+    def __len__(self) -> int:
+        return self.offsets[-1]
+
+    def rank(self, tiles) -> int:
+        """Returns the index of a leave. Tiles are as in tiles.json, with '?' for a blank."""
+        try:
+            codes = sorted(self.codes[tile] for tile in tiles)
+        except KeyError as error:
+            raise ValueError(f"Unknown tile {error.args[0]!r}.") from None
+        remaining = len(codes)
+        if remaining > self.max_tiles:
+            raise ValueError(f"A leave holds at most {self.max_tiles} tiles.")
+
+        index = self.offsets[remaining]
+        position = 0
+        while position < len(codes):
+            code = codes[position]
+            count = 1
+            while position + count < len(codes) and codes[position + count] == code:
+                count += 1
+            if count > self.bounds[code]:
+                raise ValueError(f"The tile set has fewer than {count} of {self.alphabet[code]!r}.")
+            index += self._prefix[code][remaining][count]
+            remaining -= count
+            position += count
+        return index
+
+    def value(self, tiles) -> float:
+        """Returns the value of keeping the tiles."""
+        return self.values[self.rank(tiles)]
+
+    def fit(self, samples, prior: float = PRIOR_SAMPLES):
+        """Fills the table from (leave, next turn score) samples.
+
+        A leave is valued at how much its player's next score beat the average. Leaves seen
+        often use their own mean; the others fall back on the sum of what every (tile, count)
+        in them is worth on average, and the two are blended by the number of samples.
+        """
+        samples = [(self.rank(leave), Counter(leave), score) for leave, score in samples]
+        if not samples:
+            return
+        mean = sum(score for _, _, score in samples) / len(samples)
+
+        tile_totals = [Counter() for _ in self.alphabet]
+        tile_samples = [Counter() for _ in self.alphabet]
+        exact_totals = Counter()
+        exact_samples = Counter()
+        for rank, counts, score in samples:
+            for tile, count in counts.items():
+                tile_totals[self.codes[tile]][count] += score - mean
+                tile_samples[self.codes[tile]][count] += 1
+            exact_totals[rank] += score - mean
+            exact_samples[rank] += 1
+        tile_values = [[totals[count] / (seen[count] + prior) if seen[count] else 0.0 for count in range(self.max_tiles + 1)]
+                       for totals, seen in zip(tile_totals, tile_samples)]
+
+        values = array('f')
+        size = len(self.alphabet)
+        ways = self._ways
+
+        def walk(code, remaining, value):
+            if code == size:
+                values.append(value)
+                return
+            for count in range(min(self.bounds[code], remaining) + 1):
+                if ways[code + 1][remaining - count]:
+                    walk(code + 1, remaining - count, value + tile_values[code][count] if count else value)
+
+        # Walking the counts in ascending order, size by size, visits the leaves in rank order
+        for k in range(self.max_tiles + 1):
+            walk(0, k, 0.0)
+        for rank, total in exact_totals.items():
+            values[rank] = (total + prior * values[rank]) / (exact_samples[rank] + prior)
+        self.values = values
+
+    def save(self, file_path: str):
+        values = array('f', self.values)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        alphabet_bytes = self.alphabet.encode('utf-8')
+        with open(file_path, 'wb') as file:
+            file.write(_HEADER.pack(LEAVES_MAGIC, LEAVES_VERSION, self.max_tiles, len(alphabet_bytes), len(values)))
+            file.write(alphabet_bytes.ljust(_padded(len(alphabet_bytes)), b'\0'))
+            file.write(bytes(self.bounds).ljust(_padded(len(self.bounds)), b'\0'))
+            file.write(values.tobytes())
+
+    @classmethod
+    def load(cls, file_path: str) -> 'LeaveTable':
+        """Memory-maps a saved table; the values are read straight from the file."""
+        with open(file_path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, max_tiles, alphabet_size, count = _HEADER.unpack_from(buffer, 0)
+        if magic != LEAVES_MAGIC or version != LEAVES_VERSION:
+            buffer.close()
+            raise ValueError(f"{file_path} is not a version {LEAVES_VERSION} leave table.")
+
+        position = _HEADER.size
+        alphabet = buffer[position:position + alphabet_size].decode('utf-8')
+        position += _padded(alphabet_size)
+        bounds = buffer[position:position + len(alphabet)]
+        position += _padded(len(alphabet))
+
+        table = cls(dict(zip(alphabet, bounds)), max_tiles, values=array('f'))
+        if len(table) != count:
+            buffer.close()
+            raise ValueError(f"{file_path} does not match its own tile set.")
+        values = memoryview(buffer)[position:position + 4 * count]
+        table.values = values.cast('f') if sys.byteorder == 'little' else _swapped(values)
+        table._mmap = buffer
+        return table
+
+    def close(self):
+        if self._mmap is not None:
+            if isinstance(self.values, memoryview):
+                self.values.release()
+            self.values = array('f')
+            self._mmap.close()
+            self._mmap = None
+
+
+def leave_after(rack, move) -> list:
+    """Returns the tiles a move keeps on the rack."""
+    leave = list(rack)
+    for _, _, letter, is_blank in move.tiles:
+        leave.remove('?' if is_blank else letter.upper())
+    return leave
+
+
+def read_samples(file_paths):
+    """Yields the (leave, score) samples from simulation.py output recorded with --leaves."""
+    for file_path in file_paths:
+        with open(file_path, 'r') as file:
+            for line in file:
+                if line.strip():
+                    yield from json.loads(line).get('leaves', ())
+
+
+def read_log_samples(file_paths):
+    """Yields the (leave, score) samples of every game in binary game logs."""
+    for file_path in file_paths:
+        with GameLogReader(file_path) as reader:
+            for index in range(len(reader)):
+                yield from reader.leave_samples(index)
+
+
+def _padded(size: int) -> int:
+    return (size + 3) & ~3
+
+
+def _swapped(values: memoryview) -> array:
+    swapped = array('f', values.tobytes())
+    swapped.byteswap()
+    return swapped
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Builds a rack leave table from self-play games.")
+    parser.add_argument('games', nargs='*', help="JSON lines written by simulation.py --leaves")
+    parser.add_argument('--game-log', action='append', default=[], help="binary game log to take leaves from")
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--tile-file', default='tiles.json')
+    parser.add_argument('--tile-set', default='English')
+    parser.add_argument('--max-tiles', type=int, default=6)
+    args = parser.parse_args(argv)
+
+    with open(args.tile_file, 'r') as f:
+        tiles = json.load(f)[args.tile_set]['tiles']
+    table = LeaveTable.from_tiles(tiles, args.max_tiles)
+    if not args.games and not args.game_log:
+        parser.error("give simulation output or a --game-log")
+    table.fit(chain(read_samples(args.games), read_log_samples(args.game_log)))
+    table.save(args.output)
+    print(f"{len(table)} leaves written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from dawg import COMPILED_MAGIC, DAWG, CompiledDAWG, DAWGBase
+
+# Compiled DAWGs keep one byte of finals per node, so a shared graph holds at most 8 lexicons
+MAX_SHARED_LEXICONS = 8
+
+
+class LexiconView(DAWGBase):
+    """One lexicon of a shared graph, usable anywhere a DAWG is.
+
+    The graph stores a bitmask of lexicons on every final node. `reach` maps each node to the
+    lexicons that have a word below it, so the view never walks into branches it cannot use.
+    """
+
+    def __init__(self, graph, flag: int, reach: dict):
+        self.graph = graph
+        self.flag = flag
+        self.root = graph.root
+        self._reach = reach
+
+    def edges(self, node):
+        reach, flag = self._reach, self.flag
+        return [(char, next_node) for char, next_node in self.graph.edges(node) if reach[next_node] & flag]
+
+    def get_edge(self, node, char):
+        next_node = self.graph.get_edge(node, char)
+        if next_node is None or not self._reach[next_node] & self.flag:
+            return None
+        return next_node
+
+    def is_final(self, node):
+        return bool(self.graph.is_final(node) & self.flag)
+
+
+def build_shared_graph(word_lists: dict) -> tuple:
+    """Builds one graph for several word lists, keyed by lexicon name.
+
+    Returns the graph and the flag of every lexicon; a word's final node holds the flags of
+    all lists containing it, so the suffixes the lexicons have in common are stored once.
+    """
+    if len(word_lists) > MAX_SHARED_LEXICONS:
+        raise ValueError(f"A shared graph holds at most {MAX_SHARED_LEXICONS} lexicons.")
+    flags = {name: 1 << bit for bit, name in enumerate(word_lists)}
+    memberships = {}
+    for name, file_path in word_lists.items():
+        with open(file_path, 'r') as file:
+            for line in file:
+                word = line.strip().lower()
+                if word:
+                    memberships[word] = memberships.get(word, 0) | flags[name]
+
+    graph = DAWG()
+    for word in sorted(memberships):
+        graph.insert(word, memberships[word])
+    graph.finish()
+    return graph, flags
+
+
+def reachable_flags(graph) -> dict:
+    """Maps every node of a shared graph to the union of the flags of the words below it."""
+    reach = {}
+    stack = [(graph.root, False)]
+    while stack:
+        node, leaving = stack.pop()
+        if leaving:
+            flags = int(graph.is_final(node))
+            for _, next_node in graph.edges(node):
+                flags |= reach[next_node]
+            reach[node] = flags
+        elif node not in reach:
+            stack.append((node, True))
+            stack.extend((next_node, False) for _, next_node in graph.edges(node) if next_node not in reach)
+    return reach
+
+
+def load_lexicon(file_path: str) -> DAWGBase:
+    """Memory-maps a compiled lexicon, or builds a DAWG from a word list."""
+    with open(file_path, 'rb') as file:
+        compiled = file.read(len(COMPILED_MAGIC)) == COMPILED_MAGIC
+    return CompiledDAWG(file_path) if compiled else DAWG(file_path)
+
+
+def memory_size(lexicon) -> int:
+    """Estimates the bytes a loaded lexicon takes; a compiled one counts its mapped file."""
+    if isinstance(lexicon, LexiconView):
+        return memory_size(lexicon.graph) + sys.getsizeof(lexicon._reach)
+    if isinstance(lexicon, CompiledDAWG):
+        return len(lexicon._mmap)
+    size = 0
+    seen = {id(lexicon.root)}
+    stack = [lexicon.root]
+    while stack:
+        node = stack.pop()
+        size += sys.getsizeof(node) + sys.getsizeof(node.__dict__) + sys.getsizeof(node.edges)
+        for next_node in node.edges.values():
+            if id(next_node) not in seen:
+                seen.add(id(next_node))
+                stack.append(next_node)
+    return size
+
+
+class LexiconRegistry:
+    """Lexicons by name or language descriptor, loaded on first use.
+
+    When the loaded lexicons take more than `memory_limit` bytes, the least recently used
+    ones are dropped until they fit again; `evict_idle` drops the ones unused for a while.
+    An evicted lexicon is only forgotten by the registry, so games still holding it keep
+    working, and the next `get` loads it again. The registry is safe to use from threads.
+    """
+
+    def __init__(self, memory_limit: int = None):
+        self.memory_limit = memory_limit
+        self.loads = 0
+        self._units = {}      # lexicon name -> the unit that loads it
+        self._loaders = {}    # unit -> callable returning {name: lexicon}
+        self._languages = {}  # language descriptor -> lexicon name
+        self._loaded = OrderedDict()  # unit -> (lexicons, bytes, last used), least recently used first
+        self._lock = threading.RLock()
+
+    def register(self, name: str, file_path: str = None, languages=(), loader=None):
+        """Registers a word list or compiled lexicon, or a callable that returns a lexicon."""
+        if (file_path is None) == (loader is None):
+            raise ValueError("Give either a file path or a loader.")
+        load = loader or (lambda: load_lexicon(file_path))
+        self._add_unit(name, lambda: {name: load()}, {name: languages})
+
+    def register_shared(self, word_lists: dict, languages: dict = None):
+        """Registers related word lists, keyed by name, to be stored as one shared graph."""
+        def load():
+            graph, flags = build_shared_graph(word_lists)
+            reach = reachable_flags(graph)
+            return {name: LexiconView(graph, flag, reach) for name, flag in flags.items()}
+        self._add_unit(tuple(word_lists), load, languages or {})
+
+    def _add_unit(self, unit, loader, languages: dict):
+        names = unit if isinstance(unit, tuple) else (unit,)
+        with self._lock:
+            for name in names:
+                if name in self._units:
+                    raise ValueError(f"Lexicon {name!r} is already registered.")
+            for name in names:
+                self._units[name] = unit
+                for language in languages.get(name, ()):
+                    self._languages[language] = name
+            self._loaders[unit] = loader
+
+    def names(self) -> list:
+        return list(self._units)
+
+    def resolve(self, key: str) -> str:
+        """Returns the lexicon name for a lexicon name or language descriptor."""
+        if key in self._units:
+            return key
+        if key in self._languages:
+            return self._languages[key]
+        raise KeyError(f"No lexicon registered for {key!r}.")
+
+    def get(self, key: str) -> DAWGBase:
+        """Returns a lexicon by name or language descriptor, loading it if needed."""
+        name = self.resolve(key)
+        unit = self._units[name]
+        with self._lock:
+            if unit in self._loaded:
+                lexicons, size, _ = self._loaded.pop(unit)
+            else:
+                lexicons = self._loaders[unit]()
+                # A unit is a single lexicon or views that share one graph, so any member measures it
+                size = memory_size(next(iter(lexicons.values())))
+                self.loads += 1
+            self._loaded[unit] = (lexicons, size, time.monotonic())
+            self._enforce_limit()
+            return lexicons[name]
+
+    def is_loaded(self, key: str) -> bool:
+        return self._units[self.resolve(key)] in self._loaded
+
+    def memory_usage(self) -> int:
+        """Estimated bytes held by the loaded lexicons."""
+        with self._lock:
+            return sum(size for _, size, _ in self._loaded.values())
+
+    def evict(self, key: str):
+        """Drops a lexicon, and any lexicons sharing its graph, until it is used again."""
+        with self._lock:
+            self._loaded.pop(self._units[self.resolve(key)], None)
+
+    def evict_idle(self, max_idle: float) -> int:
+        """Drops the lexicons not used for `max_idle` seconds and returns how many units went."""
+        cutoff = time.monotonic() - max_idle
+        with self._lock:
+            idle = [unit for unit, (_, _, last_used) in self._loaded.items() if last_used < cutoff]
+            for unit in idle:
+                del self._loaded[unit]
+            return len(idle)
+
+    def _enforce_limit(self):
+        # The most recently used unit always stays, even when it alone exceeds the limit
+        if self.memory_limit is None:
+            return
+        while len(self._loaded) > 1 and self.memory_usage() > self.memory_limit:
+            self._loaded.popitem(last=False)
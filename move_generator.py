@@ -0,0 +1,258 @@
+import time
+from collections import Counter
+from typing import NamedTuple
+
+ACROSS = 'across'
+DOWN = 'down'
+
+
+class Move(NamedTuple):
+    """A legal placement: the full word it forms and the tiles taken from the rack."""
+    row: int
+    col: int
+    direction: str
+    word: str
+    tiles: tuple  # ((row, col, letter, is_blank), ...) for every newly placed tile
+
+
+class MoveGenerator:
+    """Generates every legal move on a board using anchors and cross-checks (Appel & Jacobson).
+
+    The generator keeps its own copy of the board letters. Call `place` for every tile put on
+    the board; anchors and cross-checks are then updated around that square only, instead of
+    rescanning the whole board before each turn. Every change is journaled, so a lookahead
+    search can take a `checkpoint`, place the tiles of a move and `rollback` afterwards.
+    """
+
+    def __init__(self, dictionary, width: int, height: int):
+        self.dictionary = dictionary
+        self.width = width
+        self.height = height
+        self.letters = [[None] * width for _ in range(height)]
+        self.tile_count = 0
+        self.center = (height // 2, width // 2)
+        self.anchors = {self.center}
+        # Letters allowed on an empty square by the perpendicular word; a missing square is unconstrained
+        self.cross_checks = {ACROSS: {}, DOWN: {}}
+        self._journal = []
+
+    def copy(self) -> 'MoveGenerator':
+        """Returns an independent generator for the same position."""
+        generator = MoveGenerator(self.dictionary, self.width, self.height)
+        generator.letters = [list(line) for line in self.letters]
+        generator.tile_count = self.tile_count
+        generator.anchors = set(self.anchors)
+        generator.cross_checks = {direction: dict(checks) for direction, checks in self.cross_checks.items()}
+        return generator
+
+    def checkpoint(self) -> int:
+        """Returns a marker that `rollback` can restore the position to."""
+        return len(self._journal)
+
+    def rollback(self, checkpoint: int):
+        """Undoes every tile placed since the checkpoint was taken."""
+        journal = self._journal
+        while len(journal) > checkpoint:
+            entry = journal.pop()
+            if entry[0] == 'letter':
+                self.letters[entry[1]][entry[2]] = None
+                self.tile_count -= 1
+            elif entry[0] == 'anchor':
+                if entry[2]:
+                    self.anchors.add(entry[1])
+                else:
+                    self.anchors.discard(entry[1])
+            elif entry[3] is None:
+                self.cross_checks[entry[1]].pop(entry[2], None)
+            else:
+                self.cross_checks[entry[1]][entry[2]] = entry[3]
+
+    def place(self, row: int, col: int, letter: str):
+        """Records a tile on the board and updates the anchors and cross-checks around it."""
+        self.letters[row][col] = letter.lower()
+        self._journal.append(('letter', row, col))
+        if self.tile_count == 0:
+            self._set_anchor(self.center, False)
+        self.tile_count += 1
+        self._set_anchor((row, col), False)
+        self._set_cross_check(ACROSS, (row, col), None)
+        self._set_cross_check(DOWN, (row, col), None)
+
+        for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if self._is_empty(r, c):
+                self._set_anchor((r, c), True)
+
+        # Only the squares at both ends of the runs through the new tile see a different word
+        for (dr, dc), direction in (((1, 0), ACROSS), ((0, 1), DOWN)):
+            for step in (-1, 1):
+                r, c = row, col
+                while self._is_occupied(r, c):
+                    r, c = r + step * dr, c + step * dc
+                if self._is_empty(r, c):
+                    self._update_cross_check(r, c, dr, dc, direction)
+
+    def generate_moves(self, rack, lines=None, deadline: float = None):
+        """Yields every legal move for the rack, in both directions. A '?' tile is a blank.
+
+        `lines` restricts the search to some (direction, index) lines, as listed by `lines()`,
+        and the moves come line by line in the order given. The moves are found lazily; with
+        a `deadline` (a time.perf_counter() value) the search simply stops once it passes,
+        even in the middle of a line.
+        """
+        counts = Counter(tile.lower() for tile in rack)
+        blanks = counts.pop('?', 0)
+
+        for direction, index in (self.lines() if lines is None else lines):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if direction == ACROSS:
+                row = index
+                cells = self.letters[row]
+                checks = [self.cross_checks[ACROSS].get((row, col)) for col in range(self.width)]
+                anchors = [col for col in range(self.width) if (row, col) in self.anchors]
+                for start, word, placed in self._generate_line(cells, checks, anchors, counts, blanks, deadline):
+                    tiles = tuple((row, col, letter, is_blank) for col, letter, is_blank in placed)
+                    yield Move(row, start, ACROSS, word, tiles)
+            else:
+                col = index
+                cells = [self.letters[row][col] for row in range(self.height)]
+                checks = [self.cross_checks[DOWN].get((row, col)) for row in range(self.height)]
+                anchors = [row for row in range(self.height) if (row, col) in self.anchors]
+                for start, word, placed in self._generate_line(cells, checks, anchors, counts, blanks, deadline):
+                    if len(placed) == 1 and self._forms_across_word(placed[0][0], col):
+                        continue  # Already generated as an across move
+                    tiles = tuple((row, col, letter, is_blank) for row, letter, is_blank in placed)
+                    yield Move(start, col, DOWN, word, tiles)
+
+    def lines(self) -> list:
+        """Every line moves are searched on: the rows across, then the columns down."""
+        return [(ACROSS, row) for row in range(self.height)] + [(DOWN, col) for col in range(self.width)]
+
+    def _generate_line(self, cells, checks, anchors, counts, blanks, deadline):
+        # A generator all the way down, so the search can stop in the middle of a line
+        dictionary = self.dictionary
+        anchor_set = set(anchors)
+
+        def extend_right(partial, node, pos, anchor, placed, blanks):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if pos == len(cells) or cells[pos] is None:
+                if pos > anchor and len(partial) > 1 and dictionary.is_final(node):
+                    yield pos - len(partial), partial, list(placed)
+                if pos == len(cells):
+                    return
+                check = checks[pos]
+                for char, next_node in dictionary.edges(node):
+                    if check is not None and char not in check:
+                        continue
+                    if counts[char] > 0:
+                        counts[char] -= 1
+                        placed.append((pos, char, False))
+                        yield from extend_right(partial + char, next_node, pos + 1, anchor, placed, blanks)
+                        placed.pop()
+                        counts[char] += 1
+                    elif blanks > 0:
+                        placed.append((pos, char, True))
+                        yield from extend_right(partial + char, next_node, pos + 1, anchor, placed, blanks - 1)
+                        placed.pop()
+            else:
+                next_node = dictionary.get_edge(node, cells[pos])
+                if next_node is not None:
+                    yield from extend_right(partial + cells[pos], next_node, pos + 1, anchor, placed, blanks)
+
+        def left_part(partial, node, limit, anchor, left, blanks):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            # Tiles in front of the anchor go on empty non-anchor squares, which are never cross-checked
+            start = anchor - len(left)
+            placed = [(start + i, char, is_blank) for i, (char, is_blank) in enumerate(left)]
+            yield from extend_right(partial, node, anchor, anchor, placed, blanks)
+            if limit == 0:
+                return
+            for char, next_node in dictionary.edges(node):
+                if counts[char] > 0:
+                    counts[char] -= 1
+                    yield from left_part(partial + char, next_node, limit - 1, anchor, left + [(char, False)], blanks)
+                    counts[char] += 1
+                elif blanks > 0:
+                    yield from left_part(partial + char, next_node, limit - 1, anchor, left + [(char, True)],
+                                         blanks - 1)
+
+        for anchor in anchors:
+            if anchor > 0 and cells[anchor - 1] is not None:
+                # The left part is already on the board
+                start = anchor - 1
+                while start > 0 and cells[start - 1] is not None:
+                    start -= 1
+                node = dictionary.root
+                for char in cells[start:anchor]:
+                    node = dictionary.get_edge(node, char)
+                    if node is None:
+                        break
+                else:
+                    yield from extend_right(''.join(cells[start:anchor]), node, anchor, anchor, [], blanks)
+            else:
+                limit = 0
+                while anchor - limit > 0 and cells[anchor - limit - 1] is None and anchor - limit - 1 not in anchor_set:
+                    limit += 1
+                yield from left_part('', dictionary.root, limit, anchor, [], blanks)
+
+    def _update_cross_check(self, row: int, col: int, dr: int, dc: int, direction: str):
+        before = []
+        r, c = row - dr, col - dc
+        while self._is_occupied(r, c):
+            before.append(self.letters[r][c])
+            r, c = r - dr, c - dc
+        after = []
+        r, c = row + dr, col + dc
+        while self._is_occupied(r, c):
+            after.append(self.letters[r][c])
+            r, c = r + dr, c + dc
+
+        dictionary = self.dictionary
+        node = dictionary.root
+        for char in reversed(before):
+            node = dictionary.get_edge(node, char)
+            if node is None:
+                self._set_cross_check(direction, (row, col), frozenset())
+                return
+
+        allowed = set()
+        for char, next_node in dictionary.edges(node):
+            for suffix_char in after:
+                next_node = dictionary.get_edge(next_node, suffix_char)
+                if next_node is None:
+                    break
+            else:
+                if dictionary.is_final(next_node):
+                    allowed.add(char)
+        self._set_cross_check(direction, (row, col), frozenset(allowed))
+
+    def _set_anchor(self, square: tuple, is_anchor: bool):
+        present = square in self.anchors
+        if present != is_anchor:
+            self._journal.append(('anchor', square, present))
+            if is_anchor:
+                self.anchors.add(square)
+            else:
+                self.anchors.discard(square)
+
+    def _set_cross_check(self, direction: str, square: tuple, allowed: frozenset):
+        # None removes the constraint
+        checks = self.cross_checks[direction]
+        previous = checks.get(square)
+        if previous != allowed:
+            self._journal.append(('check', direction, square, previous))
+            if allowed is None:
+                del checks[square]
+            else:
+                checks[square] = allowed
+
+    def _forms_across_word(self, row: int, col: int) -> bool:
+        return self._is_occupied(row, col - 1) or self._is_occupied(row, col + 1)
+
+    def _is_occupied(self, row: int, col: int) -> bool:
+        return 0 <= row < self.height and 0 <= col < self.width and self.letters[row][col] is not None
+
+    def _is_empty(self, row: int, col: int) -> bool:
+        return 0 <= row < self.height and 0 <= col < self.width and self.letters[row][col] is None
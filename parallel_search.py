@@ -0,0 +1,90 @@
+"""Move search for a single position, split across a process pool.
+
+The board lines (rows across, columns down) are dealt out to the workers, which generate
+and score the moves of their lines against their own memory-mapped copy of the compiled
+lexicon. The parent puts the moves back in line order, so the ranked list is exactly the
+one a serial search produces, and the best move is the one greedy play would pick.
+"""
+import multiprocessing
+
+from dawg import CompiledDAWG
+from move_generator import ACROSS, MoveGenerator
+
+# The lexicon of the current worker process, set up by _init_worker
+_dictionary = None
+
+
+def _init_worker(compiled_path: str):
+    global _dictionary
+    _dictionary = CompiledDAWG(compiled_path)
+
+
+def _search_shard(task: tuple) -> list:
+    state, scorer, points, rack, lines = task
+    width, height, letters, tile_count, anchors, cross_checks = state
+    generator = MoveGenerator(_dictionary, width, height)
+    generator.letters = letters
+    generator.tile_count = tile_count
+    generator.anchors = anchors
+    generator.cross_checks = cross_checks
+
+    results = []
+    for line in lines:
+        moves = list(generator.generate_moves(rack, [line]))
+        results.append((line, moves, [scorer.score_points(points, move) for move in moves]))
+    return results
+
+
+class ParallelMoveSearch:
+    """Generates and scores the moves of one position on several cores.
+
+    `compiled_path` must hold the same lexicon the games use, compiled with DAWG.compile.
+    The object can also serve as a GameSet strategy, playing the highest-scoring move.
+    """
+
+    def __init__(self, compiled_path: str, processes: int = None, shards_per_process: int = 4):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.shards = self.processes * shards_per_process
+        self.pool = multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(compiled_path,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def ranked_moves(self, generator: MoveGenerator, scorer, board: list, rack) -> list:
+        """Returns every legal (move, score), best first; equal scores keep the serial order."""
+        lines = generator.lines()
+        order = {line: position for position, line in enumerate(lines)}
+        state = (generator.width, generator.height, generator.letters, generator.tile_count,
+                 generator.anchors, generator.cross_checks)
+        points = scorer.board_points(board)
+
+        # Lines with more anchors have more to search, so they are dealt out first
+        busy = sorted(lines, key=lambda line: -self._anchor_count(generator, line))
+        shards = [busy[start::self.shards] for start in range(self.shards)]
+        tasks = [(state, scorer, points, list(rack), shard) for shard in shards if shard]
+
+        found = sorted((result for shard in self.pool.map(_search_shard, tasks) for result in shard),
+                       key=lambda result: order[result[0]])
+        moves = [(move, score) for _, line_moves, scores in found for move, score in zip(line_moves, scores)]
+        ranked = sorted(range(len(moves)), key=lambda index: (-moves[index][1], index))
+        return [moves[index] for index in ranked]
+
+    def choose_move(self, game, player: str):
+        """Strategy hook for GameSet: the highest-scoring move, or None when there is none."""
+        moves = self.ranked_moves(game.move_generator, game.scorer, game.board, game.players[player]['tiles'])
+        return moves[0][0] if moves else None
+
+    @staticmethod
+    def _anchor_count(generator: MoveGenerator, line: tuple) -> int:
+        direction, index = line
+        if direction == ACROSS:
+            return sum(1 for col in range(generator.width) if (index, col) in generator.anchors)
+        return sum(1 for row in range(generator.height) if (row, index) in generator.anchors)
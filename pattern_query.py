@@ -0,0 +1,298 @@
+"""Constraint patterns for board lines, compiled to automata and walked with the lexicon.
+
+A query is a sequence of squares:
+
+    a-z      a letter already on the board; it uses no rack tile
+    ? or .   a rack tile, any letter
+    [aeiou]  a rack tile restricted to the letters listed, [^aeiou] to all others
+    *        any number of rack tiles, any letters
+    {m,n}    after a square: m to n of it; {m} exactly m, {m,} at least m
+
+so `[bcd]a{1,2}*s` is a word of b, c or d, one or two board a's, any tiles and a final s.
+A query compiles once (and is cached) into a small automaton, and `search` walks it in
+lockstep with a DAWG, so only the prefixes that can still match are ever visited. The
+rack, the number of tiles used and the word length bound the walk as well. `compile_line`
+builds the automaton of a whole board line, so every word that fits on it is found in a
+single walk:
+
+    query = compile_query("[st]?ar*", max_length=7)
+    words = query.search(dictionary, rack=["E", "T", "?", "S"])
+"""
+from collections import Counter
+from functools import lru_cache
+
+from instrumentation import profiler
+
+_CACHE_SIZE = 1024
+
+
+class PatternQuery:
+    """A compiled query: an automaton whose states are squares of the pattern.
+
+    Every edge is (letters, negated, fixed, target); `letters` None accepts any letter and
+    a fixed edge is a board letter, which uses no rack tile. Epsilon moves are folded into
+    the closure of each state, so a set of active states is a bitmask.
+    """
+
+    def __init__(self, edges: list, epsilon: list, start: int, accept: int, min_length: int = None,
+                 max_length: int = None):
+        self.edges = edges
+        self.min_length = min_length
+        self.max_length = max_length
+        self._closures = [_closure(state, epsilon) for state in range(len(edges))]
+        self.start = self.closure(start)
+        self.accept = accept
+        self._steps = {}
+
+    def closure(self, mask: int) -> int:
+        closed = 0
+        state = 0
+        while mask:
+            if mask & 1:
+                closed |= self._closures[state]
+            mask >>= 1
+            state += 1
+        return closed
+
+    def step(self, mask: int, char: str) -> tuple:
+        """Returns the states reached on `char` from a board letter and from a rack tile."""
+        key = (mask, char)
+        steps = self._steps.get(key)
+        if steps is None:
+            fixed_mask = rack_mask = 0
+            state = 0
+            while mask >> state:
+                if mask >> state & 1:
+                    for letters, negated, fixed, target in self.edges[state]:
+                        if letters is None or (char in letters) != negated:
+                            if fixed:
+                                fixed_mask |= self._closures[target]
+                            else:
+                                rack_mask |= self._closures[target]
+                state += 1
+            steps = self._steps[key] = (fixed_mask, rack_mask)
+        return steps
+
+    def search(self, dawg, rack=None, min_tiles: int = 0, max_tiles: int = None) -> list:
+        with profiler.timer('lexicon.pattern_search'):
+            return list(self.iter_search(dawg, rack, min_tiles, max_tiles))
+
+    def iter_search(self, dawg, rack=None, min_tiles: int = 0, max_tiles: int = None):
+        """Yields every word of the DAWG the query matches, once.
+
+        With a rack, the rack squares must be filled from it ('?' tiles are blanks); either
+        way between `min_tiles` and `max_tiles` rack squares must be used.
+        """
+        counts = None
+        if rack is not None:
+            counts = Counter(tile.lower() for tile in rack)
+        if counts is None and min_tiles == 0 and max_tiles is None:
+            yield from self._walk_masks(dawg)
+        else:
+            yield from self._walk_tiles(dawg, dawg.root, self.start, "", 0, counts, min_tiles, max_tiles, set())
+
+    def _walk_masks(self, dawg):
+        # Without a rack it does not matter which squares used tiles, so the states of all
+        # paths are merged like DAWG.iter_wildcard does, and a dead (node, states) pair is
+        # never entered twice
+        min_length, max_length = self.min_length, self.max_length
+        bounded = min_length is not None or max_length is not None
+        dead = set()
+        found = 0
+        stack = [(False, dawg.root, self.start, "", 0)]
+        while stack:
+            leaving, node, mask, prefix, found_before = stack.pop()
+            state = (node, mask, len(prefix)) if bounded else (node, mask)
+            if leaving:
+                if found == found_before:
+                    dead.add(state)
+                continue
+            if state in dead:
+                continue
+
+            stack.append((True, node, mask, prefix, found))
+            if mask & self.accept and dawg.is_final(node) and (min_length is None or len(prefix) >= min_length):
+                found += 1
+                yield prefix
+            if max_length is not None and len(prefix) >= max_length:
+                continue
+            for char, next_node in reversed(list(dawg.edges(node))):
+                fixed_mask, rack_mask = self.step(mask, char)
+                if fixed_mask | rack_mask:
+                    stack.append((False, next_node, fixed_mask | rack_mask, prefix + char, 0))
+
+    def _walk_tiles(self, dawg, node, mask, prefix, used, counts, min_tiles, max_tiles, seen):
+        # Paths that used a board letter and paths that used a rack tile for the same letter
+        # are walked apart, since they leave different racks behind
+        if (mask & self.accept and used >= min_tiles and dawg.is_final(node) and prefix not in seen
+                and (self.min_length is None or len(prefix) >= self.min_length)):
+            seen.add(prefix)
+            yield prefix
+        if self.max_length is not None and len(prefix) >= self.max_length:
+            return
+        for char, next_node in dawg.edges(node):
+            fixed_mask, rack_mask = self.step(mask, char)
+            if fixed_mask:
+                yield from self._walk_tiles(dawg, next_node, fixed_mask, prefix + char, used, counts, min_tiles,
+                                            max_tiles, seen)
+            if not rack_mask or (max_tiles is not None and used >= max_tiles):
+                continue
+            if counts is None:
+                yield from self._walk_tiles(dawg, next_node, rack_mask, prefix + char, used + 1, counts, min_tiles,
+                                            max_tiles, seen)
+                continue
+            # Only fall back to a blank when the letter itself is used up
+            tile = char if counts[char] > 0 else '?' if counts['?'] > 0 else None
+            if tile is not None:
+                counts[tile] -= 1
+                yield from self._walk_tiles(dawg, next_node, rack_mask, prefix + char, used + 1, counts, min_tiles,
+                                            max_tiles, seen)
+                counts[tile] += 1
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def compile_query(pattern: str, min_length: int = None, max_length: int = None) -> PatternQuery:
+    """Compiles a query; the same pattern and bounds return the same PatternQuery."""
+    builder = _Builder()
+    pattern = pattern.lower()
+    position = 0
+    while position < len(pattern):
+        char = pattern[position]
+        position += 1
+        if char == '*':
+            builder.repeat(None, False, False, 0, None)
+            continue
+        if char in '?.':
+            square = (None, False, False)
+        elif char == '[':
+            end = pattern.find(']', position)
+            if end < 0:
+                raise ValueError(f"Unclosed '[' in pattern {pattern!r}.")
+            negated = pattern.startswith('^', position)
+            letters = frozenset(pattern[position + negated:end])
+            if not letters:
+                raise ValueError(f"Empty letter class in pattern {pattern!r}.")
+            square = (letters, negated, False)
+            position = end + 1
+        elif char in ']{},^':
+            raise ValueError(f"Unexpected {char!r} in pattern {pattern!r}.")
+        else:
+            square = (frozenset(char), False, True)
+
+        low = high = 1
+        if pattern.startswith('{', position):
+            end = pattern.find('}', position)
+            if end < 0:
+                raise ValueError(f"Unclosed '{{' in pattern {pattern!r}.")
+            low, high = _bounds(pattern[position + 1:end], pattern)
+            position = end + 1
+        builder.repeat(*square, low, high)
+    return builder.build(min_length, max_length)
+
+
+def compile_line(cells, checks=None, anchors=None, min_length: int = 2) -> PatternQuery:
+    """Compiles the query for every word that fits on a board line.
+
+    `cells` holds the board letters of the line and None for empty squares, `checks` the
+    letters the cross-words allow on each square (None for no constraint), and `anchors`
+    the squares a word must cover at least one of. A word starts after an empty square or
+    the edge of the board and ends before one. Pass min_tiles=1 to `search` to leave out the
+    words already on the board.
+    """
+    checks = tuple(None if check is None else frozenset(check) for check in checks or [None] * len(cells))
+    anchors = None if anchors is None else frozenset(anchors)
+    return _compile_line(tuple(cells), checks, anchors, min_length)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _compile_line(cells: tuple, checks: tuple, anchors, min_length: int) -> PatternQuery:
+    # State p stands for "the next square is p" before an anchor was covered, state
+    # p + size + 1 for the same after one was
+    size = len(cells)
+    edges = [[] for _ in range(2 * (size + 1))]
+    start = accept = 0
+    for square in range(size + 1):
+        ends_word = square == size or cells[square] is None
+        if anchors is None:
+            # Every word is allowed, so it is treated as having covered an anchor already
+            if square == 0 or cells[square - 1] is None:
+                start |= 1 << (square + size + 1)
+        elif square == 0 or cells[square - 1] is None:
+            start |= 1 << square
+        if ends_word:
+            accept |= 1 << (square + size + 1)
+        if square == size:
+            continue
+        covers = anchors is None or square in anchors
+        for covered in (False, True):
+            state = square + (size + 1 if covered else 0)
+            target = square + 1 + (size + 1 if covered or covers else 0)
+            if cells[square] is not None:
+                edges[state].append((frozenset(cells[square].lower()), False, True, target))
+            else:
+                edges[state].append((checks[square], False, False, target))
+    return PatternQuery(edges, [0] * len(edges), start, accept, min_length, size)
+
+
+class _Builder:
+    # Builds the automaton square by square; `current` is the state after the last square
+    def __init__(self):
+        self.edges = [[]]
+        self.epsilon = [0]
+        self.current = 0
+
+    def _new_state(self) -> int:
+        self.edges.append([])
+        self.epsilon.append(0)
+        return len(self.edges) - 1
+
+    def repeat(self, letters, negated: bool, fixed: bool, low: int, high: int):
+        for _ in range(low):
+            target = self._new_state()
+            self.edges[self.current].append((letters, negated, fixed, target))
+            self.current = target
+        if high is None:
+            # A fresh state loops, so two loops in a row cannot interleave
+            loop = self._new_state()
+            self.epsilon[self.current] |= 1 << loop
+            self.edges[loop].append((letters, negated, fixed, loop))
+            self.current = loop
+        else:
+            for _ in range(high - low):
+                target = self._new_state()
+                self.edges[self.current].append((letters, negated, fixed, target))
+                self.epsilon[self.current] |= 1 << target
+                self.current = target
+
+    def build(self, min_length, max_length) -> PatternQuery:
+        return PatternQuery(self.edges, self.epsilon, 1 << 0, 1 << self.current, min_length, max_length)
+
+
+def _bounds(text: str, pattern: str) -> tuple:
+    try:
+        if ',' not in text:
+            low = high = int(text)
+        else:
+            low_text, high_text = text.split(',')
+            low = int(low_text) if low_text else 0
+            high = int(high_text) if high_text else None
+    except ValueError:
+        raise ValueError(f"Invalid repeat {{{text}}} in pattern {pattern!r}.") from None
+    if low < 0 or (high is not None and high < low):
+        raise ValueError(f"Invalid repeat {{{text}}} in pattern {pattern!r}.")
+    return low, high
+
+
+def _closure(state: int, epsilon: list) -> int:
+    closed = 1 << state
+    stack = [state]
+    while stack:
+        current = stack.pop()
+        reachable = epsilon[current]
+        target = 0
+        while reachable >> target:
+            if reachable >> target & 1 and not closed >> target & 1:
+                closed |= 1 << target
+                stack.append(target)
+            target += 1
+    return closed
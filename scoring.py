@@ -0,0 +1,86 @@
+from array import array
+from move_generator import ACROSS, Move
+
+LETTER_MULTIPLIERS = {'2L': 2, '3L': 3}
+WORD_MULTIPLIERS = {'2W': 2, '3W': 3}
+
+
+class Scorer:
+    """Scores moves from multiplier and point tables precomputed from the board and tile set.
+
+    Premium squares only count for tiles placed by the move itself, blanks score nothing, and
+    a move that empties a full rack earns the bingo bonus on top of its main and cross words.
+    """
+
+    BINGO_BONUS = 50
+
+    def __init__(self, special_cells: dict, width: int, height: int, tiles: dict, rack_size: int = 7):
+        self.width = width
+        self.height = height
+        self.rack_size = rack_size
+        self.letter_multipliers = array('B', [1] * (width * height))
+        self.word_multipliers = array('B', [1] * (width * height))
+        for (row, col), special in special_cells.items():
+            index = row * width + col
+            self.letter_multipliers[index] = LETTER_MULTIPLIERS.get(special, 1)
+            self.word_multipliers[index] = WORD_MULTIPLIERS.get(special, 1)
+
+        # Board tiles are keyed as in tiles.json ('?' for a blank), move letters are lowercase
+        self.tile_points = {tile: info['points'] for tile, info in tiles.items()}
+        self.letter_points = {tile.lower(): info['points'] for tile, info in tiles.items() if tile != '?'}
+
+    def board_points(self, board: list) -> list:
+        """Flattens a board into the point value of every tile, with None for empty squares."""
+        return [self.tile_points.get(cell, 0) if cell else None for line in board for cell in line]
+
+    def score_move(self, board: list, move: Move) -> int:
+        """Scores a single move against the current board."""
+        return self.score_points(self.board_points(board), move)
+
+    def score_moves(self, board: list, moves) -> list:
+        """Scores a batch of moves against the same board, flattening the board only once."""
+        points = self.board_points(board)
+        return [self.score_points(points, move) for move in moves]
+
+    def score_points(self, points: list, move: Move) -> int:
+        """Scores a move against a board already flattened by `board_points`."""
+        width = self.width
+        placed = {}
+        for row, col, letter, is_blank in move.tiles:
+            placed[row * width + col] = 0 if is_blank else self.letter_points.get(letter, 0)
+
+        main_step, cross_step = (1, width) if move.direction == ACROSS else (width, 1)
+        score = self._word_score(points, placed, move.row * width + move.col, main_step, len(move.word))
+
+        for row, col, _, _ in move.tiles:
+            # The perpendicular word through a placed tile, if it has any neighbours
+            if move.direction == ACROSS:
+                before = after = 0
+                while row - before - 1 >= 0 and points[(row - before - 1) * width + col] is not None:
+                    before += 1
+                while row + after + 1 < self.height and points[(row + after + 1) * width + col] is not None:
+                    after += 1
+            else:
+                before = after = 0
+                while col - before - 1 >= 0 and points[row * width + col - before - 1] is not None:
+                    before += 1
+                while col + after + 1 < width and points[row * width + col + after + 1] is not None:
+                    after += 1
+            if before or after:
+                start = row * width + col - before * cross_step
+                score += self._word_score(points, placed, start, cross_step, before + after + 1)
+
+        if len(move.tiles) >= self.rack_size:
+            score += self.BINGO_BONUS
+        return score
+
+    def _word_score(self, points, placed, start, step, length):
+        word_points = 0
+        multiplier = 1
+        for index in range(start, start + step * length, step):
+            if index in placed:
+                word_points += placed[index] * self.letter_multipliers[index]
+                multiplier *= self.word_multipliers[index]
+            else:
+                word_points += points[index]
+        return word_points * multiplier
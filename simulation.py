@@ -0,0 +1,187 @@
+"""Headless self-play: runs seeded computer-only games across a process pool.
+
+The lexicon is compiled once and memory-mapped by every worker, so all processes share a
+single read-only copy. Each finished game is written as one JSON line:
+
+    python simulation.py --games 1000 --processes 8 --seed 1 --output games.jsonl
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import instrumentation
+from dawg import DAWG, CompiledDAWG
+from game_log import GameLog
+from game_set import GameSet
+
+# The lexicon of the current worker process, set up by _init_worker
+_dictionary = None
+
+
+def simulate_game(dictionary, seed: int, num_players: int = 2, board_name: str = 'Standard',
+                  language_descriptor: str = 'en-us', record_leaves: bool = False, profile: bool = False,
+                  record_history: bool = False) -> dict:
+    """Plays one computer-only game and returns its statistics.
+
+    With `record_leaves`, the result also lists every rack leave with the score its player
+    made on their following turn, which is what leaves.py builds its table from. With
+    `profile`, it carries the instrumentation report of the game, turn by turn. With
+    `record_history`, it holds the game's LogRecords, board size, language and board name
+    for a GameLog, which the caller takes out before writing the result.
+    """
+    if not profile:
+        return _play_game(dictionary, seed, num_players, board_name, language_descriptor, record_leaves,
+                          record_history)
+    was_enabled = instrumentation.profiler.enabled
+    instrumentation.profiler.reset()
+    instrumentation.enable()
+    try:
+        result = _play_game(dictionary, seed, num_players, board_name, language_descriptor, record_leaves,
+                            record_history)
+        result['profile'] = instrumentation.profiler.report()
+        return result
+    finally:
+        # A game that fails must not leave profiling on for the next games of this process
+        instrumentation.profiler.enabled = was_enabled
+
+
+def _play_game(dictionary, seed: int, num_players: int, board_name: str, language_descriptor: str,
+               record_leaves: bool, record_history: bool) -> dict:
+    start = time.perf_counter()
+    game = GameSet(dictionary=dictionary, board_name=board_name, language_descriptor=language_descriptor,
+                   num_players=num_players, auto_start=False, seed=seed, computer_players=num_players, verbose=False)
+
+    player = game.rng.choice(list(game.players.keys()))
+    moves = passes = 0
+    max_turn_seconds = 0.0
+    leaves = []
+    pending = {}
+    while True:
+        stock_before = len(game.stock)
+        turn_start = time.perf_counter()
+        score = game.play_turn(player)
+        max_turn_seconds = max(max_turn_seconds, time.perf_counter() - turn_start)
+        if record_leaves:
+            if player in pending:
+                leaves.append([pending[player], score or 0])
+            # Drawn tiles are appended to the rack, so the leave is everything in front of them
+            rack = game.players[player]['tiles']
+            if score is None:
+                pending.pop(player, None)
+            else:
+                pending[player] = ''.join(sorted(rack[:len(rack) - (stock_before - len(game.stock))]))
+        if score is None:
+            passes += 1
+        else:
+            moves += 1
+        if game.is_over():
+            break
+        player = game.next_player(player)
+    game.finish_game()
+
+    scores = [data['score'] for data in game.players.values()]
+    result = {
+        'seed': seed,
+        'scores': scores,
+        'winner': scores.index(max(scores)),
+        'moves': moves,
+        'passes': passes,
+        'tiles_left': len(game.stock),
+        'seconds': time.perf_counter() - start,
+        'max_turn_seconds': max_turn_seconds,
+    }
+    if record_leaves:
+        result['leaves'] = leaves
+    if record_history:
+        result['history'] = game.history
+        result['board_size'] = (len(game.board[0]), len(game.board))
+        result['language_descriptor'] = game.language_descriptor
+        result['board_name'] = game.board_name
+    return result
+
+
+def compile_lexicon(lexicon_path: str, compiled_path: str) -> str:
+    """Builds the DAWG for a word list and writes it in the compiled format."""
+    DAWG(lexicon_path).compile(compiled_path)
+    return compiled_path
+
+
+def _init_worker(compiled_path: str):
+    global _dictionary
+    _dictionary = CompiledDAWG(compiled_path)
+
+
+def _simulate(task: tuple) -> dict:
+    index, seed, num_players, board_name, language_descriptor, record_leaves, profile, record_history = task
+    result = simulate_game(_dictionary, seed, num_players, board_name, language_descriptor, record_leaves, profile,
+                           record_history)
+    result['game'] = index
+    return result
+
+
+def run_simulations(compiled_path: str, games: int, processes: int = None, seed: int = 0, num_players: int = 2,
+                    board_name: str = 'Standard', language_descriptor: str = 'en-us', record_leaves: bool = False,
+                    profile: bool = False, record_history: bool = False):
+    """Yields the statistics of `games` games in order; game i is played with seed + i."""
+    tasks = ((index, seed + index, num_players, board_name, language_descriptor, record_leaves, profile,
+              record_history) for index in range(games))
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(compiled_path,)) as pool:
+        yield from pool.imap(_simulate, tasks, chunksize=max(1, games // (4 * (processes or os.cpu_count() or 1))))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Runs headless self-play games in parallel.")
+    parser.add_argument('--lexicon', default='collins2019.txt', help="word list to compile when --compiled does not exist")
+    parser.add_argument('--compiled', help="compiled lexicon to reuse, or to create from --lexicon")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--leaves', action='store_true', help="record rack leaves for building a leave table")
+    parser.add_argument('--profile', action='store_true', help="add a per-turn timing profile to every game")
+    parser.add_argument('--log', help="append every game to this binary game log (see game_log.py)")
+    parser.add_argument('--output', help="write the JSON lines to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    compiled_path = args.compiled
+    temporary = None
+    if compiled_path is None:
+        handle, temporary = tempfile.mkstemp(suffix='.dawg')
+        os.close(handle)
+        compiled_path = compile_lexicon(args.lexicon, temporary)
+    elif not os.path.exists(compiled_path):
+        compile_lexicon(args.lexicon, compiled_path)
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    game_log = GameLog(args.log) if args.log else None
+    start = time.perf_counter()
+    total_score = 0
+    try:
+        for result in run_simulations(compiled_path, args.games, args.processes, args.seed, args.players,
+                                      record_leaves=args.leaves, profile=args.profile, record_history=bool(game_log)):
+            if game_log:
+                width, height = result.pop('board_size')
+                game_log.append_records(result.pop('history'), result['seed'], args.players, width, height,
+                                        result.pop('language_descriptor'), result.pop('board_name'))
+            output.write(json.dumps(result, separators=(',', ':')) + '\n')
+            total_score += sum(result['scores'])
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if game_log:
+            game_log.close()
+        if temporary:
+            os.remove(temporary)
+
+    seconds = time.perf_counter() - start
+    print(f"{args.games} games in {seconds:.1f}s ({60 * args.games / seconds:.0f} games/minute), "
+          f"mean score {total_score / (args.games * args.players):.1f}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
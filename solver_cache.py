@@ -0,0 +1,116 @@
+"""A bounded cache in front of the rack solver.
+
+Answers are keyed by lexicon, pattern and the rack's tiles in sorted order, so racks that
+only differ in tile order share an entry. A DAWG counts its updates in `version`, and an
+answer is only used for the version it was computed on, so `add_word` and `remove_word`
+invalidate the cache without telling it.
+
+With a `path` the answers are also written to an SQLite file. Caches in other processes,
+or after a restart, that open the same file find them there. Only named lexicons are
+written (see `name_lexicon`), and only as they were loaded, before any update: the name
+must change whenever the word list does.
+
+    cache = SolverCache(path='collins2019.solver')
+    cache.name_lexicon(dictionary, 'collins2019')
+    words = find_matching_words("?", rack, dictionary, cache=cache)
+"""
+import sqlite3
+import weakref
+from collections import OrderedDict
+from itertools import count
+
+
+class SolverCache:
+    """Least recently used rack solver answers, bounded by entry count and total words."""
+
+    def __init__(self, max_entries: int = 100000, max_words: int = None, path: str = None):
+        self.max_entries = max_entries
+        self.max_words = max_words
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> frozenset of words, least recently used first
+        self._words = 0
+        self._names = weakref.WeakKeyDictionary()  # lexicon -> name or unique token
+        self._tokens = count()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS answers (lexicon TEXT, pattern TEXT, rack TEXT, words TEXT, "
+                             "PRIMARY KEY (lexicon, pattern, rack))")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def name_lexicon(self, lexicon, name: str):
+        """Names a lexicon, so its answers can be shared through the disk backing."""
+        self._names[lexicon] = name
+
+    def matching_words(self, pattern: str, rack, lexicon) -> frozenset:
+        """Returns the words `lexicon.rack_search(pattern, rack)` finds, from the cache if possible."""
+        name = self._names.get(lexicon)
+        if name is None:
+            # Unnamed lexicons get a token that lives as long as they do, unlike their id
+            name = self._names[lexicon] = next(self._tokens)
+        version = getattr(lexicon, 'version', 0)
+        pattern = pattern.lower()
+        tiles = ''.join(sorted(tile.lower() for tile in rack))
+        key = (name, version, pattern, tiles)
+
+        words = self._entries.get(key)
+        if words is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return words
+
+        shared = self._db is not None and isinstance(name, str) and version == 0
+        if shared:
+            row = self._db.execute("SELECT words FROM answers WHERE lexicon = ? AND pattern = ? AND rack = ?",
+                                   (name, pattern, tiles)).fetchone()
+            if row is not None:
+                words = frozenset(row[0].split()) if row[0] else frozenset()
+                self.disk_hits += 1
+        if words is None:
+            self.misses += 1
+            words = frozenset(lexicon.rack_search(pattern, tiles))
+            if shared:
+                self._db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)",
+                                 (name, pattern, tiles, ' '.join(sorted(words))))
+
+        self._entries[key] = words
+        self._words += len(words)
+        self._evict()
+        return words
+
+    def _evict(self):
+        # The newest entry always stays, even when it alone holds more than max_words
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or
+                                          (self.max_words is not None and self._words > self.max_words)):
+            _, words = self._entries.popitem(last=False)
+            self._words -= len(words)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'words': self._words,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Drops the answers held in memory and resets the statistics; the disk keeps its answers."""
+        self._entries.clear()
+        self._words = 0
+        self.hits = self.misses = self.disk_hits = self.evictions = 0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,163 @@
+import heapq
+import random
+import time
+from collections import Counter, OrderedDict
+from board_state import BoardState
+from leaves import LeaveTable, leave_after
+from move_generator import Move
+
+
+class TranspositionCache:
+    """A bounded mapping that evicts the least recently used entry and counts hits and misses."""
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Returns the cached value and marks it as recently used."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used entry when the cache is full."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops every entry and resets the statistics."""
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+
+class MonteCarloStrategy:
+    """Chooses computer moves by sampling the opponent's reply to the best-scoring candidates.
+
+    The opponent rack is drawn from the unseen tiles (stock plus opponent racks, as far as the
+    player can tell), and each candidate is valued by its score minus the best reply to it.
+    Sampling continues round-robin over the candidates until the time budget is spent. The
+    budget covers generating the candidates too, and the move generator stops at the
+    deadline: the candidates are those found by then, and a reply search cut short is
+    dropped rather than counted. Reply scores are cached by the hash of the board, the
+    opponent rack and the remaining unseen tiles, so repeated samples cost nothing.
+    With a LeaveTable, the value of the tiles each candidate keeps is added to its score.
+    """
+
+    def __init__(self, time_budget: float = 1.0, candidates: int = 8, cache_size: int = 100000,
+                 max_simulations: int = None, seed: int = None, leaves: LeaveTable = None):
+        self.time_budget = time_budget
+        self.leaves = leaves
+        self.candidates = candidates
+        self.max_simulations = max_simulations
+        self.cache = TranspositionCache(cache_size)
+        self.rng = random.Random(seed)
+
+    def choose_move(self, game, player: str) -> Move:
+        """Returns the move with the best sampled value, or None when the player cannot move."""
+        deadline = time.perf_counter() + self.time_budget
+        rack = game.players[player]['tiles']
+        points = game.scorer.board_points(game.board)
+        moves = []
+        scores = []
+        for move in game.move_generator.generate_moves(rack, deadline=deadline):
+            moves.append(move)
+            scores.append(self._value(game, points, rack, move))
+        if not moves and time.perf_counter() >= deadline:
+            # Out of time before the first move was found: searching on for one beats passing
+            move = next(game.move_generator.generate_moves(rack), None)
+            if move is not None:
+                moves, scores = [move], [self._value(game, points, rack, move)]
+        if not moves:
+            return None
+        ranked = heapq.nlargest(self.candidates, range(len(moves)), key=scores.__getitem__)
+        unseen = self.unseen_tiles(game, player)
+        if len(ranked) == 1 or not unseen:
+            return moves[ranked[0]]
+
+        players = list(game.players.keys())
+        me = players.index(player)
+        opponent = players.index(game.next_player(player))
+        generator = game.move_generator.copy()
+        state = BoardState.from_game(game)
+        rack_size = game.scorer.rack_size
+
+        totals = [0] * len(ranked)
+        samples = [0] * len(ranked)
+        simulations = 0
+        slot = 0
+        while time.perf_counter() < deadline and simulations != self.max_simulations:
+            index = ranked[slot]
+            opponent_rack = self.rng.sample(unseen, min(rack_size, len(unseen)))
+            reply = self._best_reply(game, generator, state, points, moves[index], me, opponent, opponent_rack, unseen,
+                                     deadline)
+            if reply is None:
+                break
+            totals[slot] += scores[index] - reply
+            samples[slot] += 1
+            simulations += 1
+            slot = (slot + 1) % len(ranked)
+
+        evaluated = [slot for slot in range(len(ranked)) if samples[slot]]
+        if not evaluated:
+            return moves[ranked[0]]
+        best = max(evaluated, key=lambda slot: totals[slot] / samples[slot])
+        return moves[ranked[best]]
+
+    def _value(self, game, points, rack, move) -> int:
+        score = game.scorer.score_points(points, move)
+        if self.leaves is not None:
+            score += self.leaves.value(leave_after(rack, move))
+        return score
+
+    @staticmethod
+    def unseen_tiles(game, player: str) -> list:
+        """Returns the tiles that are neither on the board nor on the player's rack."""
+        counts = Counter({tile: info['count'] for tile, info in game.tiles.items()})
+        for line in game.board:
+            for cell in line:
+                if cell:
+                    counts[cell] -= 1
+        for tile in game.players[player]['tiles']:
+            counts[tile] -= 1
+        return list(counts.elements())
+
+    def _best_reply(self, game, generator, state, points, move, me, opponent, opponent_rack, unseen, deadline) -> int:
+        # Returns None when the deadline passes before every reply was scored
+        checkpoint = generator.checkpoint()
+        width = game.scorer.width
+        for row, col, letter, is_blank in move.tiles:
+            generator.place(row, col, letter)
+            points[row * width + col] = 0 if is_blank else game.scorer.letter_points.get(letter, 0)
+        state.apply(move, me)
+        state.set_rack(opponent, opponent_rack)
+
+        remaining = Counter(unseen)
+        remaining.subtract(opponent_rack)
+        key = (state.board_hash, state.rack_hashes[opponent], hash(tuple(sorted((+remaining).items()))))
+        reply = self.cache.get(key)
+        if reply is None:
+            best = 0
+            for candidate in generator.generate_moves(opponent_rack, deadline=deadline):
+                best = max(best, game.scorer.score_points(points, candidate))
+            if time.perf_counter() < deadline:
+                reply = best
+                self.cache.put(key, reply)
+
+        state.undo()
+        generator.rollback(checkpoint)
+        for row, col, _, _ in move.tiles:
+            points[row * width + col] = None
+        return reply
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from anagram_index import AnagramIndex
+from dawg import DAWG
+
+WORDS = ["at", "ta", "tea", "eat", "ate", "eta", "teas", "seat", "east", "sate", "etas", "cat", "act", "tact", "a"]
+
+
+class TestAnagramIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = AnagramIndex.from_words(WORDS)
+
+    def test_exact_rack(self):
+        self.assertEqual(self.index.anagrams("TAE"), ["ate", "eat", "eta", "tea"])
+        self.assertEqual(self.index.anagrams(["S", "E", "A", "T"]), ["east", "etas", "sate", "seat", "teas"])
+        self.assertEqual(self.index.anagrams("zzz"), [])
+        self.assertEqual(len(self.index), 6)
+
+    def test_blanks(self):
+        self.assertEqual(self.index.anagrams("t?"), ["at", "ta"])
+        self.assertEqual(self.index.anagrams("?c?"), ["act", "cat"])
+        self.assertEqual(self.index.anagrams("???"), ["act", "ate", "cat", "eat", "eta", "tea"])
+
+    def test_subanagrams(self):
+        self.assertEqual(self.index.subanagrams("TAC"), ["act", "at", "cat", "ta"])
+        self.assertEqual(self.index.subanagrams("TAC", min_length=1), ["a", "act", "at", "cat", "ta"])
+        self.assertEqual(self.index.subanagrams("tc?"), ["act", "at", "cat", "ta"])
+
+    def test_matches_dawg_build(self):
+        dawg = DAWG()
+        for word in sorted(WORDS):
+            dawg.insert(word)
+        dawg.finish()
+        self.assertEqual(AnagramIndex.from_dawg(dawg).subanagrams("??????", min_length=1), sorted(WORDS))
+
+    def test_save_and_load(self):
+        handle, path = tempfile.mkstemp(suffix=".anagrams")
+        os.close(handle)
+        try:
+            self.index.save(path)
+            loaded = AnagramIndex.load(path)
+            try:
+                self.assertEqual(len(loaded), len(self.index))
+                self.assertEqual(loaded.alphabet, self.index.alphabet)
+                self.assertEqual(loaded.anagrams("?tea"), self.index.anagrams("?tea"))
+                self.assertEqual(loaded.subanagrams("cat"), self.index.subanagrams("cat"))
+            finally:
+                loaded.close()
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
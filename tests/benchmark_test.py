@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        handle, self.lexicon = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(handle, 'w') as f:
+            f.write("\n".join(["AT", "ATE", "EAT", "TEA", "TEAS", "SEAT", "QI", "ZA", "AE", "ET"]))
+
+    def tearDown(self):
+        os.remove(self.lexicon)
+
+    def test_run_benchmarks(self):
+        results = benchmark.run_benchmarks(self.lexicon, seed=3, lookups=100, racks=5, turns=2)
+        self.assertEqual(set(results['results']),
+                         {'build', 'search', 'wildcard_search', 'find_matching_words', 'computer_turns'})
+        self.assertGreater(results['results']['build']['peak_bytes'], 0)
+        self.assertEqual(results['results']['search']['lookups'], 100)
+        self.assertEqual(results['results']['computer_turns']['turns'], 2)
+
+    def test_runs_are_reproducible(self):
+        first = benchmark.run_benchmarks(self.lexicon, seed=3, lookups=100, racks=5, turns=2, measure_memory=False)
+        second = benchmark.run_benchmarks(self.lexicon, seed=3, lookups=100, racks=5, turns=2, measure_memory=False)
+        self.assertEqual(first['results']['search']['hits'], second['results']['search']['hits'])
+        self.assertEqual(first['results']['find_matching_words']['matches'],
+                         second['results']['find_matching_words']['matches'])
+        self.assertEqual(first['results']['computer_turns']['scores'], second['results']['computer_turns']['scores'])
+
+    def test_compare(self):
+        baseline = {'results': {'build': {'seconds': 1.0, 'peak_bytes': 100}, 'search': {'seconds': 1.0}}}
+        current = {'results': {'build': {'seconds': 1.1, 'peak_bytes': 200}, 'search': {'seconds': 1.5, 'hits': 3}}}
+        regressions = benchmark.compare(current, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("build.peak_bytes"))
+        self.assertTrue(regressions[1].startswith("search.seconds"))
+
+
+if __name__ == "__main__":
+    unittest.main()
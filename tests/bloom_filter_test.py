@@ -0,0 +1,43 @@
+import os
+import random
+import string
+import tempfile
+import unittest
+from bloom_filter import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.words = {''.join(rng.choice(string.ascii_lowercase) for _ in range(8)) for _ in range(2000)}
+        self.others = {''.join(rng.choice(string.ascii_lowercase) for _ in range(7)) for _ in range(2000)}
+        self.bloom = BloomFilter.from_words(self.words, error_rate=0.01)
+
+    def test_no_false_negatives(self):
+        self.assertTrue(all(word in self.bloom for word in self.words))
+
+    def test_false_positive_rate(self):
+        false_positives = sum(1 for word in self.others if word in self.bloom)
+        self.assertLess(false_positives / len(self.others), 0.03)
+
+    def test_sizing(self):
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        self.assertEqual(bloom.bit_count, 9586)
+        self.assertEqual(bloom.hash_count, 7)
+        with self.assertRaises(ValueError):
+            BloomFilter.for_capacity(1000, 1.5)
+
+    def test_save_and_load(self):
+        handle, path = tempfile.mkstemp(suffix=".bloom")
+        os.close(handle)
+        try:
+            self.bloom.save(path)
+            loaded = BloomFilter.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual((loaded.bit_count, loaded.hash_count, loaded.bits),
+                         (self.bloom.bit_count, self.bloom.hash_count, self.bloom.bits))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from board_state import BoardState
+from dawg import DAWG
+from game_set import GameSet
+from move_generator import ACROSS, DOWN, Move, MoveGenerator
+
+CAT = Move(2, 1, ACROSS, "cat", ((2, 1, "c", False), (2, 2, "a", False), (2, 3, "t", True)))
+TO = Move(2, 3, DOWN, "to", ((3, 3, "o", False),))
+
+
+class TestBoardState(unittest.TestCase):
+    def setUp(self):
+        self.state = BoardState(5, 5, "acot")
+        self.state.set_rack(0, ["C", "A", "?", "O"])
+        self.state.set_rack(1, ["O", "T"])
+
+    def test_apply_and_undo(self):
+        initial = (bytes(self.state.cells), self.state.blanks, self.state.hash, self.state.rack(0))
+        self.state.apply(CAT, 0)
+        self.assertEqual(self.state.letter_at(2, 1), "c")
+        self.assertTrue(self.state.is_blank(2, 3))
+        self.assertFalse(self.state.is_blank(2, 2))
+        self.assertEqual(self.state.rack(0), ["O"])
+        self.assertNotEqual(self.state.hash, initial[2])
+
+        self.state.undo()
+        self.assertEqual((bytes(self.state.cells), self.state.blanks, self.state.hash, self.state.rack(0)), initial)
+
+    def test_hash_does_not_depend_on_move_order(self):
+        other = self.state.copy()
+        self.state.apply(CAT, 0)
+        self.state.apply(TO, 1)
+        other.apply(Move(2, 3, DOWN, "to", ((3, 3, "o", False),)), 1)
+        other.apply(CAT, 0)
+        self.assertEqual(self.state.hash, other.hash)
+        self.assertEqual(self.state.cells, other.cells)
+
+    def test_rack_hash_ignores_tile_order(self):
+        before = self.state.rack_hashes[0]
+        self.state.set_rack(0, ["O", "?", "A", "C"])
+        self.assertEqual(self.state.rack_hashes[0], before)
+
+    def test_copy_is_independent(self):
+        other = self.state.copy()
+        other.apply(CAT, 0)
+        self.assertIsNone(self.state.letter_at(2, 1))
+        self.assertEqual(self.state.rack(0), ["?", "A", "C", "O"])
+
+    def test_from_game(self):
+        dictionary = DAWG()
+        for word in ["at", "cat", "ta"]:
+            dictionary.insert(word)
+        dictionary.finish()
+        game = GameSet(dictionary=dictionary, auto_start=False, seed=1, verbose=False)
+        game.place_tile('C', 7, 6)
+        game.place_tile('?', 7, 7, 'A')
+        state = BoardState.from_game(game)
+        self.assertEqual(state.letter_at(7, 6), "c")
+        self.assertEqual(state.letter_at(7, 7), "a")
+        self.assertTrue(state.is_blank(7, 7))
+        self.assertEqual(sorted(state.rack(0)), sorted(game.players['Player 1']['tiles']))
+
+
+class TestMoveGeneratorRollback(unittest.TestCase):
+    def test_rollback_restores_position(self):
+        dictionary = DAWG()
+        for word in sorted(["at", "ate", "cat", "cats", "eat", "tea", "ta"]):
+            dictionary.insert(word)
+        dictionary.finish()
+        generator = MoveGenerator(dictionary, 7, 7)
+        for col, letter in enumerate("cat", 2):
+            generator.place(3, col, letter)
+
+        snapshot = (generator.copy().__dict__, list(generator.generate_moves(["E", "A", "T", "S"])))
+        checkpoint = generator.checkpoint()
+        generator.place(4, 3, "t")
+        generator.place(5, 3, "e")
+        generator.rollback(checkpoint)
+
+        restored = generator.copy().__dict__
+        for name in ('letters', 'tile_count', 'anchors', 'cross_checks'):
+            self.assertEqual(restored[name], snapshot[0][name])
+        self.assertEqual(list(generator.generate_moves(["E", "A", "T", "S"])), snapshot[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,9 @@
+import os
+import tempfile
 import unittest
-from dawg import DAWG
+from bloom_filter import BloomFilter
+from dawg import DAWG, CompiledDAWG, external_sort
+import findmatchingwords
 
 class TestDAWG(unittest.TestCase):
     def setUp(self):
@@ -29,17 +33,287 @@ class TestDAWG(unittest.TestCase):
 
     def test_wildcard_search(self):
         self.assertCountEqual(self.dawg.wildcard_search("ca*"), ["car", "cat"])
-        self.assertCountEqual(self.dawg.wildcard_search("*og"), ["dog", "dogs"])
+        self.assertCountEqual(self.dawg.wildcard_search("*og"), ["dog"])
+        self.assertCountEqual(self.dawg.wildcard_search("*og*"), ["dog", "dogs"])
         self.assertCountEqual(self.dawg.wildcard_search("ca?"), ["car", "cat"])
         self.assertCountEqual(self.dawg.wildcard_search("do?*"), ["dog", "dogs"])
         self.assertCountEqual(self.dawg.wildcard_search("c*g"), [])
         self.assertCountEqual(self.dawg.wildcard_search("*at*"), ["cat"])
 
+    def test_wildcard_search_is_unique_and_ordered(self):
+        self.assertEqual(self.dawg.wildcard_search("*"), ["car", "cat", "do", "dog", "dogs"])
+        self.assertEqual(self.dawg.wildcard_search("*o*g*"), ["dog", "dogs"])
+
+    def test_wildcard_search_length_limits(self):
+        self.assertEqual(self.dawg.wildcard_search("*", min_length=3), ["car", "cat", "dog", "dogs"])
+        self.assertEqual(self.dawg.wildcard_search("d*", max_length=3), ["do", "dog"])
+        self.assertEqual(self.dawg.wildcard_search("*", min_length=3, max_length=3), ["car", "cat", "dog"])
+
+    def test_iter_wildcard_streams_results(self):
+        results = self.dawg.iter_wildcard("*")
+        self.assertEqual(next(results), "car")
+        self.assertEqual(next(results), "cat")
+
+    def test_wildcard_search_long_pattern(self):
+        self.assertEqual(self.dawg.wildcard_search("*" * 2000 + "s"), ["dogs"])
+
     def test_add_and_search_new_word(self):
         self.dawg.add_word("catalog")
         self.assertTrue(self.dawg.search("catalog"))
         self.assertCountEqual(self.dawg.wildcard_search("ca*"), ["car", "cat", "catalog"])
-        self.assertCountEqual(self.dawg.wildcard_search("*og"), ["dog", "dogs", "catalog"])
+        self.assertCountEqual(self.dawg.wildcard_search("*og"), ["dog", "catalog"])
+        self.assertCountEqual(self.dawg.wildcard_search("*og*"), ["dog", "dogs", "catalog"])
+
+class TestContainsMany(unittest.TestCase):
+    def setUp(self):
+        self.dawg = DAWG()
+        for word in sorted(["car", "cars", "cat", "do", "dog", "dogs"]):
+            self.dawg.insert(word)
+        self.dawg.finish()
+
+    def test_matches_search(self):
+        words = ["dogs", "ca", "cat", "", "cars", "x", "dog", "cart", "do", "cat", "dogsled"]
+        result = self.dawg.contains_many(words)
+        self.assertIsInstance(result, bytearray)
+        self.assertEqual(list(result), [int(self.dawg.search(word)) for word in words])
+
+    def test_prefilter(self):
+        prefilter = BloomFilter.from_dawg(self.dawg)
+        words = ["cat", "cow", "dogs", "zebra"]
+        self.assertEqual(list(self.dawg.contains_many(words, prefilter)), [1, 0, 1, 0])
+
+    def test_compiled(self):
+        handle, path = tempfile.mkstemp(suffix=".dawg")
+        os.close(handle)
+        try:
+            self.dawg.compile(path)
+            compiled = CompiledDAWG(path)
+            self.assertEqual(list(compiled.contains_many(["dog", "dot", "car", "ca"])), [1, 0, 1, 0])
+            compiled.close()
+        finally:
+            os.remove(path)
+
+
+class TestRackSearch(unittest.TestCase):
+    def setUp(self):
+        self.dawg = DAWG()
+        for word in sorted(["a", "at", "ate", "eat", "tea", "teas", "seat", "east", "sate", "quire", "squire"]):
+            self.dawg.insert(word)
+        self.dawg.finish()
+
+    def test_rack_only(self):
+        self.assertCountEqual(self.dawg.rack_search("?", ["t", "e", "a"]), ["a", "at", "ate", "eat", "tea"])
+
+    def test_results_are_unique(self):
+        results = list(self.dawg.rack_search("?", ["e", "a", "t", "s"]))
+        self.assertEqual(len(results), len(set(results)))
+
+    def test_pattern_with_fixed_letters(self):
+        self.assertCountEqual(self.dawg.rack_search("u?re", ["Q", "I", "S"]), ["quire", "squire"])
+        self.assertCountEqual(self.dawg.rack_search("u?re", ["Q", "S"]), [])
+
+    def test_blank(self):
+        self.assertCountEqual(self.dawg.rack_search("e", ["t", "?"]), ["ate", "eat", "tea"])
+        self.assertNotIn("teas", self.dawg.rack_search("e", ["t", "?"]))
+
+    def test_rack_counts_are_respected(self):
+        self.assertCountEqual(self.dawg.rack_search("", ["a", "t"]), ["a", "at"])
+
+
+class TestIncrementalDAWG(unittest.TestCase):
+    def setUp(self):
+        self.words = ["car", "cars", "cat", "cats", "do", "dog", "dogs", "rave", "raves"]
+        self.dawg = self.build(self.words)
+
+    @staticmethod
+    def build(words):
+        dawg = DAWG()
+        for word in sorted(words):
+            dawg.insert(word)
+        dawg.finish()
+        return dawg
+
+    @staticmethod
+    def count_nodes(dawg):
+        seen = {dawg.root}
+        stack = [dawg.root]
+        while stack:
+            for _, child in stack.pop().edges.items():
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return len(seen)
+
+    def assertSameLexicon(self, words):
+        self.assertCountEqual(self.dawg.collect_all_words(self.dawg.root, ""), words)
+        self.assertEqual(self.count_nodes(self.dawg), self.count_nodes(self.build(words)))
+
+    def test_build_is_minimal(self):
+        # Shared suffixes such as "s" and the final states are stored only once
+        self.assertEqual(self.count_nodes(self.dawg), 10)
+
+    def test_remove_word(self):
+        self.dawg.remove_word("dogs")
+        self.assertFalse(self.dawg.search("dogs"))
+        self.assertTrue(self.dawg.search("dog"))
+        self.assertSameLexicon([word for word in self.words if word != "dogs"])
+
+    def test_remove_prefix_word(self):
+        self.dawg.remove_word("do")
+        self.assertFalse(self.dawg.search("do"))
+        self.assertTrue(self.dawg.search("dog"))
+        self.assertSameLexicon([word for word in self.words if word != "do"])
+
+    def test_remove_missing_word(self):
+        self.dawg.remove_word("cattle")
+        self.dawg.remove_word("ca")
+        self.assertSameLexicon(self.words)
+
+    def test_add_word_keeps_graph_minimal(self):
+        self.dawg.add_word("Dogma")
+        self.assertTrue(self.dawg.search("dogma"))
+        self.assertSameLexicon(self.words + ["dogma"])
+
+    def test_add_word_does_not_leak_into_shared_suffixes(self):
+        # "car" and "cat" share their final states with other words
+        self.dawg.add_word("cart")
+        self.assertFalse(self.dawg.search("catt"))
+        self.assertFalse(self.dawg.search("dot"))
+        self.assertSameLexicon(self.words + ["cart"])
+
+    def test_update(self):
+        self.dawg.update(additions=["dot", "dots", "rat"], removals=["car", "cars", "raves", "zebra"])
+        expected = ["cat", "cats", "do", "dog", "dogs", "dot", "dots", "rat", "rave"]
+        self.assertSameLexicon(expected)
+
+    def test_register_drops_replaced_nodes(self):
+        words = list(self.words)
+        for round in range(30):
+            word = "do" + "g" * (round % 5) + "s" * (round % 3)
+            if word in words:
+                self.dawg.remove_word(word)
+                words.remove(word)
+            else:
+                self.dawg.add_word(word)
+                words.append(word)
+            self.assertLessEqual(len(self.dawg.minimized_nodes), 2 * max(self.count_nodes(self.dawg), 10))
+        self.assertSameLexicon(words)
+        self.dawg._prune_register()
+        self.assertEqual(len(self.dawg.minimized_nodes), self.count_nodes(self.dawg) - 1)
+
+    def test_update_rejects_conflicts(self):
+        with self.assertRaises(ValueError):
+            self.dawg.update(additions=["dot"], removals=["dot"])
+
+    def test_insert_after_update_is_rejected(self):
+        # Inserting into a finished graph would overwrite edges of shared nodes
+        self.dawg.update(additions=["dot"])
+        for word in ("zebra", "cab", "dots"):
+            with self.assertRaises(ValueError):
+                self.dawg.insert(word)
+        self.assertSameLexicon(self.words + ["dot"])
+        self.dawg.add_word("dots")
+        self.assertSameLexicon(self.words + ["dot", "dots"])
+
+    def test_insert_after_finish_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.dawg.insert("zebra")
+        self.assertSameLexicon(self.words)
+
+
+class TestCompiledDAWG(unittest.TestCase):
+    def setUp(self):
+        dawg = DAWG()
+        for word in sorted(["car", "cat", "dog", "dogs", "do", "rave"]):
+            dawg.insert(word)
+        dawg.finish()
+
+        handle, self.path = tempfile.mkstemp(suffix=".dawg")
+        os.close(handle)
+        dawg.compile(self.path)
+        self.compiled = CompiledDAWG(self.path)
+
+    def tearDown(self):
+        self.compiled.close()
+        os.remove(self.path)
+
+    def test_search(self):
+        for word in ["car", "cat", "dog", "dogs", "do", "rave"]:
+            self.assertTrue(self.compiled.search(word))
+        for word in ["", "ca", "cats", "dot", "xyz"]:
+            self.assertFalse(self.compiled.search(word))
+
+    def test_wildcard_search(self):
+        self.assertCountEqual(set(self.compiled.wildcard_search("ca?")), ["car", "cat"])
+        self.assertCountEqual(set(self.compiled.wildcard_search("do*")), ["do", "dog", "dogs"])
+
+    def test_collect_all_words(self):
+        self.assertEqual(sorted(self.compiled.collect_all_words(self.compiled.root, "")),
+                         ["car", "cat", "do", "dog", "dogs", "rave"])
+
+    def test_find_matching_words(self):
+        words = findmatchingwords.find_matching_words("?", ["r", "a", "v", "e"], self.compiled)
+        self.assertEqual(words, {"rave"})
+
+    def test_rejects_other_files(self):
+        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as file:
+            file.write(b"AA\nAAH\n" * 4)
+        try:
+            with self.assertRaises(ValueError):
+                CompiledDAWG(file.name)
+        finally:
+            os.remove(file.name)
+
+
+class TestStreamingBuild(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".txt")
+        os.close(handle)
+        self.words = ["raves", "Cat", "dog", "cars", "", "do", "rave", "cats", "dogs", "car", "cat"]
+        with open(self.path, 'w') as file:
+            file.write("\n".join(self.words) + "\n")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_external_sort(self):
+        items = ["d", "b", "a", "c", "b", "e", "a"]
+        self.assertEqual(list(external_sort(items, chunk_size=2)), ["a", "b", "c", "d", "e"])
+        self.assertEqual(list(external_sort(items)), ["a", "b", "c", "d", "e"])
+        self.assertEqual(list(external_sort([], chunk_size=2)), [])
+
+    def test_unsorted_file_in_small_runs(self):
+        dawg = DAWG()
+        dawg.build_from_file(self.path, chunk_size=3)
+        expected = sorted({word.lower() for word in self.words if word})
+        self.assertEqual(dawg.collect_all_words(dawg.root, ""), expected)
+        self.assertEqual(dawg.stats(), {'nodes': 10, 'edges': 12, 'words': len(expected)})
+
+    def test_presorted_file(self):
+        with open(self.path, 'w') as file:
+            file.write("car\ncars\ncars\ncat\n")
+        dawg = DAWG()
+        dawg.build_from_file(self.path, presorted=True)
+        self.assertEqual(dawg.collect_all_words(dawg.root, ""), ["car", "cars", "cat"])
+
+        with open(self.path, 'w') as file:
+            file.write("cat\ncar\n")
+        with self.assertRaises(ValueError):
+            DAWG().build_from_file(self.path, presorted=True)
+
+    def test_compiled_stats(self):
+        dawg = DAWG(self.path)
+        handle, compiled_path = tempfile.mkstemp(suffix=".dawg")
+        os.close(handle)
+        try:
+            dawg.compile(compiled_path)
+            compiled = CompiledDAWG(compiled_path)
+            self.assertEqual(compiled.stats(), dawg.stats())
+            self.assertEqual(compiled.stats()['nodes'], compiled.node_count)
+            compiled.close()
+        finally:
+            os.remove(compiled_path)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,163 @@
+import copy
+import time
+import unittest
+from dawg import DAWG
+from endgame import EndgameSolver
+from game_set import GameSet
+
+WORDS = ["at", "ate", "cat", "eat", "eta", "tae", "tea", "ta", "te", "ax", "ex", "xi", "za", "zea", "qi", "it",
+         "ti", "tit", "tie", "tix"]
+
+
+def rack_points(game, player):
+    return sum(game.tiles[tile]['points'] for tile in game.players[player]['tiles'])
+
+
+def fork(game):
+    # The lexicon, tile set, scorer and random generator (the stock is empty) are shared, the
+    # position is copied and the history left behind
+    shared = (game.dictionary, game.tiles, game.special_cells, game.scorer, game.rng)
+    memo = {id(value): value for value in shared}
+    memo[id(game.move_generator)] = game.move_generator.copy()
+    memo[id(game.history)] = []
+    return copy.deepcopy(game, memo)
+
+
+def margin(game, player):
+    return game.players[player]['score'] - game.players[game.next_player(player)]['score']
+
+
+def reference_value(game, player, memo=None):
+    # Plays out every line through the GameSet itself, without pruning
+    memo = {} if memo is None else memo
+    key = (tuple(map(tuple, game.board)), player, game.consecutive_passes,
+           tuple(tuple(sorted(data['tiles'])) for data in game.players.values()))
+    if key not in memo:
+        moves = [None] + list(game.move_generator.generate_moves(game.players[player]['tiles']))
+        memo[key] = max(line_value(game, player, move, memo) for move in moves)
+    return memo[key]
+
+
+def line_value(game, player, move, memo=None):
+    # What the player gains over the opponent by playing the move (None passes), the GameSet
+    # deciding when the game ends and what the racks cost
+    after = fork(game)
+    score = after.play_move(player, move) if move is not None else None
+    after.finish_turn(player, score)
+    if after.is_over():
+        after.finish_game()
+        return margin(after, player) - margin(game, player)
+    return (score or 0) - reference_value(after, after.next_player(player), memo)
+
+
+class TestEndgameSolver(unittest.TestCase):
+    def setUp(self):
+        dictionary = DAWG()
+        for word in sorted(WORDS):
+            dictionary.insert(word)
+        dictionary.finish()
+        self.game = GameSet(dictionary=dictionary, auto_start=False, seed=5, verbose=False)
+        self.player, self.opponent = list(self.game.players)
+        self.game.players[self.player]['tiles'] = ["C", "A", "T"]
+        self.game.play_move(self.player, next(self.game.move_generator.generate_moves(["C", "A", "T"])))
+        self.game.stock = []
+
+    def set_racks(self, mine, theirs):
+        self.game.players[self.player]['tiles'] = list(mine)
+        self.game.players[self.opponent]['tiles'] = list(theirs)
+
+    def test_solves_to_the_end(self):
+        for mine, theirs in (("XIE", "TAZ"), ("QIT", "EX"), ("TI", "AEZ")):
+            with self.subTest(mine=mine, theirs=theirs):
+                self.set_racks(mine, theirs)
+                solver = EndgameSolver(time_budget=30)
+                move = solver.choose_move(self.game, self.player)
+                self.assertTrue(solver.solved)
+                expected = reference_value(self.game, self.player)
+                self.assertEqual(solver.value, expected)
+                # The chosen move reaches the solved value
+                self.assertEqual(line_value(self.game, self.player, move), expected)
+
+    def test_passes_end_the_game_where_the_game_set_does(self):
+        # Passing is all the player can do, and one pass in the game so far does not end it
+        self.set_racks("QQ", "TAZ")
+        self.game.consecutive_passes = 1
+        solver = EndgameSolver(time_budget=30)
+        self.assertIsNone(solver.choose_move(self.game, self.player))
+        self.assertTrue(solver.solved)
+        promised = solver.value
+        self.assertEqual(promised, reference_value(self.game, self.player))
+
+        # Both players following the solver get exactly the value it promised
+        before = margin(self.game, self.player)
+        self.game.strategy = solver
+        for data in self.game.players.values():
+            data['is_computer'] = True
+        self.game.current_player = self.opponent
+        self.game.play_game()
+        self.assertEqual(margin(self.game, self.player) - before, promised)
+
+    def test_no_one_can_move(self):
+        # The game only ends once both players passed twice, as GameSet.is_over has it
+        self.set_racks("QQ", "VV")
+        solver = EndgameSolver(time_budget=30)
+        self.assertIsNone(solver.choose_move(self.game, self.player))
+        self.assertEqual(solver.value, rack_points(self.game, self.opponent) - rack_points(self.game, self.player))
+        self.assertEqual(solver.depth, self.game.pass_limit)
+
+    def test_transposition_table_is_reused(self):
+        self.set_racks("XIE", "TAZ")
+        solver = EndgameSolver(time_budget=30)
+        solver.choose_move(self.game, self.player)
+        first = solver.nodes
+        value = solver.value
+        solver.choose_move(self.game, self.player)
+        self.assertLess(solver.nodes, first)
+        self.assertEqual(solver.value, value)
+
+    def test_depth_limit(self):
+        self.set_racks("XIE", "TAZ")
+        solver = EndgameSolver(max_depth=1)
+        move = solver.choose_move(self.game, self.player)
+        moves = list(self.game.move_generator.generate_moves(["X", "I", "E"]))
+        scores = self.game.scorer.score_moves(self.game.board, moves)
+        self.assertEqual(self.game.scorer.score_move(self.game.board, move), max(scores))
+        self.assertEqual(solver.depth, 1)
+
+    def test_time_budget(self):
+        self.set_racks("XIETAT", "TAZEIT")
+        solver = EndgameSolver(time_budget=0.05)
+        start = time.perf_counter()
+        solver.choose_move(self.game, self.player)
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertGreaterEqual(solver.depth, 1)
+
+    def test_no_moves_passes(self):
+        self.set_racks("QQ", "TAZ")
+        self.assertIsNone(EndgameSolver().choose_move(self.game, self.player))
+
+    def test_greedy_while_tiles_remain(self):
+        self.set_racks("XIE", "TAZ")
+        self.game.stock = ["E"]
+
+        class Fallback:
+            def choose_move(self, game, player):
+                return "fallback"
+
+        self.assertEqual(EndgameSolver(fallback=Fallback()).choose_move(self.game, self.player), "fallback")
+        move = EndgameSolver().choose_move(self.game, self.player)
+        self.assertEqual(self.game.scorer.score_move(self.game.board, move),
+                         max(self.game.scorer.score_moves(self.game.board, self.game.move_generator.generate_moves(["X", "I", "E"]))))
+
+    def test_plays_a_game_to_the_end(self):
+        self.set_racks("XIE", "TAZ")
+        self.game.strategy = EndgameSolver(time_budget=5)
+        for data in self.game.players.values():
+            data['is_computer'] = True
+        self.game.current_player = self.opponent
+        scores = self.game.play_game()
+        self.assertEqual(len(scores), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from dawg import DAWG
+import findmatchingwords
+
+LETTER_POINTS = {'a': 1, 'e': 1, 's': 1, 't': 1, 'q': 10, 'u': 1, 'i': 1, 'r': 1}
+
+
+class TestMatchingWords(unittest.TestCase):
+    def setUp(self):
+        self.dawg = DAWG()
+        for word in sorted(["a", "at", "ate", "eat", "tea", "teas", "seat", "east", "sate", "quire", "squire", "qi"]):
+            self.dawg.insert(word)
+        self.dawg.finish()
+
+    def test_iter_matches_find(self):
+        rack = ["t", "e", "a", "s"]
+        self.assertEqual(set(findmatchingwords.iter_matching_words("", rack, self.dawg)),
+                         findmatchingwords.find_matching_words("", rack, self.dawg))
+
+    def test_limit_stops_early(self):
+        rack = ["t", "e", "a", "s"]
+        words = list(findmatchingwords.iter_matching_words("", rack, self.dawg, limit=2))
+        self.assertEqual(len(words), 2)
+        self.assertTrue(set(words) <= findmatchingwords.find_matching_words("", rack, self.dawg))
+
+    def test_top_k_by_points(self):
+        rack = ["q", "u", "i", "r", "e", "s", "t", "a"]
+        top = findmatchingwords.top_matching_words("", rack, self.dawg, 3, LETTER_POINTS)
+        self.assertEqual(top, [("squire", 15), ("quire", 14), ("qi", 11)])
+
+    def test_blanks_score_nothing(self):
+        top = findmatchingwords.top_matching_words("", ["?", "i"], self.dawg, 1, LETTER_POINTS)
+        self.assertEqual(top, [("qi", 1)])
+
+    def test_board_letters_score(self):
+        top = findmatchingwords.top_matching_words("q", ["i"], self.dawg, 5, LETTER_POINTS)
+        self.assertEqual(top, [("qi", 11)])
+
+    def test_query_words(self):
+        self.assertEqual(findmatchingwords.find_query_words("*[aeiou]t", ["a", "e", "s"], self.dawg), {"at", "eat", "seat"})
+        self.assertEqual(findmatchingwords.find_query_words("*", ["t", "e", "a"], self.dawg),
+                         findmatchingwords.find_matching_words("", ["t", "e", "a"], self.dawg))
+
+    def test_load_letter_points(self):
+        points = findmatchingwords.load_letter_points()
+        self.assertEqual((points['q'], points['e']), (10, 1))
+        self.assertNotIn('?', points)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,13 @@
+"""A small lexicon that full games can be played on quickly, shared by the test modules."""
+from dawg import DAWG
+
+WORDS = ["aa", "ab", "ad", "ae", "ai", "an", "ar", "as", "at", "ate", "be", "de", "do", "ea", "eat", "ed", "en",
+         "er", "es", "et", "id", "in", "is", "it", "na", "ne", "no", "on", "or", "os", "re", "so", "ta", "tea",
+         "ti", "to", "eats", "rate", "tear", "tone", "note", "stone", "notes", "tones", "dine", "nose"]
+
+
+def build_dawg(words=WORDS) -> DAWG:
+    """Returns a finished DAWG holding the words, in any order."""
+    dawg = DAWG()
+    dawg.build_from_words(sorted(words))
+    return dawg
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from gaddag import GADDAG
+
+WORDS = ["care", "cared", "scare", "scared", "race", "acre", "ace", "aced"]
+
+
+class TestGADDAG(unittest.TestCase):
+    def setUp(self):
+        self.gaddag = GADDAG()
+        self.gaddag.build_from_words(WORDS)
+
+    def test_build_in_small_sort_runs(self):
+        gaddag = GADDAG()
+        gaddag.build_from_words(WORDS, chunk_size=5)
+        self.assertEqual(gaddag.graph.stats(), self.gaddag.graph.stats())
+
+    def test_search(self):
+        for word in WORDS:
+            self.assertTrue(self.gaddag.search(word))
+        for word in ["", "car", "scar", "acres", "dace"]:
+            self.assertFalse(self.gaddag.search(word))
+
+    def test_words_through_fragment(self):
+        self.assertCountEqual(self.gaddag.words_through("CAR"),
+                              [("care", 0), ("cared", 0), ("scare", 1), ("scared", 1)])
+        self.assertCountEqual(self.gaddag.words_through("ce"),
+                              [("race", 2), ("ace", 1), ("aced", 1)])
+
+    def test_words_through_with_rack(self):
+        self.assertCountEqual(self.gaddag.words_through("car", rack=["E", "S"]), [("care", 0), ("scare", 1)])
+        self.assertCountEqual(self.gaddag.words_through("car", rack=["?", "E"]),
+                              [("care", 0), ("cared", 0), ("scare", 1)])
+        self.assertCountEqual(self.gaddag.words_through("c", rack=["A"]), [])
+
+    def test_words_through_with_limits(self):
+        self.assertCountEqual(self.gaddag.words_through("car", max_left=0), [("care", 0), ("cared", 0)])
+        self.assertCountEqual(self.gaddag.words_through("car", max_right=1), [("care", 0), ("scare", 1)])
+
+    def test_save_and_load(self):
+        handle, path = tempfile.mkstemp(suffix=".gaddag")
+        os.close(handle)
+        try:
+            self.gaddag.save(path)
+            loaded = GADDAG.load(path)
+            self.assertTrue(loaded.search("scared"))
+            self.assertCountEqual(loaded.words_through("ace"), self.gaddag.words_through("ace"))
+            loaded.graph.close()
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from fixtures import build_dawg
+from game_log import DRAW, END, MOVE, GameLog, GameLogReader
+from game_set import GameSet
+import simulation
+
+
+def play(dictionary, seed):
+    game = GameSet(dictionary=dictionary, auto_start=False, seed=seed, computer_players=2, verbose=False)
+    game.play_game()
+    return game
+
+
+class TestGameLog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dictionary = build_dawg()
+        cls.games = [play(cls.dictionary, seed) for seed in (3, 4, 5)]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.log")
+        with GameLog(self.path) as log:
+            for game in self.games:
+                log.append(game)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_records_round_trip(self):
+        with GameLogReader(self.path) as reader:
+            self.assertEqual(len(reader), 3)
+            for index, game in enumerate(self.games):
+                info = reader.game(index)
+                self.assertEqual((info.seed, info.num_players, info.width, info.height), (game.seed, 2, 15, 15))
+                self.assertEqual((info.language_descriptor, info.board_name), ('en-us', 'Standard'))
+                self.assertEqual(list(reader.records(index)), game.history)
+                self.assertEqual(reader.record(index, info.records - 1), game.history[-1])
+
+    def test_replay(self):
+        game = self.games[1]
+        with GameLogReader(self.path) as reader:
+            board, racks, scores = reader.replay(1)
+            self.assertEqual(board, game.board)
+            self.assertEqual([sorted(rack) for rack in racks], [sorted(data['tiles']) for data in game.players.values()])
+            self.assertEqual(scores, [data['score'] for data in game.players.values()])
+
+            # Partway through, the racks hold seven tiles while the stock lasts
+            first_move = next(number for number, record in enumerate(game.history) if record.kind == MOVE)
+            board, racks, _ = reader.replay(1, first_move)
+            self.assertFalse(any(any(line) for line in board))
+            self.assertEqual([len(rack) for rack in racks], [7, 7])
+
+    def test_moves_have_words(self):
+        with GameLogReader(self.path) as reader:
+            for _, move, score in reader.moves(0):
+                self.assertTrue(self.dictionary.search(move.word))
+                self.assertGreater(score, 0)
+
+    def test_game_record_kinds(self):
+        history = self.games[0].history
+        self.assertEqual([record.kind for record in history[:2]], [DRAW, DRAW])
+        self.assertEqual([record.kind for record in history[-2:]], [END, END])
+
+    def test_appending_to_an_existing_log(self):
+        with GameLog(self.path) as log:
+            self.assertEqual(log.append(self.games[0]), 3)
+        with GameLogReader(self.path) as reader:
+            self.assertEqual(len(reader), 4)
+            self.assertEqual(list(reader.records(3)), self.games[0].history)
+
+    def test_unfinished_game_is_dropped(self):
+        with open(self.path, 'ab') as file:
+            file.write(b'\1' * 100)
+        with open(self.path + '.idx', 'ab') as file:
+            file.write(b'\1' * 10)
+        with GameLog(self.path) as log:
+            log.append(self.games[2])
+        with GameLogReader(self.path) as reader:
+            self.assertEqual(len(reader), 4)
+            self.assertEqual(list(reader.records(3)), self.games[2].history)
+
+    def test_rejects_other_files(self):
+        other = os.path.join(self.directory.name, "other")
+        with open(other, 'wb') as file:
+            file.write(b'not a game log')
+        with self.assertRaises(ValueError):
+            GameLog(other)
+
+    def test_leave_samples_match_simulation(self):
+        result = simulation.simulate_game(self.dictionary, seed=7, record_leaves=True, record_history=True)
+        with GameLog(self.path) as log:
+            index = log.append_records(result['history'], 7)
+        self.assertEqual((result['language_descriptor'], result['board_name']), ('en-us', 'Standard'))
+        with GameLogReader(self.path) as reader:
+            self.assertEqual(list(reader.leave_samples(index)), result['leaves'])
+
+
+if __name__ == "__main__":
+    unittest.main()
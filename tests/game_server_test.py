@@ -0,0 +1,165 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from dawg import CompiledDAWG
+from fixtures import build_dawg
+from game_log import PASS
+from game_server import GameClient, GameServer, MoveBatcher
+from lexicon_registry import LexiconRegistry
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dictionary = build_dawg()
+
+    async def asyncSetUp(self):
+        self.server = GameServer(self.dictionary)
+        self.listener = await self.server.start()
+        self.client = await GameClient.connect(*self.listener.sockets[0].getsockname()[:2])
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.listener.close()
+        await self.listener.wait_closed()
+        self.server.close()
+
+    async def test_computer_game_runs_to_the_end(self):
+        response = await self.client.request('new_game', computer_players=2, seed=4)
+        self.assertTrue(response['ok'])
+        self.assertEqual(response['id'], 1)
+        self.assertTrue(response['state']['over'])
+        self.assertTrue(any(cell for line in response['state']['board'] for cell in line))
+
+    async def test_human_move(self):
+        response = await self.client.request('new_game', computer_players=1, seed=2)
+        game_id = response['game']
+        human = next(name for name, data in response['state']['players'].items() if not data['is_computer'])
+        self.assertEqual(response['state']['current_player'], human)
+
+        game = self.server.games[game_id]
+        move = max(game.move_generator.generate_moves(game.players[human]['tiles']), key=lambda move: len(move.word))
+        response = await self.client.request('move', game=game_id, player=human, row=move.row, col=move.col,
+                                             direction=move.direction, word=move.word.upper())
+        self.assertTrue(response['ok'], response.get('error'))
+        self.assertGreater(response['score'], 0)
+        # The computer has replied and it is the human's turn again
+        state = response['state']
+        self.assertEqual(state['current_player'], human)
+        self.assertEqual(state['players'][human]['score'], response['score'])
+        self.assertEqual(len(state['rack']), 7)
+
+    async def test_rejected_requests(self):
+        response = await self.client.request('new_game', computer_players=0, seed=2)
+        game_id = response['game']
+        player = response['state']['current_player']
+        other = next(name for name in response['state']['players'] if name != player)
+
+        response = await self.client.request('move', game=game_id, player=player, row=0, col=0, direction='across', word='zzz')
+        self.assertFalse(response['ok'])
+        self.assertIn("not a legal move", response['error'])
+        response = await self.client.request('pass', game=game_id, player=other)
+        self.assertFalse(response['ok'])
+        response = await self.client.request('state', game=999)
+        self.assertFalse(response['ok'])
+        response = await self.client.request('launch')
+        self.assertFalse(response['ok'])
+
+        response = await self.client.request('move', game=game_id, player=player, row=0, col=0, direction='across', word=5)
+        self.assertFalse(response['ok'])
+        self.assertIn("'word'", response['error'])
+
+        response = await self.client.request('pass', game=game_id, player=player)
+        self.assertEqual(response['state']['current_player'], other)
+        self.assertEqual(self.server.games[game_id].history[-1].kind, PASS)
+
+    async def test_unknown_player_leaves_no_game(self):
+        response = await self.client.request('new_game', computer_players=0, seed=2, player='nobody')
+        self.assertFalse(response['ok'])
+        self.assertEqual(self.server.games, {})
+
+    async def test_worker_errors_become_responses(self):
+        async def failing(game, player):
+            raise RuntimeError("worker crashed")
+
+        self.server.batcher.choose = failing
+        response = await self.client.request('new_game', computer_players=2, seed=4)
+        self.assertEqual((response['ok'], response['error']), (False, "worker crashed"))
+        self.assertEqual(self.server.games, {})
+        # The connection is still open
+        self.assertTrue((await self.client.request('new_game', computer_players=0, seed=1))['ok'])
+
+    async def test_concurrent_games_share_batches(self):
+        self.server.batcher.delay = 0.05
+        clients = [await GameClient.connect(*self.listener.sockets[0].getsockname()[:2]) for _ in range(3)]
+        try:
+            responses = await asyncio.gather(*(client.request('new_game', computer_players=2, seed=seed)
+                                               for seed, client in enumerate(clients)))
+        finally:
+            for client in clients:
+                await client.close()
+        self.assertTrue(all(response['state']['over'] for response in responses))
+        self.assertLess(self.server.batcher.batches, self.server.batcher.requests)
+
+    async def test_slow_search_does_not_hold_up_its_batch(self):
+        release = threading.Event()
+        games = []
+        for seed in (1, 2):
+            response = await self.server.handle({'command': 'new_game', 'computer_players': 0, 'seed': seed})
+            games.append(self.server.games[response['game']])
+        slow_search = games[0].choose_computer_move
+        games[0].choose_computer_move = lambda player: release.wait(5) and slow_search(player)
+
+        batcher = MoveBatcher(ThreadPoolExecutor(2), max_batch=2)
+        try:
+            slow = asyncio.ensure_future(batcher.choose(games[0], games[0].current_player))
+            fast = batcher.choose(games[1], games[1].current_player)
+            self.assertIsNotNone(await asyncio.wait_for(fast, 2))
+            self.assertFalse(slow.done())
+            release.set()
+            self.assertIsNotNone(await slow)
+            self.assertEqual((batcher.batches, batcher.requests), (1, 2))
+        finally:
+            release.set()
+            batcher.executor.shutdown()
+
+    async def test_compiled_lexicon_is_searched_in_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "words.dawg")
+            self.dictionary.compile(path)
+            server = GameServer(CompiledDAWG(path), processes=2)
+            try:
+                response = await server.handle({'command': 'new_game', 'computer_players': 2, 'seed': 4})
+                self.assertTrue(response['ok'], response.get('error'))
+                self.assertTrue(server.processes._processes)
+            finally:
+                server.close()
+        # The processes play the moves the server would play itself
+        expected = await self.server.handle({'command': 'new_game', 'computer_players': 2, 'seed': 4})
+        self.assertEqual(response['state'], expected['state'])
+
+    async def test_lexicon_from_registry(self):
+        registry = LexiconRegistry()
+        registry.register("small", loader=lambda: self.dictionary, languages=["en-us"])
+        server = GameServer(registry)
+        try:
+            response = await server.handle({'command': 'new_game', 'computer_players': 2, 'seed': 4})
+            self.assertTrue(response['ok'])
+            self.assertTrue(registry.is_loaded("small"))
+            response = await server.handle({'command': 'new_game', 'language_descriptor': 'fr'})
+            self.assertFalse(response['ok'])
+        finally:
+            server.close()
+
+    async def test_close_game(self):
+        response = await self.client.request('new_game', computer_players=0, seed=1)
+        game_id = response['game']
+        self.assertTrue((await self.client.request('close_game', game=game_id))['ok'])
+        self.assertNotIn(game_id, self.server.games)
+
+
+if __name__ == "__main__":
+    unittest.main()
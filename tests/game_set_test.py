@@ -3,23 +3,22 @@ from unittest.mock import patch
 import json
 import random
 from dawg import DAWG
-import findmatchingwords
 from game_set import GameSet
 
 class TestGameSet(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Building Collins takes seconds, so the tests share one dictionary
+        cls.word_dictionary = DAWG("collins2019.txt")
 
-    @patch('findmatchingwords.find_matching_words')
-    def test_computer_move_with_blank_tile(self, mock_find_matching_words):
-        # Create a fake dictionary and mock matching words
-        mock_find_matching_words.return_value = {'rave'}
+    @patch.object(GameSet, 'start_game')
+    def test_computer_move_with_blank_tile(self, mock_start_game):
+        word_dictionary = self.word_dictionary
 
-        # Create a simple dictionary (DAWG)
-        dictionary_path = "collins2019.txt"
-        word_dictionary = DAWG(dictionary_path)
-
-        # Initialize game set with a mock dictionary and fixed tiles
+        # Only QI can be played, with the blank standing for the I
         game = GameSet(dictionary=word_dictionary, board_name='Standard', language_descriptor='en-us', num_players=2)
-        game.players['Player 1']['tiles'] = ['R', 'A', '?', 'E', 'B', 'C', 'D']
+        game.stock = []
+        game.players['Player 1']['tiles'] = ['Q', 'Q', '?', 'Q', 'Q', 'Q', 'Q']
         game.players['Player 1']['is_computer'] = True
 
         # Perform the computer move
@@ -28,19 +27,19 @@ class TestGameSet(unittest.TestCase):
         # Check the state of the board and the player's rack
         center_row = len(game.board) // 2
         center_col = len(game.board[0]) // 2
-        self.assertEqual(game.board[center_row][center_col:center_col+4], ['R', 'A', '?', 'E'])
-        self.assertNotIn('R', game.players['Player 1']['tiles'])
-        self.assertNotIn('A', game.players['Player 1']['tiles'])
-        self.assertNotIn('E', game.players['Player 1']['tiles'])
+        across = game.board[center_row][center_col - 1:center_col + 2]
+        down = [game.board[row][center_col] for row in range(center_row - 1, center_row + 2)]
+        self.assertTrue(['Q', '?'] in (across[:2], across[1:], down[:2], down[1:]))
+        self.assertEqual(game.players['Player 1']['tiles'], ['Q', 'Q', 'Q', 'Q', 'Q'])
 
-    @patch('builtins.input', side_effect=['RA?E'])
-    def test_human_move_with_blank_tile(self, mock_input):
-        # Create a simple dictionary (DAWG)
-        dictionary_path = "collins2019.txt"
-        word_dictionary = DAWG(dictionary_path)
+    @patch.object(GameSet, 'start_game')
+    @patch('builtins.input', side_effect=['RA?E', 'T'])
+    def test_human_move_with_blank_tile(self, mock_input, mock_start_game):
+        word_dictionary = self.word_dictionary
 
         # Initialize game set with a mock dictionary and fixed tiles
         game = GameSet(dictionary=word_dictionary, board_name='Standard', language_descriptor='en-us', num_players=2)
+        game.stock = []
         game.players['Player 1']['tiles'] = ['R', 'A', '?', 'E', 'B', 'C', 'D']
 
         # Perform the human move
@@ -53,6 +52,61 @@ class TestGameSet(unittest.TestCase):
         self.assertNotIn('R', game.players['Player 1']['tiles'])
         self.assertNotIn('A', game.players['Player 1']['tiles'])
         self.assertNotIn('E', game.players['Player 1']['tiles'])
+        # The move generator knows which letter the blank stands for
+        self.assertEqual(game.move_generator.letters[center_row][center_col + 2], 't')
+
+    @patch.object(GameSet, 'start_game')
+    @patch('builtins.input', side_effect=['RATE'])
+    def test_human_move_uses_blank_for_missing_letter(self, mock_input, mock_start_game):
+        game = GameSet(dictionary=self.word_dictionary, board_name='Standard', language_descriptor='en-us', num_players=2)
+        game.stock = []
+        game.players['Player 1']['tiles'] = ['R', 'A', '?', 'E', 'B', 'C', 'D']
+
+        game.human_move('Player 1')
+
+        center_row = len(game.board) // 2
+        center_col = len(game.board[0]) // 2
+        self.assertEqual(game.board[center_row][center_col:center_col+4], ['R', 'A', '?', 'E'])
+        self.assertEqual(game.move_generator.letters[center_row][center_col + 2], 't')
+        self.assertEqual(game.players['Player 1']['tiles'], ['B', 'C', 'D'])
+
+    @patch.object(GameSet, 'start_game')
+    @patch('builtins.input', side_effect=['RA?E', '', 'AB', '1', '?', 'Q', 'RA?E', 'C'])
+    def test_human_move_rejects_bad_blank_letters_and_words(self, mock_input, mock_start_game):
+        # The blank letter is asked again until it is a single letter, and RAQE is no word
+        game = GameSet(dictionary=self.word_dictionary, board_name='Standard', language_descriptor='en-us', num_players=2)
+        game.stock = []
+        game.players['Player 1']['tiles'] = ['R', 'A', '?', 'E', 'B', 'C', 'D']
+
+        game.human_move('Player 1')
+
+        center_row = len(game.board) // 2
+        center_col = len(game.board[0]) // 2
+        self.assertEqual(mock_input.call_count, 8)
+        self.assertEqual(game.board[center_row][center_col:center_col+4], ['R', 'A', '?', 'E'])
+        self.assertEqual(game.move_generator.letters[center_row][center_col:center_col+4], ['r', 'a', 'c', 'e'])
+        self.assertEqual(game.players['Player 1']['tiles'], ['B', 'C', 'D'])
+
+    def test_seeded_games_are_reproducible(self):
+        games = [GameSet(dictionary=self.word_dictionary, auto_start=False, seed=11, verbose=False) for _ in range(2)]
+        self.assertEqual(games[0].stock, games[1].stock)
+        self.assertEqual(games[0].players, games[1].players)
+
+    def test_headless_game_with_computer_players(self):
+        game = GameSet(dictionary=self.word_dictionary, auto_start=False, seed=3, computer_players=2, verbose=False)
+        self.assertTrue(all(data['is_computer'] for data in game.players.values()))
+
+        with patch('builtins.print') as mock_print:
+            scores = game.play_game()
+        mock_print.assert_not_called()
+        self.assertTrue(game.is_over())
+        self.assertEqual(set(scores), {'Player 1', 'Player 2'})
+        self.assertGreater(sum(1 for line in game.board for cell in line if cell), 0)
+
+    def test_invalid_number_of_computer_players(self):
+        with self.assertRaises(ValueError):
+            GameSet(dictionary=self.word_dictionary, auto_start=False, computer_players=3)
+
 
 if __name__ == "__main__":
     unittest.main()
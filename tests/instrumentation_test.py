@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import unittest
+import instrumentation
+import simulation
+from dawg import CountingLexicon
+from fixtures import build_dawg
+from game_set import GameSet
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.profiler = instrumentation.profiler
+        self.was_enabled = self.profiler.enabled
+        self.profiler.reset()
+        self.dictionary = build_dawg()
+
+    def tearDown(self):
+        self.profiler.enabled = self.was_enabled
+        self.profiler.reset()
+
+    def test_disabled_records_nothing(self):
+        instrumentation.disable()
+        with instrumentation.timer('work'):
+            instrumentation.count('things', 3)
+        self.assertEqual(self.profiler.report(), {'timers': {}, 'counters': {}, 'turns': []})
+
+    def test_timers_and_counters(self):
+        instrumentation.enable()
+        for _ in range(2):
+            with instrumentation.timer('work'):
+                instrumentation.count('things', 3)
+        report = self.profiler.report()
+        self.assertEqual(report['timers']['work']['calls'], 2)
+        self.assertGreaterEqual(report['timers']['work']['seconds'], report['timers']['work']['max_seconds'])
+        self.assertEqual(report['counters'], {'things': 6})
+
+    def test_counting_lexicon(self):
+        instrumentation.enable()
+        lexicon = CountingLexicon(self.dictionary)
+        self.assertTrue(lexicon.search("tea"))
+        self.assertEqual(self.profiler.counters['lexicon.lookups'], 3)
+        self.assertEqual(lexicon.wildcard_search("to?e"), ["tone"])
+
+    def test_game_without_profiling_uses_plain_lexicon(self):
+        instrumentation.disable()
+        game = GameSet(dictionary=self.dictionary, auto_start=False, seed=7, verbose=False)
+        self.assertIs(game.move_generator.dictionary, self.dictionary)
+
+    def test_game_turns_are_summarized(self):
+        instrumentation.enable()
+        game = GameSet(dictionary=self.dictionary, auto_start=False, seed=7, computer_players=2, verbose=False)
+        game.play_game()
+        turns = self.profiler.turns
+        self.assertTrue(turns)
+        self.assertEqual([turn['turn'] for turn in turns], list(range(1, len(turns) + 1)))
+        first = turns[0]
+        self.assertIn('moves.generate', first['timers'])
+        self.assertGreater(first['counters']['lexicon.expansions'], 0)
+        self.assertIn(first['label'], game.players)
+
+        handle, path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            self.profiler.export(path)
+            with open(path, 'r') as f:
+                report = json.load(f)
+        finally:
+            os.remove(path)
+        self.assertEqual(len(report['turns']), len(turns))
+        self.assertEqual(report['counters']['moves.candidates'], self.profiler.counters['moves.candidates'])
+
+    def test_simulation_profile(self):
+        instrumentation.disable()
+        result = simulation.simulate_game(self.dictionary, seed=7, profile=True)
+        self.assertEqual(len(result['profile']['turns']), result['moves'] + result['passes'])
+        self.assertFalse(self.profiler.enabled)
+
+    def test_failed_simulation_restores_profiler(self):
+        instrumentation.disable()
+        with self.assertRaises(ValueError):
+            simulation.simulate_game(self.dictionary, seed=7, num_players=5, profile=True)
+        self.assertFalse(self.profiler.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from leaves import LeaveTable, leave_after
+from move_generator import ACROSS, Move
+
+
+class TestLeaveTable(unittest.TestCase):
+    def setUp(self):
+        self.table = LeaveTable({'?': 1, 'A': 2, 'B': 3}, max_tiles=4)
+
+    def test_rank_is_a_bijection(self):
+        ranks = set()
+        for size in range(5):
+            for leave in set(itertools.combinations("?AABBB", size)):
+                ranks.add(self.table.rank(leave))
+        self.assertEqual(ranks, set(range(len(self.table))))
+
+    def test_rank_ignores_tile_order(self):
+        self.assertEqual(self.table.rank("BA?B"), self.table.rank("?ABB"))
+
+    def test_invalid_leaves(self):
+        with self.assertRaises(ValueError):
+            self.table.rank("AAA")
+        with self.assertRaises(ValueError):
+            self.table.rank("C")
+        with self.assertRaises(ValueError):
+            self.table.rank("?ABBB")
+
+    def test_english_table_size(self):
+        with open('tiles.json', 'r') as f:
+            tiles = json.load(f)['English']['tiles']
+        self.assertEqual(len(LeaveTable.from_tiles(tiles)), 914625)
+
+    def test_fit(self):
+        self.table.fit([("A", 10), ("B", 0)], prior=0)
+        self.assertAlmostEqual(self.table.value("A"), 5)
+        self.assertAlmostEqual(self.table.value("B"), -5)
+        # Unseen leaves add up what their tiles are worth
+        self.assertAlmostEqual(self.table.value("?A"), 5)
+        self.assertAlmostEqual(self.table.value("AB"), 0)
+        self.assertAlmostEqual(self.table.value("AA"), 0)
+
+    def test_save_and_load(self):
+        self.table.fit([("A", 10), ("AB", 4), ("?", 30)])
+        handle, path = tempfile.mkstemp(suffix=".leaves")
+        os.close(handle)
+        try:
+            self.table.save(path)
+            loaded = LeaveTable.load(path)
+            try:
+                self.assertEqual(len(loaded), len(self.table))
+                for size in range(5):
+                    for leave in set(itertools.combinations("?AABBB", size)):
+                        self.assertEqual(loaded.value(leave), self.table.value(leave))
+            finally:
+                loaded.close()
+        finally:
+            os.remove(path)
+
+    def test_leave_after(self):
+        move = Move(7, 7, ACROSS, "ab", ((7, 7, "a", False), (7, 8, "b", True)))
+        self.assertEqual(leave_after(["B", "A", "?", "A"], move), ["B", "A"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from dawg import DAWG, CompiledDAWG
+from lexicon_registry import LexiconRegistry, LexiconView, build_shared_graph, memory_size, reachable_flags
+
+FULL = ["cat", "cats", "dog", "dogs", "zax", "zaxes"]
+SUBSET = ["cat", "cats", "dog", "dogs"]
+
+
+def build(words):
+    dawg = DAWG()
+    for word in sorted(words):
+        dawg.insert(word)
+    dawg.finish()
+    return dawg
+
+
+class TestLexiconRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for name, words in (("full", FULL), ("subset", SUBSET)):
+            self.paths[name] = os.path.join(self.directory.name, name + ".txt")
+            with open(self.paths[name], 'w') as file:
+                file.write("\n".join(word.upper() for word in reversed(words)) + "\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lazy_loading_by_language(self):
+        registry = LexiconRegistry()
+        registry.register("full", self.paths["full"], languages=["en-gb"])
+        self.assertFalse(registry.is_loaded("full"))
+        lexicon = registry.get("en-gb")
+        self.assertTrue(lexicon.search("zaxes"))
+        self.assertIs(registry.get("full"), lexicon)
+        self.assertEqual(registry.loads, 1)
+        with self.assertRaises(KeyError):
+            registry.get("fr")
+
+    def test_compiled_lexicon(self):
+        compiled_path = os.path.join(self.directory.name, "full.dawg")
+        build(FULL).compile(compiled_path)
+        registry = LexiconRegistry()
+        registry.register("full", compiled_path)
+        lexicon = registry.get("full")
+        self.assertIsInstance(lexicon, CompiledDAWG)
+        self.assertTrue(lexicon.search("dogs"))
+        lexicon.close()
+
+    def test_memory_limit_evicts_least_recently_used(self):
+        registry = LexiconRegistry()
+        registry.register("full", loader=lambda: build(FULL))
+        registry.register("subset", loader=lambda: build(SUBSET))
+        registry.memory_limit = memory_size(build(FULL)) + memory_size(build(SUBSET)) - 1
+        registry.get("full")
+        registry.get("subset")
+        self.assertFalse(registry.is_loaded("full"))
+        self.assertTrue(registry.is_loaded("subset"))
+        registry.get("full")
+        self.assertEqual(registry.loads, 3)
+
+    def test_evict_idle(self):
+        registry = LexiconRegistry()
+        registry.register("full", loader=lambda: build(FULL))
+        registry.get("full")
+        self.assertEqual(registry.evict_idle(60), 0)
+        self.assertEqual(registry.evict_idle(0), 1)
+        self.assertFalse(registry.is_loaded("full"))
+
+    def test_shared_graph(self):
+        registry = LexiconRegistry()
+        registry.register_shared({"full": self.paths["full"], "subset": self.paths["subset"]},
+                                 languages={"subset": ["en-us"]})
+        full, subset = registry.get("full"), registry.get("en-us")
+        self.assertIs(full.graph, subset.graph)
+        self.assertEqual(registry.loads, 1)
+        self.assertTrue(full.search("zaxes"))
+        self.assertFalse(subset.search("zaxes"))
+        self.assertTrue(subset.search("dogs"))
+        self.assertEqual(subset.wildcard_search("*s"), ["cats", "dogs"])
+        self.assertEqual(full.wildcard_search("*s"), ["cats", "dogs", "zaxes"])
+        self.assertEqual(sorted(subset.rack_search("", "ZAX")), [])
+        registry.evict("subset")
+        self.assertFalse(registry.is_loaded("full"))
+
+
+class TestSharedGraph(unittest.TestCase):
+    def test_shared_graph_compiles(self):
+        directory = tempfile.TemporaryDirectory()
+        try:
+            paths = {}
+            for name, words in (("full", FULL), ("subset", SUBSET)):
+                paths[name] = os.path.join(directory.name, name + ".txt")
+                with open(paths[name], 'w') as file:
+                    file.write("\n".join(words) + "\n")
+            graph, flags = build_shared_graph(paths)
+            compiled_path = os.path.join(directory.name, "shared.dawg")
+            graph.compile(compiled_path)
+            compiled = CompiledDAWG(compiled_path)
+            reach = reachable_flags(compiled)
+            subset = LexiconView(compiled, flags["subset"], reach)
+            self.assertEqual(subset.collect_all_words(subset.root, ""), SUBSET)
+            self.assertFalse(subset.search("zax"))
+            del subset, reach
+            compiled.close()
+        finally:
+            directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from collections import Counter
+from dawg import DAWG
+from move_generator import ACROSS, DOWN, MoveGenerator
+
+WORDS = ["at", "ate", "cat", "cats", "eat", "eats", "sat", "sea", "seat", "set", "ta", "tae", "tea", "teas", "tee"]
+
+
+def build_dictionary(words):
+    dictionary = DAWG()
+    for word in sorted(words):
+        dictionary.insert(word)
+    dictionary.finish()
+    return dictionary
+
+
+def words_formed(letters, tiles):
+    """Returns every word of two or more letters that runs through one of the placed tiles."""
+    height, width = len(letters), len(letters[0])
+    words = set()
+    for row, col, _, _ in tiles:
+        for dr, dc in ((0, 1), (1, 0)):
+            r, c = row, col
+            while 0 <= r - dr and 0 <= c - dc and letters[r - dr][c - dc]:
+                r, c = r - dr, c - dc
+            start = (r, c)
+            word = ''
+            while r < height and c < width and letters[r][c]:
+                word += letters[r][c]
+                r, c = r + dr, c + dc
+            if len(word) > 1:
+                words.add((start, dr, word))
+    return words
+
+
+def brute_force_moves(letters, rack, lexicon):
+    """Tries every word at every position; slow but obviously correct."""
+    height, width = len(letters), len(letters[0])
+    empty_board = not any(any(row) for row in letters)
+    moves = set()
+    for direction, (dr, dc) in ((ACROSS, (0, 1)), (DOWN, (1, 0))):
+        for row in range(height):
+            for col in range(width):
+                for word in lexicon:
+                    end_r, end_c = row + dr * (len(word) - 1), col + dc * (len(word) - 1)
+                    if end_r >= height or end_c >= width:
+                        continue
+                    if 0 <= row - dr and 0 <= col - dc and letters[row - dr][col - dc]:
+                        continue
+                    if end_r + dr < height and end_c + dc < width and letters[end_r + dr][end_c + dc]:
+                        continue
+                    counts = Counter(rack)
+                    tiles = []
+                    for i, char in enumerate(word):
+                        r, c = row + dr * i, col + dc * i
+                        if letters[r][c]:
+                            if letters[r][c] != char:
+                                break
+                        elif counts[char] > 0:
+                            counts[char] -= 1
+                            tiles.append((r, c, char, False))
+                        elif counts['?'] > 0:
+                            counts['?'] -= 1
+                            tiles.append((r, c, char, True))
+                        else:
+                            break
+                    else:
+                        if not tiles:
+                            continue
+                        board = [list(line) for line in letters]
+                        for r, c, char, _ in tiles:
+                            board[r][c] = char
+                        formed = words_formed(board, tiles)
+                        if not all(formed_word in lexicon for _, _, formed_word in formed):
+                            continue
+                        if empty_board:
+                            if (height // 2, width // 2) not in {(r, c) for r, c, _, _ in tiles}:
+                                continue
+                        elif len(formed) == 1 and len(tiles) == len(word):
+                            continue  # Not connected to any tile already on the board
+                        moves.add(frozenset((r, c, char) for r, c, char, _ in tiles))
+    return moves
+
+
+class TestMoveGenerator(unittest.TestCase):
+    def setUp(self):
+        self.dictionary = build_dictionary(WORDS)
+        self.generator = MoveGenerator(self.dictionary, 7, 7)
+
+    def place_word(self, word, row, col, direction):
+        dr, dc = (0, 1) if direction == ACROSS else (1, 0)
+        for i, char in enumerate(word):
+            self.generator.place(row + dr * i, col + dc * i, char)
+
+    def generated(self, rack):
+        moves = list(self.generator.generate_moves(rack))
+        placements = [frozenset((r, c, char) for r, c, char, _ in move.tiles) for move in moves]
+        self.assertEqual(len(placements), len(set(placements)), "duplicate moves generated")
+        return moves, set(placements)
+
+    def test_first_move_covers_center(self):
+        moves, placements = self.generated(["T", "E", "A"])
+        self.assertTrue(moves)
+        for move in moves:
+            self.assertIn((3, 3), {(r, c) for r, c, _, _ in move.tiles})
+        self.assertEqual(placements, brute_force_moves(self.generator.letters, "tea", WORDS))
+
+    def test_moves_match_brute_force(self):
+        self.place_word("cat", 3, 2, ACROSS)
+        self.generator.place(4, 4, "a")
+        for rack in (["S", "E", "A", "T"], ["E", "?"], ["S"]):
+            moves, placements = self.generated(rack)
+            expected = brute_force_moves(self.generator.letters, ''.join(rack).lower(), WORDS)
+            self.assertEqual(placements, expected)
+            for move in moves:
+                self.assertIn(move.word, WORDS)
+
+    def test_blank_tiles_are_marked(self):
+        moves, _ = self.generated(["?", "?"])
+        self.assertTrue(moves)
+        for move in moves:
+            self.assertTrue(all(is_blank for _, _, _, is_blank in move.tiles))
+
+    def test_cross_checks_are_updated_incrementally(self):
+        self.place_word("cat", 3, 2, ACROSS)
+        # "cats" is the only word that continues "cat" and "at"/"ta" constrain the squares around 'a'
+        self.assertEqual(self.generator.cross_checks[DOWN][(3, 5)], frozenset("s"))
+        self.assertEqual(self.generator.cross_checks[ACROSS][(2, 3)], frozenset("t"))
+        self.assertEqual(self.generator.cross_checks[ACROSS][(4, 3)], frozenset("t"))
+        self.generator.place(4, 3, "t")
+        self.assertNotIn((4, 3), self.generator.cross_checks[ACROSS])
+        self.assertEqual(self.generator.cross_checks[ACROSS][(5, 3)], frozenset("e"))
+        self.assertIn((5, 3), self.generator.anchors)
+        self.assertNotIn((3, 3), self.generator.anchors)
+
+
+if __name__ == "__main__":
+    unittest.main()
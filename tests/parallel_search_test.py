@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from fixtures import build_dawg
+from game_set import GameSet
+from parallel_search import ParallelMoveSearch
+
+
+class TestParallelMoveSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dictionary = build_dawg()
+        handle, cls.path = tempfile.mkstemp(suffix=".dawg")
+        os.close(handle)
+        cls.dictionary.compile(cls.path)
+        cls.search = ParallelMoveSearch(cls.path, processes=2, shards_per_process=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.search.close()
+        os.remove(cls.path)
+
+    def play(self, strategy=None, turns=8):
+        game = GameSet(dictionary=self.dictionary, auto_start=False, seed=11, computer_players=2, verbose=False,
+                       strategy=strategy)
+        players = list(game.players)
+        for turn in range(turns):
+            game.computer_move(players[turn % len(players)])
+        return game
+
+    def test_matches_serial_ranking(self):
+        game = self.play()
+        rack = ["?", "E", "N", "O", "S", "T", "A"]
+        moves = list(game.move_generator.generate_moves(rack))
+        scores = game.scorer.score_moves(game.board, moves)
+        expected = [(moves[i], scores[i]) for i in sorted(range(len(moves)), key=lambda i: (-scores[i], i))]
+        self.assertTrue(expected)
+        self.assertEqual(self.search.ranked_moves(game.move_generator, game.scorer, game.board, rack), expected)
+
+    def test_empty_board(self):
+        game = self.play(turns=0)
+        ranked = self.search.ranked_moves(game.move_generator, game.scorer, game.board, ["N", "O", "T", "E"])
+        self.assertTrue(all(any(row == 7 and col == 7 for row, col, _, _ in move.tiles) for move, _ in ranked))
+        self.assertEqual(ranked[0][1], max(score for _, score in ranked))
+
+    def test_strategy_plays_like_greedy(self):
+        greedy = self.play()
+        parallel = self.play(strategy=self.search)
+        self.assertEqual(parallel.board, greedy.board)
+        self.assertEqual([data['score'] for data in parallel.players.values()],
+                         [data['score'] for data in greedy.players.values()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import re
+import unittest
+import fixtures
+from game_set import GameSet
+from move_generator import ACROSS
+from pattern_query import compile_line, compile_query
+
+WORDS = fixtures.WORDS + ["seat", "stare", "star", "tar", "tars", "bead", "beads", "bread", "dread", "treads",
+                          "oaten", "aeon", "aeons"]
+
+
+def as_regex(pattern):
+    return re.compile(pattern.replace('?', '.').replace('*', '.*'))
+
+
+class TestPatternQuery(unittest.TestCase):
+    def setUp(self):
+        self.dawg = fixtures.build_dawg(WORDS)
+
+    def test_matches_like_a_regular_expression(self):
+        for pattern in ("[st]?ar*", "*s", "?", "??", "[^aeiou]*", "a{2}", "e?{0,2}", "[bd]?ea*", "*n*", "t*s",
+                        "[aeiou]{2,}*", "be?{1,}", "[bd]r?{2}", "?{3}"):
+            with self.subTest(pattern=pattern):
+                expected = sorted(word for word in WORDS if as_regex(pattern).fullmatch(word))
+                self.assertEqual(sorted(compile_query(pattern).search(self.dawg)), expected)
+
+    def test_length_bounds(self):
+        query = compile_query("*", min_length=4, max_length=5)
+        self.assertEqual(sorted(query.search(self.dawg)), sorted(word for word in WORDS if 4 <= len(word) <= 5))
+
+    def test_rack_matches_rack_search(self):
+        for pattern, rack in (("a", "test"), ("?", "?ers"), ("e?", "tars"), ("on", "?ts"), ("", "tonesa")):
+            with self.subTest(pattern=pattern, rack=rack):
+                query = compile_query("*" + pattern + "*")
+                expected = set(self.dawg.rack_search(pattern, list(rack)))
+                self.assertEqual(set(query.search(self.dawg, list(rack.upper()))), expected)
+
+    def test_rack_limits(self):
+        query = compile_query("*a*")
+        self.assertEqual(sorted(query.search(self.dawg, rack=list("TES"), min_tiles=2, max_tiles=2)),
+                         ["ate", "eat", "tea"])
+        self.assertEqual(query.search(self.dawg, max_tiles=0), [])
+
+    def test_board_letters_use_no_tiles(self):
+        self.assertEqual(compile_query("te[aeiou]").search(self.dawg, rack=["A"]), ["tea"])
+        self.assertEqual(compile_query("t??").search(self.dawg, rack=["A", "E"]), ["tea"])
+        self.assertEqual(compile_query("t??").search(self.dawg, rack=["A"]), [])
+
+    def test_queries_are_cached(self):
+        self.assertIs(compile_query("[st]?ar*"), compile_query("[st]?ar*"))
+        self.assertIsNot(compile_query("[st]?ar*"), compile_query("[st]?ar*", max_length=4))
+
+    def test_invalid_patterns(self):
+        for pattern in ("[ab", "a{2", "a{x}", "a{3,1}", "]", "[]"):
+            with self.subTest(pattern=pattern):
+                with self.assertRaises(ValueError):
+                    compile_query(pattern)
+
+    def test_line_matches_move_generator(self):
+        game = GameSet(dictionary=self.dawg, auto_start=False, seed=2, computer_players=2, verbose=False)
+        players = list(game.players)
+        for turn in range(6):
+            game.computer_move(players[turn % 2])
+        generator = game.move_generator
+        rack = ["E", "A", "?", "S", "T"]
+        for row in range(generator.height):
+            with self.subTest(row=row):
+                cells = generator.letters[row]
+                checks = [generator.cross_checks[ACROSS].get((row, col)) for col in range(generator.width)]
+                anchors = [col for col in range(generator.width) if (row, col) in generator.anchors]
+                query = compile_line(cells, checks, anchors)
+                expected = {move.word for move in generator.generate_moves(rack, [(ACROSS, row)])}
+                self.assertEqual(set(query.search(self.dawg, rack, min_tiles=1)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
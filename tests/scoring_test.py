@@ -0,0 +1,55 @@
+import json
+import unittest
+from move_generator import ACROSS, DOWN, Move
+from scoring import Scorer
+
+
+class TestScorer(unittest.TestCase):
+    def setUp(self):
+        with open('tiles.json', 'r') as f:
+            self.tiles = json.load(f)['English']['tiles']
+        special_cells = {(0, 0): '3W', (0, 2): '2L', (1, 1): '2W', (2, 2): '3L'}
+        self.scorer = Scorer(special_cells, 5, 5, self.tiles)
+        self.board = [['' for _ in range(5)] for _ in range(5)]
+
+    def test_letter_and_word_multipliers(self):
+        # Q(10) on 3W, I(1), Z(10) on 2L: (10 + 1 + 20) * 3
+        move = Move(0, 0, ACROSS, "qiz", ((0, 0, "q", False), (0, 1, "i", False), (0, 2, "z", False)))
+        self.assertEqual(self.scorer.score_move(self.board, move), 93)
+
+    def test_blank_scores_nothing(self):
+        move = Move(0, 0, ACROSS, "qi", ((0, 0, "q", True), (0, 1, "i", False)))
+        self.assertEqual(self.scorer.score_move(self.board, move), 3)
+
+    def test_premiums_under_existing_tiles_are_ignored(self):
+        self.board[1][1] = 'A'
+        self.board[1][2] = 'T'
+        move = Move(1, 0, ACROSS, "cat", ((1, 0, "c", False),))
+        self.assertEqual(self.scorer.score_move(self.board, move), 5)
+
+    def test_cross_words(self):
+        self.board[0][1] = 'A'
+        self.board[0][2] = 'T'
+        # "SO" on the 2W square, plus the cross words "AS" (also doubled) and "TO"
+        move = Move(1, 1, ACROSS, "so", ((1, 1, "s", False), (1, 2, "o", False)))
+        self.assertEqual(self.scorer.score_move(self.board, move), 4 + 4 + 2)
+        move = Move(0, 1, DOWN, "as", ((1, 1, "s", False),))
+        self.assertEqual(self.scorer.score_move(self.board, move), 4)
+
+    def test_bingo(self):
+        tiles = tuple((4, col, letter, False) for col, letter in enumerate("retai"))
+        scorer = Scorer({}, 5, 5, self.tiles, rack_size=5)
+        self.assertEqual(scorer.score_move(self.board, Move(4, 0, ACROSS, "retai", tiles)), 5 + Scorer.BINGO_BONUS)
+
+    def test_batch_matches_single_moves(self):
+        self.board[2][2] = 'E'
+        moves = [
+            Move(2, 0, ACROSS, "bee", ((2, 0, "b", False), (2, 1, "e", False))),
+            Move(0, 2, DOWN, "zee", ((0, 2, "z", False), (1, 2, "e", True))),
+        ]
+        self.assertEqual(self.scorer.score_moves(self.board, moves),
+                         [self.scorer.score_move(self.board, move) for move in moves])
+
+
+if __name__ == "__main__":
+    unittest.main()
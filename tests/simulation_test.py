@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from fixtures import build_dawg
+import simulation
+
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        self.dictionary = build_dawg()
+
+    def test_simulate_game_is_reproducible(self):
+        first = simulation.simulate_game(self.dictionary, seed=7)
+        second = simulation.simulate_game(self.dictionary, seed=7)
+        for key in ('scores', 'winner', 'moves', 'passes', 'tiles_left'):
+            self.assertEqual(first[key], second[key])
+        self.assertGreater(first['moves'], 0)
+        self.assertEqual(len(first['scores']), 2)
+
+    def test_record_leaves(self):
+        result = simulation.simulate_game(self.dictionary, seed=7, record_leaves=True)
+        self.assertTrue(result['leaves'])
+        for leave, score in result['leaves']:
+            self.assertLess(len(leave), 7)
+            self.assertGreaterEqual(score, 0)
+        self.assertNotIn('leaves', simulation.simulate_game(self.dictionary, seed=7))
+
+    def test_run_simulations_in_parallel(self):
+        handle, path = tempfile.mkstemp(suffix=".dawg")
+        os.close(handle)
+        try:
+            self.dictionary.compile(path)
+            results = list(simulation.run_simulations(path, games=3, processes=2, seed=5))
+        finally:
+            os.remove(path)
+
+        self.assertEqual([result['game'] for result in results], [0, 1, 2])
+        for index, result in enumerate(results):
+            expected = simulation.simulate_game(self.dictionary, seed=5 + index)
+            self.assertEqual(result['scores'], expected['scores'])
+            self.assertEqual(result['moves'], expected['moves'])
+
+
+if __name__ == "__main__":
+    unittest.main()
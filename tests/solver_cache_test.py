@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from dawg import DAWG
+from findmatchingwords import find_matching_words
+from solver_cache import SolverCache
+
+WORDS = ["at", "ate", "eat", "east", "sat", "sate", "seat", "tea", "teas"]
+
+
+class TestSolverCache(unittest.TestCase):
+    def setUp(self):
+        self.dawg = DAWG()
+        for word in sorted(WORDS):
+            self.dawg.insert(word)
+        self.dawg.finish()
+        self.cache = SolverCache()
+
+    def test_tile_order_shares_an_entry(self):
+        first = find_matching_words("", ["t", "e", "a", "s"], self.dawg, cache=self.cache)
+        second = find_matching_words("", ["S", "A", "E", "T"], self.dawg, cache=self.cache)
+        self.assertEqual(first, find_matching_words("", ["t", "e", "a", "s"], self.dawg))
+        self.assertEqual(second, first)
+        self.assertEqual((self.cache.hits, self.cache.misses, len(self.cache)), (1, 1, 1))
+
+    def test_blanks_and_patterns(self):
+        for pattern, rack in (("?", ["?", "a"]), ("e", ["a", "t", "s"]), ("", ["?", "?", "t"])):
+            self.assertEqual(find_matching_words(pattern, rack, self.dawg, cache=self.cache),
+                             find_matching_words(pattern, rack, self.dawg))
+
+    def test_update_invalidates(self):
+        self.assertNotIn("tase", find_matching_words("", "tase", self.dawg, cache=self.cache))
+        self.dawg.add_word("tase")
+        self.assertIn("tase", find_matching_words("", "tase", self.dawg, cache=self.cache))
+        self.dawg.remove_word("tase")
+        self.assertNotIn("tase", find_matching_words("", "tase", self.dawg, cache=self.cache))
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_lexicons_are_kept_apart(self):
+        other = DAWG()
+        other.insert("tea")
+        other.finish()
+        self.assertEqual(find_matching_words("", "tea", other, cache=self.cache), {"tea"})
+        self.assertEqual(find_matching_words("", "tea", self.dawg, cache=self.cache), {"at", "ate", "eat", "tea"})
+
+    def test_eviction(self):
+        cache = SolverCache(max_entries=2)
+        for rack in ("at", "ate", "at", "sat"):
+            cache.matching_words("", rack, self.dawg)
+        self.assertEqual(cache.evictions, 1)
+        cache.matching_words("", "at", self.dawg)
+        self.assertEqual(cache.stats()['hits'], 2)
+
+        cache = SolverCache(max_words=3)
+        cache.matching_words("", "at", self.dawg)
+        cache.matching_words("", "tea", self.dawg)
+        self.assertEqual(cache.stats()['entries'], 1)
+        self.assertEqual(cache.stats()['words'], 4)
+
+    def test_disk_backing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "answers.sqlite")
+            cache = SolverCache(path=path)
+            cache.name_lexicon(self.dawg, "test")
+            expected = cache.matching_words("?", "tes", self.dawg)
+            cache.close()
+
+            cache = SolverCache(path=path)
+            cache.name_lexicon(self.dawg, "test")
+            self.assertEqual(cache.matching_words("?", "set", self.dawg), expected)
+            self.assertEqual((cache.disk_hits, cache.misses), (1, 0))
+
+            # Answers for an updated lexicon stay in memory only
+            self.dawg.add_word("tase")
+            self.assertIn("tase", cache.matching_words("", "tase", self.dawg))
+            original = DAWG()
+            original.build_from_words(sorted(WORDS))
+            fresh = SolverCache(path=path)
+            fresh.name_lexicon(original, "test")
+            self.assertNotIn("tase", fresh.matching_words("", "tase", original))
+            self.assertEqual(fresh.stats()['misses'], 1)
+            cache.close()
+            fresh.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
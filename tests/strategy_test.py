@@ -0,0 +1,116 @@
+import gc
+import time
+import unittest
+from dawg import DAWG
+from game_set import GameSet
+from leaves import LeaveTable
+from strategy import MonteCarloStrategy, TranspositionCache
+
+WORDS = ["at", "ate", "cat", "eat", "eta", "tae", "tea", "ta", "te"]
+
+
+class TestTranspositionCache(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        cache = TranspositionCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_clear(self):
+        cache = TranspositionCache(2)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+
+class TestMonteCarloStrategy(unittest.TestCase):
+    def setUp(self):
+        dictionary = DAWG()
+        for word in sorted(WORDS):
+            dictionary.insert(word)
+        dictionary.finish()
+        self.game = GameSet(dictionary=dictionary, auto_start=False, seed=3, verbose=False)
+        self.player, self.opponent = list(self.game.players)
+        self.game.players[self.player]['tiles'] = ["C", "A", "T", "E"]
+        self.game.players[self.opponent]['tiles'] = ["T", "E", "A"]
+
+    def test_chooses_a_legal_move(self):
+        strategy = MonteCarloStrategy(time_budget=10, max_simulations=20, seed=1)
+        move = strategy.choose_move(self.game, self.player)
+        self.assertIn(move, list(self.game.move_generator.generate_moves(["C", "A", "T", "E"])))
+
+    def test_respects_time_budget(self):
+        strategy = MonteCarloStrategy(time_budget=0.05, seed=1)
+        start = time.perf_counter()
+        strategy.choose_move(self.game, self.player)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_no_moves(self):
+        self.game.players[self.player]['tiles'] = ["Q"]
+        self.assertIsNone(MonteCarloStrategy(seed=1).choose_move(self.game, self.player))
+
+    def test_repeated_samples_hit_the_cache(self):
+        # With a tiny pool of unseen tiles the same opponent racks come up again and again
+        self.game.tiles = {tile: {'count': count, 'points': 1} for tile, count in
+                           {"C": 1, "A": 2, "T": 2, "E": 1}.items()}
+        strategy = MonteCarloStrategy(time_budget=10, candidates=2, max_simulations=40, seed=1)
+        strategy.choose_move(self.game, self.player)
+        self.assertGreater(strategy.cache.hits, 0)
+
+    def test_leave_values_count(self):
+        # Keeping the E is worth more than any score difference between the candidates
+        leaves = LeaveTable({"A": 1, "C": 1, "E": 1, "T": 1})
+        leaves.fit([("E", 100), ("A", 0), ("C", 0), ("T", 0)], prior=0)
+        strategy = MonteCarloStrategy(time_budget=10, max_simulations=0, seed=1, leaves=leaves)
+        move = strategy.choose_move(self.game, self.player)
+        self.assertNotIn("e", [letter for _, _, letter, _ in move.tiles])
+
+    def test_game_uses_strategy(self):
+        self.game.strategy = MonteCarloStrategy(time_budget=10, max_simulations=10, seed=1)
+        self.game.stock = []
+        score = self.game.computer_move(self.player)
+        self.assertGreater(score, 0)
+        self.assertEqual(self.game.players[self.player]['score'], score)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestMonteCarloTimeBudget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Building Collins takes seconds, so the tests share one dictionary. A full garbage
+        # collection over its millions of nodes pauses for longer than the slack allowed
+        # below, so they are kept out of the collector while the turns are timed.
+        cls.word_dictionary = DAWG("collins2019.txt")
+        gc.collect()
+        gc.freeze()
+
+    @classmethod
+    def tearDownClass(cls):
+        gc.unfreeze()
+        del cls.word_dictionary
+
+    def test_turns_stay_within_budget(self):
+        # Blank-heavy racks on a lexicon this size take far longer than the budget to search
+        budget, slack = 0.2, 0.1
+        game = GameSet(dictionary=self.word_dictionary, auto_start=False, seed=5, verbose=False)
+        strategy = MonteCarloStrategy(time_budget=budget, seed=1)
+        player = list(game.players)[0]
+        for turn in range(6):
+            game.players[player]['tiles'][:2] = ["?", "?"]
+            start = time.perf_counter()
+            move = strategy.choose_move(game, player)
+            self.assertLess(time.perf_counter() - start, budget + slack, f"turn {turn}")
+            if move is None:
+                break
+            game.play_move(player, move)
+            player = game.next_player(player)